@@ -1,98 +1,63 @@
 #!/usr/bin/env python3
 """
 Script to convert Keras model to TensorFlow.js format
-This script fixes the NumPy compatibility issues automatically
+Converts in-process with the image classifier's TF.js writer, so it needs
+no tensorflowjs/NumPy version pins, subprocesses or network access
 """
 
 import os
 import sys
-import subprocess
+import time
+import argparse
+
+SITE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SITE_DIR, 'dakotaai-demos', 'apps', 'image-classifier'))
+
+from tfjs_writer import convert_model_file, QUANTIZATION_DTYPES
 
 def main():
-    print("🔧 TensorFlow.js Model Converter (Fixed Version)")
+    parser = argparse.ArgumentParser(description='Convert the transfer-learning model to TensorFlow.js format')
+    parser.add_argument('model_path', nargs='?',
+                        default=os.path.join(SITE_DIR, '..', 'transfer-image-classifier', 'models', 'transfer_model.h5'))
+    parser.add_argument('--output', default=os.path.join(SITE_DIR, 'demos', 'tfjs_model'))
+    parser.add_argument('--quantize', choices=QUANTIZATION_DTYPES, help='store weights as float16 or uint8')
+    args = parser.parse_args()
+
+    print("🔧 TensorFlow.js Model Converter")
     print("=" * 50)
 
-    # Change to the correct directory
-    target_dir = "C:/Users/neil/Desktop/transfer-image-classifier"
-    os.chdir(target_dir)
-    print(f"📁 Changed to directory: {target_dir}")
-
     # Check if model exists
-    model_path = "models/transfer_model.h5"
-    if not os.path.exists(model_path):
-        print(f"❌ Error: Model file not found: {model_path}")
-        print("Please ensure you're running from the transfer-image-classifier directory")
+    if not os.path.exists(args.model_path):
+        print(f"❌ Error: Model file not found: {args.model_path}")
+        print("Pass the path of your trained .h5/.keras model as the first argument")
         sys.exit(1)
 
-    print(f"📖 Found model: {model_path}")
+    print(f"📖 Found model: {args.model_path}")
 
-    # Create isolated conversion environment
     try:
-        print("\n🔄 Creating isolated conversion environment...")
-
-        # Use subprocess to run conversion with specific package versions
-        conversion_cmd = [
-            sys.executable, "-m", "pip", "install",
-            "tensorflowjs==3.18.0", "numpy==1.21.0", "--upgrade", "--quiet"
-        ]
-
-        print("📦 Installing compatible TensorFlow.js version...")
-        result = subprocess.run(conversion_cmd, capture_output=True, text=True)
-
-        if result.returncode != 0:
-            print(f"❌ Package installation failed: {result.stderr}")
-            print("Try running: pip install tensorflowjs==3.18.0 numpy==1.21.0 --upgrade")
-            sys.exit(1)
-
-        print("✅ Compatible packages installed!")
-
-        # Now try the conversion
-        print("\n🚀 Converting your model to TensorFlow.js format...")
-
-        # Import tensorflowjs with specified version
-        try:
-            from tensorflowjs import converters
-            import tensorflow as tf
-            from tensorflow import keras
-
-        except ImportError as e:
-            print(f"❌ Import failed after package installation: {e}")
-            sys.exit(1)
-
-        # Load the model
-        print("Loading your trained model...")
-        model = keras.models.load_model(model_path)
-        print("✅ Model loaded successfully!")
-
-        # Convert to TensorFlow.js
-        output_dir = "../dakotaai-site/demos/tfjs_model"  # Go up and into demos
-        print(f"Converting to: {output_dir}")
-
-        converters.save_keras_model(model, output_dir)
-        print(f"✅ Model converted successfully!")
+        print(f"\n🚀 Converting your model to TensorFlow.js format: {args.output}")
+        start = time.perf_counter()
+        convert_model_file(args.model_path, args.output, args.quantize, converted_by='dakotaai-site-converter')
+        print(f"✅ Model converted in {time.perf_counter() - start:.1f}s")
 
         # Verify output files
-        if os.path.exists(os.path.join(output_dir, 'model.json')):
-            print("
-📁 Output files created:"            for file in os.listdir(output_dir):
-                file_path = os.path.join(output_dir, file)
-                size_mb = os.path.getsize(file_path) / (1024 * 1024)
-                print(f"  - {file}: {size_mb:.1f} MB")
-            print("\n🎉 SUCCESS! Your demo is now ready!")
-            print("🔗 Open demos/image_classifier.html in your browser")
-            print("🤖 It should now load and use your real trained model!")
-        else:
-            print("❌ Conversion completed but output files not found")
+        print("\n📁 Output files created:")
+        for file in sorted(os.listdir(args.output)):
+            size_mb = os.path.getsize(os.path.join(args.output, file)) / (1024 * 1024)
+            print(f"  - {file}: {size_mb:.1f} MB")
+        print("\n🎉 SUCCESS! Your demo is now ready!")
+        print("🔗 Open demos/image_classifier.html in your browser")
+        print("🤖 It should now load and use your real trained model!")
 
     except Exception as e:
         print(f"❌ Conversion failed: {e}")
 
         # Provide troubleshooting
         print("\n🔧 Troubleshooting:")
-        print("1. Try closing all Python processes and restarting")
-        print("2. Check if your model file is not corrupted")
-        print("3. Try upgrading TensorFlow: pip install tensorflow --upgrade")
-        print("4. If issues persist, we can create a smaller demo model")
+        print("1. Check if your model file is not corrupted")
+        print("2. Custom layers cannot be converted; rebuild the model from built-in Keras layers")
+        print("3. If issues persist, we can create a smaller demo model")
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
@@ -3,6 +3,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
+from scipy.cluster import hierarchy
+from scipy.spatial.distance import squareform
+import math
+import os
 import warnings
 
 # Suppress warnings for cleaner output
@@ -12,6 +16,10 @@ warnings.filterwarnings('ignore')
 plt.style.use('seaborn-v0_8-whitegrid')
 sns.set_palette("husl")
 
+# Above this many variables main() writes a tiled overview into LARGE_MATRIX_OUTPUT_DIR
+LARGE_MATRIX_THRESHOLD = 40
+LARGE_MATRIX_OUTPUT_DIR = 'correlation_tiles'
+
 def load_and_clean_data(file_path):
     """Load and clean the sales data CSV file."""
     # Read the CSV file with error handling for inconsistent rows
@@ -65,27 +73,172 @@ def calculate_correlations_and_significance(data):
     # Calculate correlation matrix
     corr_matrix = data_clean.corr(method='pearson')
 
-    # Calculate p-values for each correlation pair
-    p_values = pd.DataFrame(np.nan, index=corr_matrix.index, columns=corr_matrix.columns)
-
+    # Calculate p-values for every correlation pair at once
     n = len(data_clean)
-    for i in range(len(corr_matrix.columns)):
-        for j in range(i+1, len(corr_matrix.columns)):
-            col1, col2 = corr_matrix.columns[i], corr_matrix.columns[j]
-            corr_val = corr_matrix.loc[col1, col2]
+    r = corr_matrix.to_numpy(dtype=float)
 
-            # Fisher's r-to-z transformation
-            z = 0.5 * np.log((1 + corr_val) / (1 - corr_val + 1e-10))
-            se = 1 / np.sqrt(n - 3)
-            z_score = z / se
+    # Fisher's r-to-z transformation
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = 0.5 * np.log((1 + r) / (1 - r + 1e-10))
+    se = 1 / np.sqrt(n - 3)
+    z_score = z / se
 
-            # Two-tailed test
-            p_val = 2 * (1 - stats.norm.cdf(abs(z_score)))
-            p_values.loc[col1, col2] = p_val
-            p_values.loc[col2, col1] = p_val
+    # Two-tailed test
+    p_matrix = 2 * (1 - stats.norm.cdf(np.abs(z_score)))
+    np.fill_diagonal(p_matrix, np.nan)
+    p_values = pd.DataFrame(p_matrix, index=corr_matrix.index, columns=corr_matrix.columns)
 
     return corr_matrix, p_values
 
+def significance_levels(p_matrix):
+    """Map a matrix of p-values to integer levels: 0 = ns, 1 = *, 2 = **, 3 = ***."""
+    p_matrix = np.asarray(p_matrix, dtype=float)
+    return ((p_matrix < 0.05).astype(np.intp) + (p_matrix < 0.01) + (p_matrix < 0.001))
+
+def significance_markers(p_matrix):
+    """Map a matrix of p-values to significance star labels in one vectorized pass."""
+    return np.array(['ns', '*', '**', '***'])[significance_levels(p_matrix)]
+
+def significance_stamps(stamp_size=5):
+    """Build one dot stamp per significance level, larger dots for stronger significance."""
+    centre = (stamp_size - 1) / 2
+    yy, xx = np.mgrid[:stamp_size, :stamp_size]
+    radius = np.hypot(yy - centre, xx - centre)
+    max_radius = stamp_size / 2
+    return np.stack([radius < max_radius * scale for scale in (0, 0.35, 0.6, 0.9)]).astype(float)
+
+def cluster_order(corr_matrix):
+    """Return the hierarchical-clustering leaf order for a correlation matrix."""
+    r = np.nan_to_num(corr_matrix.to_numpy(dtype=float))
+
+    # Strongly (anti-)correlated variables are close together
+    distance = 1 - np.abs(r)
+    distance = (distance + distance.T) / 2
+    np.fill_diagonal(distance, 0)
+    distance = np.clip(distance, 0, None)
+
+    condensed = squareform(distance, checks=False)
+    linkage = hierarchy.linkage(condensed, method='average')
+
+    # Optimal leaf ordering is cubic, so only refine smaller matrices
+    if len(r) <= 500:
+        linkage = hierarchy.optimal_leaf_ordering(linkage, condensed)
+
+    return hierarchy.leaves_list(linkage)
+
+def downsample_matrix(matrix, max_size):
+    """Block-average a square matrix so that neither side exceeds max_size cells."""
+    size = matrix.shape[0]
+    factor = max(1, math.ceil(size / max_size))
+    if factor == 1:
+        return matrix, 1
+
+    # Pad with NaN to a whole number of blocks, then average each block
+    padded_size = math.ceil(size / factor) * factor
+    padded = np.full((padded_size, padded_size), np.nan)
+    padded[:size, :size] = matrix
+    blocks = padded.reshape(padded_size // factor, factor, padded_size // factor, factor)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return np.nanmean(blocks, axis=(1, 3)), factor
+
+def save_kwargs(fmt):
+    """Extra savefig options per format; fast zlib level for the many PNG tiles."""
+    if fmt == 'png':
+        return {'pil_kwargs': {'compress_level': 1}}
+    return {}
+
+def create_large_correlation_heatmap(corr_matrix, p_values, data, output_dir,
+                                     cluster=True, overview_size=500, tile_size=250,
+                                     formats=('png',)):
+    """Render a big correlation matrix as a downsampled overview plus tiled zoom images.
+
+    All files are written into output_dir (created if needed) and their
+    paths are returned; nothing is shown.
+
+    Cells are drawn as a single image instead of annotated seaborn cells, the
+    variables are optionally reordered by hierarchical clustering, and
+    significance markers are stamped into a single overlay image per tile.
+    Only the lower-triangle tiles are written since the matrix is symmetric.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    if cluster and len(corr_matrix.columns) > 2:
+        order = cluster_order(corr_matrix)
+        corr_matrix = corr_matrix.iloc[order, order]
+        p_values = p_values.iloc[order, order]
+
+    r = corr_matrix.to_numpy(dtype=float)
+    p = p_values.to_numpy(dtype=float)
+    labels = np.asarray(corr_matrix.columns, dtype=str)
+    size = len(labels)
+    cmap = sns.diverging_palette(220, 20, as_cmap=True)
+    n_obs = len(data.dropna())
+    written = []
+
+    # Overview: block-averaged full matrix
+    overview, factor = downsample_matrix(r, overview_size)
+    fig, ax = plt.subplots(figsize=(10, 8), dpi=150)
+    image = ax.imshow(overview, cmap=cmap, vmin=-1, vmax=1, interpolation='nearest',
+                      extent=(0, size, size, 0))
+    fig.colorbar(image, ax=ax, shrink=0.8)
+    ax.set_title(f'Correlation Overview ({size} variables, {factor}x{factor} block mean'
+                 f'{", clustered" if cluster else ""})\nn = {n_obs} observations',
+                 fontsize=14, fontweight='bold')
+    for fmt in formats:
+        path = os.path.join(output_dir, f'overview.{fmt}')
+        fig.savefig(path, dpi=150, bbox_inches='tight', facecolor='white', **save_kwargs(fmt))
+        written.append(path)
+    plt.close(fig)
+
+    # Zoom tiles: one reusable figure, the image data is swapped per tile
+    stamps = significance_stamps()
+    stamp_size = stamps.shape[1]
+    levels = significance_levels(p)
+    starts = range(0, size, tile_size)
+    fig, ax = plt.subplots(figsize=(10, 10), dpi=100)
+    fig.subplots_adjust(left=0.08, right=0.98, bottom=0.08, top=0.94)
+    for row_start in starts:
+        for col_start in starts:
+            if col_start > row_start:
+                continue
+
+            rows = slice(row_start, min(row_start + tile_size, size))
+            cols = slice(col_start, min(col_start + tile_size, size))
+            tile_r = r[rows, cols]
+            n_rows, n_cols = tile_r.shape
+            # Global matrix coordinates, so the ticks match the ranges in the title
+            extent = (cols.start - 0.5, cols.stop - 0.5, rows.stop - 0.5, rows.start - 0.5)
+
+            # Colour the cells, upsample each cell to a stamp and darken it where
+            # significant, so every tile is a single pre-composited image
+            colours = cmap((tile_r + 1) / 2)
+            colours = np.repeat(np.repeat(colours, stamp_size, axis=0), stamp_size, axis=1)
+            dots = stamps[levels[rows, cols]]
+            dots = dots.transpose(0, 2, 1, 3).reshape(n_rows * stamp_size, n_cols * stamp_size)
+            colours[..., :3] *= (1 - 0.7 * dots)[..., np.newaxis]
+            colours = (colours * 255).astype(np.uint8)
+
+            ax.clear()
+            ax.imshow(colours, interpolation='nearest', extent=extent)
+
+            if n_cols <= 60:
+                ax.set_xticks(range(cols.start, cols.stop))
+                ax.set_xticklabels(labels[cols], rotation=90, fontsize=6)
+                ax.set_yticks(range(rows.start, rows.stop))
+                ax.set_yticklabels(labels[rows], fontsize=6)
+            ax.set_title(f'Rows {rows.start}-{rows.stop - 1}, columns {cols.start}-{cols.stop - 1}'
+                         f'\n(dot size: *p<0.05, **p<0.01, ***p<0.001)', fontsize=10)
+
+            for fmt in formats:
+                path = os.path.join(output_dir, f'tile_r{row_start:05d}_c{col_start:05d}.{fmt}')
+                fig.savefig(path, dpi=100, facecolor='white', **save_kwargs(fmt))
+                written.append(path)
+    plt.close(fig)
+
+    print(f"Large correlation heatmap saved as {len(written)} files in '{output_dir}/'")
+    return written
+
 def create_correlation_heatmap(corr_matrix, p_values, data):
     """Create and save a professional correlation heatmap with significance markers."""
     # Set up the figure with custom size for high resolution
@@ -103,27 +256,15 @@ def create_correlation_heatmap(corr_matrix, p_values, data):
                 ax=ax)
 
     # Add significance markers
+    markers = significance_markers(p_values.to_numpy(dtype=float))
     for i in range(len(corr_matrix.columns)):
         for j in range(i+1, len(corr_matrix.columns)):
-            col1, col2 = corr_matrix.columns[i], corr_matrix.columns[j]
-            p_val = p_values.loc[col1, col2]
-
             # Position for the significance marker
             x_pos = j + 0.5
             y_pos = i + 0.5
 
-            # Add significance stars
-            if p_val < 0.001:
-                marker = '***'
-            elif p_val < 0.01:
-                marker = '**'
-            elif p_val < 0.05:
-                marker = '*'
-            else:
-                marker = 'ns'  # not significant
-
             # Add text annotation for significance
-            ax.text(x_pos, y_pos, marker, ha='center', va='center',
+            ax.text(x_pos, y_pos, markers[i, j], ha='center', va='center',
                    fontsize=14, fontweight='bold', color='white',
                    bbox=dict(boxstyle="round,pad=0.2", facecolor='black', alpha=0.8))
 
@@ -201,9 +342,12 @@ def main():
         print("="*60)
         print(p_values.round(4))
 
-        # Create and save heatmap
+        # Create and save heatmap; per-cell annotations are unreadable for big matrices
         print("\nCreating correlation heatmap...")
-        create_correlation_heatmap(corr_matrix, p_values, data)
+        if len(corr_matrix.columns) > LARGE_MATRIX_THRESHOLD:
+            create_large_correlation_heatmap(corr_matrix, p_values, data, output_dir=LARGE_MATRIX_OUTPUT_DIR)
+        else:
+            create_correlation_heatmap(corr_matrix, p_values, data)
 
         print("\n" + "="*60)
         print("ANALYSIS COMPLETE")
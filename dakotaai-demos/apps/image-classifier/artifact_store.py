@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import argparse
+
+from tfjs_writer import write_tfjs_layers_model, SHARD_BYTES
+
+# Served from the site root as /models/...
+STORE_DIR = 'public/models'
+HASH_CHARS = 20
+
+class ArtifactStore:
+    """Content-addressed store for TF.js model exports
+
+    Shards and model.json manifests live in objects/ under the hash of
+    their content, so a file never changes once written: identical shards
+    are stored once across models and versions, redeploys only add new
+    objects, and CDNs may cache objects/ forever. index.json is the only
+    mutable file; it maps each model name to its current manifest and
+    keeps the earlier versions.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.index_path = os.path.join(root, 'index.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def staging_dir(self):
+        """Temporary directory next to the objects, so publishing moves files instead of copying them"""
+        return tempfile.TemporaryDirectory(prefix='.staging-', dir=self.root)
+
+    def put_file(self, path, suffix, move=False):
+        """Copy (or move) a file into objects/ under its content hash; returns (object name, bytes added)"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        name = digest.hexdigest()[:HASH_CHARS] + suffix
+        target = os.path.join(self.objects_dir, name)
+
+        if os.path.exists(target):
+            if move:
+                os.remove(path)
+            return name, 0
+        size = os.path.getsize(path)
+        if move:
+            os.replace(path, target)
+        else:
+            # Copy next to the target first so the object appears atomically
+            shutil.copyfile(path, target + '.tmp')
+            os.replace(target + '.tmp', target)
+        return name, size
+
+    def put_bytes(self, data, suffix):
+        """Store in-memory content such as a manifest; returns (object name, bytes added)"""
+        with self.staging_dir() as staging:
+            path = os.path.join(staging, 'object')
+            with open(path, 'wb') as f:
+                f.write(data)
+            return self.put_file(path, suffix, move=True)
+
+    def read_index(self):
+        if not os.path.exists(self.index_path):
+            return {'models': {}}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def write_index(self, index):
+        # Replace atomically so a deploy never picks up a half-written index
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def publish_directory(self, tfjs_dir, name, metadata=None, move=False):
+        """Store a converted TF.js model directory (layers or graph model) as a new version of name
+
+        Weight files become hash-named objects and the manifest's paths are
+        rewritten to point at them; tfjs resolves them next to the manifest.
+        move=True moves the weight files instead of copying them, for
+        directories from staging_dir().
+        """
+        with open(os.path.join(tfjs_dir, 'model.json')) as f:
+            model_json = json.load(f)
+
+        total_bytes = new_bytes = 0
+        for group in model_json.get('weightsManifest', []):
+            paths = []
+            for path in group['paths']:
+                total_bytes += os.path.getsize(os.path.join(tfjs_dir, path))
+                object_name, added = self.put_file(os.path.join(tfjs_dir, path), '.bin', move)
+                new_bytes += added
+                paths.append(object_name)
+            group['paths'] = paths
+
+        manifest = json.dumps(model_json, sort_keys=True, separators=(',', ':')).encode()
+        manifest_name, _ = self.put_bytes(manifest, '.json')
+
+        manifest_path = f"objects/{manifest_name}"
+        index = self.read_index()
+        entry = index['models'].setdefault(name, {'current': None, 'versions': []})
+        unchanged = entry['current'] == manifest_path
+        if not unchanged:
+            entry['current'] = manifest_path
+            entry['versions'].append({
+                'manifest': manifest_path,
+                'published': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'weights_bytes': total_bytes,
+                **(metadata or {})
+            })
+            self.write_index(index)
+
+        status = "unchanged" if unchanged else f"{new_bytes / 1024:.0f} KB of {total_bytes / 1024:.0f} KB weights new"
+        print(f"📦 Published {name}: /{os.path.basename(self.root)}/{manifest_path} ({status})")
+        return {'name': name, 'manifest': manifest_path, 'unchanged': unchanged,
+                'weights_bytes': total_bytes, 'new_bytes': new_bytes}
+
+    def publish_model(self, model, name, quantization=None, shard_bytes=SHARD_BYTES, converted_by='dakotaai-tfjs-writer'):
+        """Export a Keras model with tfjs_writer and publish it as a new version of name"""
+        with self.staging_dir() as staging:
+            write_tfjs_layers_model(model, staging, shard_bytes, converted_by=converted_by, quantization=quantization)
+            return self.publish_directory(staging, name, {'quantization': quantization or 'float32'}, move=True)
+
+    def manifest_path(self, name, version=-1):
+        """Path of a model's manifest, the current one by default"""
+        entry = self.read_index()['models'][name]
+        manifest = entry['current'] if version == -1 else entry['versions'][version]['manifest']
+        return os.path.join(self.root, manifest)
+
+    def prune(self, keep=3):
+        """Keep the last keep versions of every model and delete objects no kept version references"""
+        index = self.read_index()
+        referenced = set()
+        for entry in index['models'].values():
+            entry['versions'] = entry['versions'][-keep:]
+            for version in entry['versions']:
+                referenced.add(os.path.basename(version['manifest']))
+                with open(os.path.join(self.root, version['manifest'])) as f:
+                    for group in json.load(f).get('weightsManifest', []):
+                        referenced.update(group['paths'])
+        self.write_index(index)
+
+        removed = 0
+        for file in os.listdir(self.objects_dir):
+            if file not in referenced:
+                os.remove(os.path.join(self.objects_dir, file))
+                removed += 1
+        # Staging directories left behind by interrupted exports
+        for file in os.listdir(self.root):
+            if file.startswith('.staging-'):
+                shutil.rmtree(os.path.join(self.root, file), ignore_errors=True)
+
+        print(f"🧹 Removed {removed} unreferenced objects")
+        return removed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Publish TF.js models to the content-addressed artifact store')
+    parser.add_argument('--root', default=STORE_DIR)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    publish_parser = subparsers.add_parser('publish', help='publish a Keras model or a converted TF.js directory')
+    publish_parser.add_argument('path', help='.keras/.h5 model file or directory containing model.json')
+    publish_parser.add_argument('name')
+    publish_parser.add_argument('--quantize', choices=('float16', 'uint8'))
+
+    subparsers.add_parser('list', help='show the models and versions in the index')
+
+    prune_parser = subparsers.add_parser('prune', help='drop old versions and unreferenced objects')
+    prune_parser.add_argument('--keep', type=int, default=3)
+    args = parser.parse_args()
+
+    store = ArtifactStore(args.root)
+    if args.command == 'publish':
+        if os.path.isdir(args.path):
+            store.publish_directory(args.path, args.name)
+        else:
+            import tensorflow as tf
+            model = tf.keras.models.load_model(args.path, compile=False)
+            store.publish_model(model, args.name, args.quantize)
+    elif args.command == 'list':
+        for name, entry in store.read_index()['models'].items():
+            print(f"{name}: /{os.path.basename(store.root)}/{entry['current']}")
+            for version in entry['versions']:
+                print(f"  {version['published']}  {version['manifest']}  {version['weights_bytes'] / 1024:.0f} KB  "
+                      f"{version.get('quantization', '')}")
+    else:
+        store.prune(args.keep)
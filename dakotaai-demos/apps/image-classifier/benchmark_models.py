@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+import tensorflow as tf
+import numpy as np
+import os
+import json
+import time
+import tempfile
+import argparse
+
+from train_cifar10_model import create_modern_cnn, create_enhanced_cnn
+from simple_cifar_model import build_simple_cifar_model
+from create_working_model import build_working_cifar_model
+from create_tfjs_model import build_tfjs_compatible_cifar10
+from quantize_model import measure_latency
+
+# Architecture builders and the trained files each training script writes
+MODEL_VARIANTS = {
+    'modern': (create_modern_cnn, []),
+    'enhanced': (create_enhanced_cnn, ['best_cifar10_model.keras', 'cifar10_high_accuracy_model.keras']),
+    'simple': (build_simple_cifar_model, ['simple_cifar10.h5']),
+    'working': (build_working_cifar_model, []),
+    'tfjs_compatible': (build_tfjs_compatible_cifar10, ['tfjs_compatible_cifar10.keras'])
+}
+
+BATCH_SIZES = (1, 8, 32, 128)
+
+def load_variant(name):
+    """Return (model, source) using a trained file when present, else the fresh architecture"""
+    builder, model_files = MODEL_VARIANTS[name]
+    for model_file in model_files:
+        if os.path.exists(model_file):
+            return tf.keras.models.load_model(model_file, compile=False), model_file
+    return builder(), 'untrained architecture'
+
+def count_flops(model):
+    """Analytic forward-pass FLOPs per image for Conv2D and Dense layers (multiply-add = 2 FLOPs)"""
+    flops = 0
+    for layer in model.layers:
+        if isinstance(layer, tf.keras.Model):
+            flops += count_flops(layer)
+        elif isinstance(layer, (tf.keras.layers.Conv2D, tf.keras.layers.Dense)):
+            # Every output position applies the full kernel once
+            positions = int(np.prod(layer.output.shape[1:-1]))
+            flops += 2 * positions * int(np.prod(layer.kernel.shape))
+    return flops
+
+def measure_cold_load(model):
+    """Time load_model and the first prediction from a freshly saved .keras file"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'model.keras')
+        model.save(path)
+        size_kb = os.path.getsize(path) / 1024
+
+        start = time.perf_counter()
+        loaded = tf.keras.models.load_model(path, compile=False)
+        load_ms = (time.perf_counter() - start) * 1000
+        loaded(np.zeros((1, 32, 32, 3), dtype=np.float32), training=False)
+        first_prediction_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        'load_ms': round(load_ms, 1),
+        'first_prediction_ms': round(first_prediction_ms, 1),
+        'file_size_kb': round(size_kb, 1)
+    }
+
+def measure_throughput(predict, batch_size, min_seconds=1.0, warmup=3):
+    """Images per second for repeated batches of batch_size random images"""
+    batch = np.random.default_rng(0).random((batch_size, 32, 32, 3), dtype=np.float32)
+    for _ in range(warmup):
+        predict(batch)
+
+    images = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        predict(batch)
+        images += batch_size
+    return round(images / (time.perf_counter() - start), 1)
+
+def benchmark_variant(name, latency_runs=200, batch_sizes=BATCH_SIZES):
+    """Collect size, compute and speed metrics for one model variant"""
+    print(f"\n⏱️ Benchmarking {name}...")
+    model, source = load_variant(name)
+
+    # Traced forward pass, as the serving engine runs it
+    forward = tf.function(lambda x: model(x, training=False))
+    predict = lambda x: forward(x).numpy()
+
+    sample = np.random.default_rng(0).random((1, 32, 32, 3), dtype=np.float32)
+    result = {
+        'source': source,
+        'params': int(model.count_params()),
+        'flops': count_flops(model),
+        'cold_start': measure_cold_load(model),
+        'single_image': measure_latency(predict, sample, runs=latency_runs),
+        'images_per_sec': {str(b): measure_throughput(predict, b) for b in batch_sizes}
+    }
+
+    print(f"  {result['params']:,} params, {result['flops'] / 1e6:.1f} MFLOPs, "
+          f"load {result['cold_start']['load_ms']:.0f} ms, "
+          f"p50 {result['single_image']['p50_ms']:.2f} ms, "
+          f"p99 {result['single_image']['p99_ms']:.2f} ms")
+    return result
+
+def markdown_report(results, batch_sizes=BATCH_SIZES):
+    """Render the benchmark results as a Markdown table"""
+    header = ['Model', 'Params', 'MFLOPs', 'Load ms', 'p50 ms', 'p90 ms', 'p99 ms']
+    header += [f'img/s @{b}' for b in batch_sizes]
+    lines = ['| ' + ' | '.join(header) + ' |', '|' + '---|' * len(header)]
+
+    for name, r in results['models'].items():
+        row = [name, f"{r['params']:,}", f"{r['flops'] / 1e6:.1f}",
+               f"{r['cold_start']['load_ms']:.0f}",
+               f"{r['single_image']['p50_ms']:.2f}",
+               f"{r['single_image']['p90_ms']:.2f}",
+               f"{r['single_image']['p99_ms']:.2f}"]
+        row += [f"{r['images_per_sec'][str(b)]:.0f}" for b in batch_sizes]
+        lines.append('| ' + ' | '.join(row) + ' |')
+
+    env = results['environment']
+    lines.append('')
+    lines.append(f"TensorFlow {env['tensorflow']}, {env['cpu_count']} CPU(s). "
+                 "FLOPs count Conv2D and Dense layers only; latency is a single 32x32 image.")
+    return '\n'.join(lines) + '\n'
+
+def run_benchmarks(variants=None, output_prefix='model_benchmark', latency_runs=200, batch_sizes=BATCH_SIZES):
+    """Benchmark every CIFAR-10 model variant and write JSON and Markdown reports"""
+    variants = variants or list(MODEL_VARIANTS)
+    results = {
+        'environment': {
+            'tensorflow': tf.__version__,
+            'cpu_count': os.cpu_count()
+        },
+        'models': {}
+    }
+
+    for name in variants:
+        results['models'][name] = benchmark_variant(name, latency_runs, batch_sizes)
+        tf.keras.backend.clear_session()
+
+    with open(output_prefix + '.json', 'w') as f:
+        json.dump(results, f, indent=2)
+    with open(output_prefix + '.md', 'w') as f:
+        f.write(markdown_report(results, batch_sizes))
+
+    print(f"\n💾 Reports saved: {output_prefix}.json, {output_prefix}.md")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the CIFAR-10 model variants')
+    parser.add_argument('variants', nargs='*',
+                        help=f"variants to benchmark (default: all of {', '.join(MODEL_VARIANTS)})")
+    parser.add_argument('--runs', type=int, default=200, help='single-image latency samples')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=list(BATCH_SIZES))
+    parser.add_argument('--output', default='model_benchmark', help='report path without extension')
+    args = parser.parse_args()
+    unknown = set(args.variants) - set(MODEL_VARIANTS)
+    if unknown:
+        parser.error(f"unknown variant(s): {', '.join(sorted(unknown))}")
+
+    print("📊 CIFAR-10 Model Benchmark")
+    print("=" * 50)
+
+    results = run_benchmarks(args.variants, args.output, args.runs, args.batch_sizes)
+    print()
+    print(markdown_report(results, args.batch_sizes))
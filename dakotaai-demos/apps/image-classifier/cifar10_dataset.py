@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import os
+import time
+
+# Normalized arrays live here; point several jobs at the same directory to share one page cache
+CACHE_DIR = os.environ.get('CIFAR10_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'dakotaai', 'cifar10'))
+
+ARRAY_NAMES = ('x_train', 'y_train', 'x_test', 'y_test')
+
+def cache_paths(cache_dir=None):
+    cache_dir = cache_dir or CACHE_DIR
+    return {name: os.path.join(cache_dir, f'{name}.npy') for name in ARRAY_NAMES}
+
+def build_cache(cache_dir=None):
+    """Download CIFAR-10 once and write float32 [0, 1] images and one-hot labels as .npy files"""
+    from tensorflow.keras.datasets import cifar10
+
+    paths = cache_paths(cache_dir)
+    os.makedirs(os.path.dirname(paths['x_train']), exist_ok=True)
+
+    print("📦 Building CIFAR-10 .npy cache...")
+    (x_train, y_train), (x_test, y_test) = cifar10.load_data()
+    arrays = {
+        'x_train': x_train.astype('float32') / 255.0,
+        'y_train': np.eye(10, dtype=np.float32)[y_train.reshape(-1)],
+        'x_test': x_test.astype('float32') / 255.0,
+        'y_test': np.eye(10, dtype=np.float32)[y_test.reshape(-1)]
+    }
+
+    # Labels are written before images and every file is renamed into place,
+    # so a concurrent reader never maps a half-written array
+    for name in ('y_train', 'y_test', 'x_test', 'x_train'):
+        temp_path = f"{paths[name]}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.save(f, arrays[name])
+        os.replace(temp_path, paths[name])
+
+    print(f"✅ Cache written to {os.path.dirname(paths['x_train'])}")
+
+def load_cifar10(cache_dir=None, mmap=True):
+    """Return ((x_train, y_train), (x_test, y_test)) as normalized float32 images and one-hot labels
+
+    Arrays are memory-mapped read-only from the .npy cache, so loading
+    takes milliseconds and concurrent jobs share the same physical pages.
+    The cache is built on first use.
+    """
+    paths = cache_paths(cache_dir)
+    if not all(os.path.exists(path) for path in paths.values()):
+        build_cache(cache_dir)
+
+    mmap_mode = 'r' if mmap else None
+    arrays = {name: np.load(path, mmap_mode=mmap_mode) for name, path in paths.items()}
+    return (arrays['x_train'], arrays['y_train']), (arrays['x_test'], arrays['y_test'])
+
+if __name__ == "__main__":
+    print("📚 CIFAR-10 shared dataset cache")
+    print("=" * 50)
+
+    load_cifar10()
+    start = time.perf_counter()
+    (x_train, y_train), (x_test, y_test) = load_cifar10()
+    print(f"⚡ Memory-mapped load: {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"Training data shape: {x_train.shape}, labels {y_train.shape}")
+    print(f"Test data shape: {x_test.shape}, labels {y_test.shape}")
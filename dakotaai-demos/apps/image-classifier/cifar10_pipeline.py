@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+import tensorflow as tf
+import numpy as np
+import time
+import math
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+def augment_batch(images, seed, rotation=20, shift=0.15, zoom=0.15):
+    """Random flip, rotation, shift and zoom for a whole batch as one fused affine warp
+
+    Matches create_data_augmentation() (ImageDataGenerator's shear_range=0.1
+    is 0.1 degrees, visually a no-op, so it is left out). Each image gets
+    its own transform drawn from the stateless seed, and all of them are
+    applied in a single resampling pass with nearest-edge fill.
+    """
+    shape = tf.shape(images)
+    n = shape[0]
+    h = tf.cast(shape[1], tf.float32)
+    w = tf.cast(shape[2], tf.float32)
+
+    seeds = tf.random.experimental.stateless_split(seed, 6)
+    theta = tf.random.stateless_uniform([n], seeds[0], -rotation, rotation) * (math.pi / 180)
+    zoom_x = tf.random.stateless_uniform([n], seeds[1], 1 - zoom, 1 + zoom)
+    zoom_y = tf.random.stateless_uniform([n], seeds[2], 1 - zoom, 1 + zoom)
+    shift_x = tf.random.stateless_uniform([n], seeds[3], -shift, shift) * w
+    shift_y = tf.random.stateless_uniform([n], seeds[4], -shift, shift) * h
+    flip = tf.where(tf.random.stateless_uniform([n], seeds[5]) < 0.5, -1.0, 1.0)
+
+    # Output pixel -> input pixel: rotate, zoom and flip about the image centre, then shift
+    cos, sin = tf.cos(theta), tf.sin(theta)
+    a0, a1 = cos * zoom_x * flip, -sin * zoom_y
+    b0, b1 = sin * zoom_x * flip, cos * zoom_y
+    cx, cy = (w - 1) / 2, (h - 1) / 2
+    a2 = cx - a0 * cx - a1 * cy + shift_x
+    b2 = cy - b0 * cx - b1 * cy + shift_y
+    zeros = tf.zeros([n])
+    transforms = tf.stack([a0, a1, a2, b0, b1, b2, zeros, zeros], axis=1)
+
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=images, transforms=transforms, output_shape=shape[1:3],
+        fill_value=0.0, interpolation='BILINEAR', fill_mode='NEAREST'
+    )
+
+MIX_MODES = (None, 'mixup', 'cutmix', 'both')
+
+def gather_batches(index_batches, x, y):
+    """Map batches of indices to (images, labels) read from numpy arrays
+
+    The arrays are never copied into the TensorFlow graph, so memory-mapped
+    .npy files (see cifar10_dataset.py) stay shared in the page cache and
+    only the rows of the current batch are touched.
+    """
+    def gather(indices):
+        # Sorted indices turn random access into forward reads through the file
+        indices = np.sort(indices)
+        return np.asarray(x[indices], dtype=np.float32), np.asarray(y[indices], dtype=np.float32)
+
+    def read(indices):
+        images, labels = tf.numpy_function(gather, [indices], (tf.float32, tf.float32))
+        images.set_shape((None,) + tuple(x.shape[1:]))
+        labels.set_shape((None,) + tuple(y.shape[1:]))
+        return images, labels
+
+    return index_batches.map(read, num_parallel_calls=AUTOTUNE)
+
+def sample_beta(shape, seed, alpha):
+    """Stateless Beta(alpha, alpha) samples from two gamma draws"""
+    seeds = tf.random.experimental.stateless_split(seed, 2)
+    g1 = tf.random.stateless_gamma(shape, seeds[0], alpha)
+    g2 = tf.random.stateless_gamma(shape, seeds[1], alpha)
+    return g1 / (g1 + g2)
+
+def mix_batch(images, labels, seed, mode='mixup', mixup_alpha=0.2, cutmix_alpha=1.0):
+    """MixUp and/or CutMix each image with a partner from the same batch
+
+    Every image draws its own mixing ratio. 'both' picks MixUp or CutMix
+    per image with equal probability. Labels are mixed by the fraction of
+    each image that ends up in the result.
+    """
+    shape = tf.shape(images)
+    n, h, w = shape[0], shape[1], shape[2]
+    seeds = tf.random.experimental.stateless_split(seed, 6)
+
+    # Pair every image with another one from a random permutation of the batch
+    partner = tf.argsort(tf.random.stateless_uniform([n], seeds[0]))
+    partner_images = tf.gather(images, partner)
+    partner_labels = tf.gather(labels, partner)
+
+    mixed_images, weights = [], []
+    if mode in ('mixup', 'both'):
+        lam = sample_beta([n], seeds[1], mixup_alpha)
+        mixed_images.append(lam[:, None, None, None] * images
+                            + (1 - lam[:, None, None, None]) * partner_images)
+        weights.append(lam)
+
+    if mode in ('cutmix', 'both'):
+        # Paste a partner box covering about (1 - lam) of the image
+        lam = sample_beta([n], seeds[2], cutmix_alpha)
+        cut = tf.sqrt(1 - lam)
+        hf, wf = tf.cast(h, tf.float32), tf.cast(w, tf.float32)
+        cy = tf.random.stateless_uniform([n], seeds[3]) * hf
+        cx = tf.random.stateless_uniform([n], seeds[4]) * wf
+        y0 = tf.clip_by_value(tf.round(cy - cut * hf / 2), 0, hf)
+        y1 = tf.clip_by_value(tf.round(cy + cut * hf / 2), 0, hf)
+        x0 = tf.clip_by_value(tf.round(cx - cut * wf / 2), 0, wf)
+        x1 = tf.clip_by_value(tf.round(cx + cut * wf / 2), 0, wf)
+
+        rows = tf.range(hf)[None, :]
+        cols = tf.range(wf)[None, :]
+        in_rows = tf.cast((rows >= y0[:, None]) & (rows < y1[:, None]), images.dtype)
+        in_cols = tf.cast((cols >= x0[:, None]) & (cols < x1[:, None]), images.dtype)
+        box = in_rows[:, :, None, None] * in_cols[:, None, :, None]
+
+        mixed_images.append(images + box * (partner_images - images))
+        # Clipping at the border shrinks the box, so use the area actually pasted
+        weights.append(1 - (y1 - y0) * (x1 - x0) / (hf * wf))
+
+    if mode == 'both':
+        use_cutmix = tf.random.stateless_uniform([n], seeds[5]) < 0.5
+        images = tf.where(use_cutmix[:, None, None, None], mixed_images[1], mixed_images[0])
+        lam = tf.where(use_cutmix, weights[1], weights[0])
+    else:
+        images, lam = mixed_images[0], weights[0]
+
+    lam = tf.cast(lam, labels.dtype)[:, None]
+    return images, lam * labels + (1 - lam) * partner_labels
+
+def make_train_dataset(x, y, batch_size=128, seed=42, augment=True, deterministic=True,
+                       mix=None, mixup_alpha=0.2, cutmix_alpha=1.0, num_shards=1, shard_index=0):
+    """Shuffled, batched and augmented training dataset
+
+    Augmentation and the optional MixUp/CutMix stage (mix='mixup',
+    'cutmix' or 'both') run on whole batches in parallel map calls. Every
+    batch draws its randomness from a stateless seed paired with it in
+    the pipeline, so a given seed reproduces the same epochs regardless
+    of thread scheduling. deterministic=False additionally lets batches
+    leave the parallel map out of order.
+
+    With num_shards > 1 this worker keeps every num_shards-th example
+    starting at shard_index, and tf.distribute auto-sharding is turned off.
+    """
+    if mix not in MIX_MODES:
+        raise ValueError(f"mix must be one of {MIX_MODES}, got {mix!r}")
+
+    options = tf.data.Options()
+    options.deterministic = deterministic
+
+    # Shuffle and batch indices only; the examples are read per batch
+    dataset = tf.data.Dataset.range(len(x))
+    if num_shards > 1:
+        dataset = dataset.shard(num_shards, shard_index)
+        options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.OFF
+        seed += shard_index
+    dataset = dataset.shuffle(len(x) // num_shards + 1, seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size, drop_remainder=True)
+    dataset = gather_batches(dataset, x, y)
+
+    if augment or mix:
+        def transform(batch, batch_seed):
+            images, labels = batch
+            if augment:
+                images = augment_batch(images, batch_seed)
+            if mix:
+                images, labels = mix_batch(images, labels, tf.random.experimental.stateless_fold_in(batch_seed, 1),
+                                           mix, mixup_alpha, cutmix_alpha)
+            return images, labels
+
+        # One [2]-shaped stateless seed per batch, different every epoch
+        seeds = tf.data.Dataset.random(seed=seed, rerandomize_each_iteration=True).batch(2)
+        dataset = tf.data.Dataset.zip(dataset, seeds).map(transform, num_parallel_calls=AUTOTUNE)
+
+    return dataset.prefetch(AUTOTUNE).with_options(options)
+
+def make_eval_dataset(x, y, batch_size=256, num_shards=1, shard_index=0):
+    """Batched, prefetched evaluation dataset in the original order"""
+    dataset = tf.data.Dataset.range(len(x))
+    if num_shards > 1:
+        dataset = dataset.shard(num_shards, shard_index)
+        options = tf.data.Options()
+        options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.OFF
+        dataset = dataset.with_options(options)
+    return gather_batches(dataset.batch(batch_size), x, y).prefetch(AUTOTUNE)
+
+def measure_images_per_sec(batches, steps, batch_size):
+    """Pull steps batches from an iterator and return images per second"""
+    next(batches)  # first batch pays for tracing and buffer fills
+    start = time.perf_counter()
+    for _ in range(steps):
+        next(batches)
+    return round(steps * batch_size / (time.perf_counter() - start), 1)
+
+def benchmark_input_pipeline(x, y, batch_size=128, steps=50):
+    """Compare augmented images/sec of ImageDataGenerator.flow against the tf.data pipeline"""
+    from train_cifar10_model import create_data_augmentation
+
+    print(f"\n📊 Input pipeline throughput ({steps} batches of {batch_size})...")
+    datagen = create_data_augmentation()
+    results = {
+        'image_data_generator': measure_images_per_sec(
+            iter(datagen.flow(x, y, batch_size=batch_size, seed=42)), steps, batch_size),
+        'tf_data_deterministic': measure_images_per_sec(
+            iter(make_train_dataset(x, y, batch_size)), steps, batch_size),
+        'tf_data_parallel': measure_images_per_sec(
+            iter(make_train_dataset(x, y, batch_size, deterministic=False)), steps, batch_size)
+    }
+
+    baseline = results['image_data_generator']
+    for name, images_per_sec in results.items():
+        print(f"  {name:22s} {images_per_sec:8.0f} img/s ({images_per_sec / baseline:.1f}x)")
+
+    return results
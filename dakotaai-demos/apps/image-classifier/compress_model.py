@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+import tensorflow as tf
+from tensorflow.keras import callbacks
+import numpy as np
+import os
+import gzip
+import json
+import argparse
+
+from cifar10_dataset import load_cifar10
+from cifar10_pipeline import make_train_dataset
+from quantize_model import measure_latency
+
+# Layers between a pruned layer and its consumer that keep channels independent
+CHANNELWISE_LAYERS = ('BatchNormalization', 'Activation', 'ReLU', 'Dropout', 'MaxPooling2D', 'AveragePooling2D')
+WEIGHT_LAYERS = ('Conv2D', 'Dense')
+
+def inbound_layer_names(entry):
+    """Names of the layers feeding a functional layer config"""
+    names = []
+
+    def collect(value):
+        if isinstance(value, dict):
+            if 'keras_history' in value.get('config', {}):
+                names.append(value['config']['keras_history'][0])
+            for item in value.values():
+                collect(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                collect(item)
+
+    collect(entry.get('inbound_nodes', []))
+    return names
+
+def layer_graph(model):
+    """(config, {layer name: config entry}, {layer name: consuming layer names}) of a Sequential or functional model"""
+    config = model.get_config()
+    entries = {entry['config']['name']: entry for entry in config['layers']}
+    consumers = {name: [] for name in entries}
+
+    if isinstance(model, tf.keras.Sequential):
+        names = [entry['config']['name'] for entry in config['layers']]
+        for name, following in zip(names, names[1:]):
+            consumers[name].append(following)
+    else:
+        for name, entry in entries.items():
+            for inbound in inbound_layer_names(entry):
+                consumers[inbound].append(name)
+
+    return config, entries, consumers
+
+def prunable_chains(model):
+    """(layer, channelwise layers, consumer) triples whose output channels can be removed
+
+    A Conv2D or Dense layer qualifies when its output reaches exactly one
+    Conv2D or Dense consumer through channel-wise layers only, e.g. the
+    first convolution of every residual block or the hidden units of the
+    dense head. Outputs feeding adds, multiplies, flattens or the model
+    output are left alone, so the pruned model keeps every other shape.
+    """
+    config, entries, consumers = layer_graph(model)
+    chains = []
+    for name, entry in entries.items():
+        if entry['class_name'] not in WEIGHT_LAYERS:
+            continue
+        between, current = [], name
+        while len(consumers[current]) == 1:
+            current = consumers[current][0]
+            if entries[current]['class_name'] in CHANNELWISE_LAYERS:
+                between.append(current)
+                continue
+            if entries[current]['class_name'] in WEIGHT_LAYERS and entries[current]['config'].get('groups', 1) == 1:
+                chains.append((name, between, current))
+            break
+    return chains
+
+def channel_importance(model, name, between):
+    """Score output channels by |BN gamma| when batch norm follows, else by the L1 norm of the filter"""
+    for layer_name in between:
+        layer = model.get_layer(layer_name)
+        if isinstance(layer, tf.keras.layers.BatchNormalization) and layer.scale:
+            return np.abs(layer.gamma.numpy())
+    kernel = model.get_layer(name).kernel.numpy()
+    return np.abs(kernel).reshape(-1, kernel.shape[-1]).sum(axis=0)
+
+def prune_channels(model, ratio=0.5, multiple=8):
+    """Rebuild model with the least important ratio of channels removed from every prunable layer
+
+    Kept channel counts are rounded to a multiple of 8 so the smaller
+    kernels stay SIMD-friendly. Surviving weights are copied over, so the
+    pruned model starts close to the original and only needs a short fine-tune.
+    """
+    config, entries, _ = layer_graph(model)
+    output_keep, input_keep = {}, {}
+
+    for name, between, consumer in prunable_chains(model):
+        importance = channel_importance(model, name, between)
+        channels = len(importance)
+        kept = min(channels, max(multiple, int(round(channels * (1 - ratio) / multiple)) * multiple))
+        keep = np.sort(np.argsort(importance)[::-1][:kept])
+
+        output_keep[name] = keep
+        for layer_name in between:
+            output_keep[layer_name] = keep
+        input_keep[consumer] = keep
+
+        size_key = 'filters' if entries[name]['class_name'] == 'Conv2D' else 'units'
+        entries[name]['config'][size_key] = int(kept)
+
+    # Saved build shapes would rebuild layers at their old widths; let them infer the new ones
+    for entry in entries.values():
+        entry.pop('build_config', None)
+    pruned = type(model).from_config(config)
+
+    for layer in pruned.layers:
+        weights = model.get_layer(layer.name).get_weights()
+        if layer.name in input_keep:
+            # Kernel input channels are the second-to-last axis of Conv2D and Dense kernels
+            weights[0] = np.take(weights[0], input_keep[layer.name], axis=-2)
+        if layer.name in output_keep:
+            # Every other weight (kernel, bias, BN statistics) is indexed by output channel last
+            weights = [np.take(w, output_keep[layer.name], axis=-1) for w in weights]
+        layer.set_weights(weights)
+
+    return pruned
+
+def cluster_weights(model, clusters=16, iterations=20):
+    """Replace every Conv2D and Dense kernel by clusters shared values (1-D k-means per kernel)
+
+    Returns (kernel variable, cluster indices, clusters) triples for
+    keeping the kernels clustered while fine-tuning.
+    """
+    assignments = []
+    for layer in model.layers:
+        if layer.__class__.__name__ not in WEIGHT_LAYERS:
+            continue
+        weights = layer.kernel.numpy().reshape(-1)
+        # Linear initialisation over the weight range works well for weight sharing
+        centroids = np.linspace(weights.min(), weights.max(), clusters)
+        for _ in range(iterations):
+            boundaries = (centroids[1:] + centroids[:-1]) / 2
+            index = np.searchsorted(boundaries, weights)
+            counts = np.bincount(index, minlength=clusters)
+            sums = np.bincount(index, weights=weights, minlength=clusters)
+            centroids = np.where(counts > 0, sums / np.maximum(counts, 1), centroids)
+        layer.kernel.assign(centroids[index].reshape(layer.kernel.shape).astype(np.float32))
+        assignments.append((layer.kernel, tf.constant(index.reshape(layer.kernel.shape), dtype=tf.int32), clusters))
+    return assignments
+
+class KeepClustered(callbacks.Callback):
+    """Snap clustered kernels back to their cluster means after every training step
+
+    Cluster membership stays fixed; each centroid moves to the mean of the
+    updated weights in its cluster, so fine-tuning trains the shared values.
+    """
+
+    def __init__(self, assignments):
+        super().__init__()
+        self.assignments = assignments
+
+    def on_train_batch_end(self, batch, logs=None):
+        for kernel, index, clusters in self.assignments:
+            centroids = tf.math.unsorted_segment_mean(tf.reshape(kernel, [-1]), tf.reshape(index, [-1]), clusters)
+            kernel.assign(tf.gather(centroids, index))
+
+def fine_tune(model, x_train, y_train, epochs=5, batch_size=128, learning_rate=0.01, extra_callbacks=()):
+    """Short cosine-decayed SGD fine-tune on the augmented training pipeline"""
+    steps = epochs * (len(x_train) // batch_size)
+    model.compile(
+        optimizer=tf.keras.optimizers.SGD(
+            learning_rate=tf.keras.optimizers.schedules.CosineDecay(learning_rate, max(steps, 1)),
+            momentum=0.9, nesterov=True),
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    model.fit(make_train_dataset(x_train, y_train, batch_size=batch_size), epochs=epochs,
+              callbacks=list(extra_callbacks), verbose=2)
+    return model
+
+def measure_model(model, x_test, y_test):
+    """Accuracy, parameters, raw and gzip weight sizes and single-image CPU latency of a model"""
+    from train_cifar10_model import streaming_confusion_matrix, iter_eval_batches
+
+    cm = streaming_confusion_matrix(model, iter_eval_batches(x_test, y_test))
+
+    # Browsers fetch weights gzip-compressed; shared cluster values compress far better than raw floats
+    weights = b''.join(w.astype(np.float32).tobytes() for w in model.get_weights())
+    forward = tf.function(lambda x: model(x, training=False))
+
+    return {
+        'accuracy': round(float(np.trace(cm) / cm.sum()), 4),
+        'params': int(model.count_params()),
+        'weights_kb': round(len(weights) / 1024, 1),
+        'gzip_weights_kb': round(len(gzip.compress(weights, compresslevel=6)) / 1024, 1),
+        'single_image': measure_latency(forward, np.asarray(x_test[:1]))
+    }
+
+def compress_model(model, prune_ratio=0.5, clusters=16, fine_tune_epochs=5, batch_size=128,
+                   output_path='cifar10_compressed_model.keras', report_path='compression_report.json'):
+    """Prune, fine-tune, cluster and fine-tune a trained model, reporting every stage"""
+    (x_train, y_train), (x_test, y_test) = load_cifar10()
+    report = {'settings': {'prune_ratio': prune_ratio, 'clusters': clusters, 'fine_tune_epochs': fine_tune_epochs}}
+
+    print("\n✂️ Compressing model...")
+    report['original'] = measure_model(model, x_test, y_test)
+
+    if prune_ratio > 0:
+        print(f"\n✂️ Pruning {prune_ratio:.0%} of the channels of {len(prunable_chains(model))} layers...")
+        model = prune_channels(model, prune_ratio)
+        report['pruned'] = measure_model(model, x_test, y_test)
+        model = fine_tune(model, x_train, y_train, fine_tune_epochs, batch_size)
+        report['pruned_fine_tuned'] = measure_model(model, x_test, y_test)
+
+    if clusters:
+        print(f"\n🎯 Clustering kernels to {clusters} shared values...")
+        assignments = cluster_weights(model, clusters)
+        report['clustered'] = measure_model(model, x_test, y_test)
+        # Lower learning rate: the shared values only need small corrections
+        model = fine_tune(model, x_train, y_train, fine_tune_epochs, batch_size, learning_rate=0.001,
+                          extra_callbacks=[KeepClustered(assignments)])
+        report['clustered_fine_tuned'] = measure_model(model, x_test, y_test)
+
+    # Drop the fine-tuning optimizer state from the saved files
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    model.save(output_path)
+    model.save(os.path.splitext(output_path)[0] + '.h5')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n📊 Compression report:")
+    for stage, r in report.items():
+        if stage == 'settings':
+            continue
+        print(f"  {stage:22s} accuracy {r['accuracy']:.4f}  {r['params']:>10,} params  "
+              f"{r['weights_kb']:8.0f} KB  gzip {r['gzip_weights_kb']:8.0f} KB  "
+              f"p50 {r['single_image']['p50_ms']:.2f} ms")
+    print(f"💾 Saved {output_path} and {report_path}")
+
+    return model, report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Prune and cluster a trained CIFAR-10 model')
+    parser.add_argument('model_path', nargs='?', default='cifar10_high_accuracy_model.keras')
+    parser.add_argument('--prune-ratio', type=float, default=0.5, help='fraction of prunable channels to remove')
+    parser.add_argument('--clusters', type=int, default=16, help='shared values per kernel (0 disables clustering)')
+    parser.add_argument('--epochs', type=int, default=5, help='fine-tuning epochs after each stage')
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--output', default='cifar10_compressed_model.keras')
+    args = parser.parse_args()
+
+    print("✂️ CIFAR-10 Model Compression")
+    print("=" * 50)
+
+    model = tf.keras.models.load_model(args.model_path, compile=False)
+    compress_model(model, args.prune_ratio, args.clusters, args.epochs, args.batch_size, args.output)
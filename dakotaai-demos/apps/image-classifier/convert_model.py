@@ -3,10 +3,16 @@
 import tensorflow as tf
 import numpy as np
 import os
-import json
+import argparse
+from artifact_store import ArtifactStore
+from tfjs_writer import (write_tfjs_layers_model, check_quantized_export, converter_quantization_flags,
+                         QUANTIZATION_DTYPES)
 
-def convert_h5_to_tfjs():
-    """Convert CIFAR-10 high accuracy model to TensorFlow.js format"""
+def convert_h5_to_tfjs(quantization=None):
+    """Convert CIFAR-10 high accuracy model to TensorFlow.js format
+
+    quantization='float16' or 'uint8' shrinks the exported weights 2x or 4x.
+    """
 
     # Try available model files in order of preference
     model_files = [
@@ -43,95 +49,66 @@ def convert_h5_to_tfjs():
     print("\n📊 Model Summary:")
     model.summary()
 
-    # Create output directory
-    output_dir = 'public/tfjs_model'
-    os.makedirs(output_dir, exist_ok=True)
-
     # Convert using SavedModel format (more compatible)
     print(f"\n🔄 Converting to TensorFlow.js format...")
-    print(f"Output directory: {output_dir}")
 
     # Save as SavedModel first, then convert
     saved_model_dir = 'temp_saved_model'
     model.export(saved_model_dir, format='tf_saved_model')
 
-    # Convert using the converters API (avoiding deprecated save_keras_model)
-    import subprocess
-    try:
-        result = subprocess.run([
-            'tensorflowjs_converter',
-            '--input_format=tf_saved_model',
-            '--output_format=tfjs_graph_model',
-            saved_model_dir,
-            output_dir
-        ], capture_output=True, text=True)
-
-        if result.returncode == 0:
-            print("✅ Conversion completed successfully!")
-        else:
-            print(f"❌ Conversion failed: {result.stderr}")
+    # Convert into a staging directory, then publish its files to the content-addressed store
+    store = ArtifactStore()
+    with store.staging_dir() as output_dir:
+        # Convert using the converters API (avoiding deprecated save_keras_model)
+        import subprocess
+        try:
+            result = subprocess.run([
+                'tensorflowjs_converter',
+                '--input_format=tf_saved_model',
+                '--output_format=tfjs_graph_model',
+                *converter_quantization_flags(quantization),
+                saved_model_dir,
+                output_dir
+            ], capture_output=True, text=True)
+
+            if result.returncode == 0:
+                print("✅ Conversion completed successfully!")
+            else:
+                print(f"❌ Conversion failed: {result.stderr}")
+                return False
+
+        except FileNotFoundError:
+            print("❌ tensorflowjs_converter not found. Using alternative method...")
+
+            # Alternative: Manual conversion (simplified for basic models)
+            print("🔧 Using alternative conversion method...")
+
+            if model.weights:
+                write_tfjs_layers_model(model, output_dir, converted_by='custom-converter', quantization=quantization)
+                print("✅ Alternative conversion completed")
+            else:
+                print("❌ Could not extract model weights")
+
+        if not os.path.exists(os.path.join(output_dir, 'model.json')):
+            print("❌ model.json: Missing")
             return False
+        published = store.publish_directory(output_dir, 'cifar10', {'quantization': quantization or 'float32'},
+                                            move=True)
 
-    except FileNotFoundError:
-        print("❌ tensorflowjs_converter not found. Using alternative method...")
-
-        # Alternative: Manual conversion (simplified for basic models)
-        print("🔧 Using alternative conversion method...")
-
-        # Save weights and create model.json manually
-        weights_path = os.path.join(output_dir, 'weights.bin')
-        model_json_path = os.path.join(output_dir, 'model.json')
-
-        # This is a simplified approach - for production, you'd need full tfjs conversion
-        print("⚠️  Alternative conversion may not work for complex models")
-
-        # Try to get model weights
-        weights = model.get_weights()
-        if weights:
-            # Serialize weights (simplified)
-            weight_data = b''
-            for w in weights:
-                weight_data += w.tobytes()
-
-            with open(weights_path, 'wb') as f:
-                f.write(weight_data)
-
-            # Create basic model.json (simplified)
-            model_config = model.to_json()
-            with open(model_json_path, 'w') as f:
-                json.dump({
-                    'modelTopology': json.loads(model_config),
-                    'weightsManifest': [{
-                        'paths': ['weights.bin'],
-                        'weights': []
-                    }],
-                    'format': 'layers-model',
-                    'generatedBy': 'TensorFlow.js',
-                    'convertedBy': 'custom-converter'
-                }, f, indent=2)
-
-            print("✅ Alternative conversion completed (limited compatibility)")
-        else:
-            print("❌ Could not extract model weights")
+    if quantization:
+        check_quantized_export(model, quantization)
 
     # Clean up temp directory
     if os.path.exists(saved_model_dir):
         import shutil
         shutil.rmtree(saved_model_dir)
 
-    # Verify output files
-    expected_files = ['model.json', 'weights.bin']
-    print("\n📁 Generated files:")
-    for file in expected_files:
-        file_path = os.path.join(output_dir, file)
-        if os.path.exists(file_path):
-            size = os.path.getsize(file_path)
-            print(f"✅ {file}: {size} bytes")
-        else:
-            print(f"❌ {file}: Missing")
-
-    print(f"\n🎉 CIFAR-10 model ready! Load from: /tfjs_model/model.json")
+    print(f"\n🎉 CIFAR-10 model ready! Load from: /models/{published['manifest']} (index: /models/index.json)")
     return True
 
 if __name__ == "__main__":
-    convert_h5_to_tfjs()
+    parser = argparse.ArgumentParser(description='Convert the CIFAR-10 model to TensorFlow.js format')
+    parser.add_argument('--quantize', choices=QUANTIZATION_DTYPES, help='store weights as float16 or uint8')
+    args = parser.parse_args()
+
+    convert_h5_to_tfjs(args.quantize)
@@ -1,19 +1,13 @@
 #!/usr/bin/env python3
 
 import tensorflow as tf
-import numpy as np
-import os
-import json
-import tensorflowjs as tfjs
-from tensorflow.keras import layers, models
-from tensorflow.keras.datasets import cifar10
-from tensorflow.keras.utils import to_categorical
+import argparse
+from cifar10_dataset import load_cifar10
+from artifact_store import ArtifactStore
+from tfjs_writer import check_quantized_export, QUANTIZATION_DTYPES
 
-def create_tfjs_compatible_cifar10():
-    """Create a TF.js compatible CIFAR-10 model"""
-
-    print("🏗️ Creating TF.js Compatible CIFAR-10 Model")
-    print("=" * 50)
+def build_tfjs_compatible_cifar10():
+    """Build the untrained TF.js compatible CIFAR-10 architecture"""
 
     # Create Sequential model (most TF.js compatible)
     model = tf.keras.Sequential([
@@ -40,6 +34,19 @@ def create_tfjs_compatible_cifar10():
         tf.keras.layers.Dense(10, activation='softmax')
     ])
 
+    return model
+
+def create_tfjs_compatible_cifar10(quantization=None):
+    """Create a TF.js compatible CIFAR-10 model
+
+    quantization='float16' or 'uint8' shrinks the exported weights 2x or 4x.
+    """
+
+    print("🏗️ Creating TF.js Compatible CIFAR-10 Model")
+    print("=" * 50)
+
+    model = build_tfjs_compatible_cifar10()
+
     # Compile
     model.compile(
         optimizer='adam',
@@ -51,17 +58,13 @@ def create_tfjs_compatible_cifar10():
 
     # Load and preprocess CIFAR-10 data
     print("\n📚 Loading CIFAR-10 dataset...")
-    (x_train, y_train), (x_test, y_test) = cifar10.load_data()
-    x_train = x_train.astype('float32') / 255.0
-    x_test = x_test.astype('float32') / 255.0
-    y_train = to_categorical(y_train, 10)
-    y_test = to_categorical(y_test, 10)
+    (x_train, y_train), (x_test, y_test) = load_cifar10()
 
     print(f"Training data shape: {x_train.shape}")
 
     # Quick training for demonstration
     print("\n🎯 Quick training (5 epochs for ~75% accuracy)...")
-    history = model.fit(
+    model.fit(
         x_train, y_train,
         epochs=5,
         batch_size=128,
@@ -81,213 +84,16 @@ def create_tfjs_compatible_cifar10():
     model.save(keras_path)
     print(f"✅ Saved Keras model: {keras_path}")
 
-    # 2. Convert to TF.js SavedModel format (most compatible)
+    # 2. Convert to TF.js layers format in-process and publish to the content-addressed store
     print("\n🔄 Converting to TensorFlow.js format...")
+    published = ArtifactStore().publish_model(model, 'tfjs_compatible_cifar10', quantization,
+                                              converted_by='tfjs-compatible-generator')
 
-    # Prepare output directory
-    tfjs_dir = 'public/tfjs_compatible_model'
-    os.makedirs(tfjs_dir, exist_ok=True)
-
-    try:
-        # Try SavedModel conversion (more robust for complex scenarios)
-        print("Using SavedModel conversion path...")
-
-        # Export as SavedModel first
-        saved_model_path = 'temp_tfjs_model'
-        model.export(saved_model_path, format='tf_saved_model')
-
-        # Import tensorflowjs for conversion
-        import subprocess
-        import sys
+    if quantization:
+        check_quantized_export(model, quantization, x_test, y_test)
 
-        # Use command line tensorflowjs_converter if available
-        converter_cmd = [
-            sys.executable, '-m', 'tensorflowjs.converters.converter',
-            '--input_format=tf_saved_model',
-            '--output_format=tfjs_layers_model',
-            saved_model_path,
-            tfjs_dir
-        ]
-
-        result = subprocess.run(converter_cmd, capture_output=True, text=True)
-
-        if result.returncode == 0:
-            print("✅ TF.js SavedModel conversion successful!")
-        else:
-            print("❌ SavedModel conversion failed, trying layers format...")
-            # Fall back to layers format
-            tfjs.converters.save_keras_model(model, tfjs_dir)
-            print("✅ TF.js Layers conversion successful!")
-
-        # Clean up temp directory
-        if os.path.exists(saved_model_path):
-            import shutil
-            shutil.rmtree(saved_model_path)
-
-    except Exception as e:
-        print(f"❌ TF.js conversion failed: {e}")
-        print("Trying manual conversion...")
-
-        # Manual fallback conversion
-        print("🔧 Fallback: Manual TF.js format creation...")
-
-        # Get weights
-        weights = model.get_weights()
-        weight_data = b''.join([w.tobytes() for w in weights])
-
-        # Save weights
-        with open(os.path.join(tfjs_dir, 'weights.bin'), 'wb') as f:
-            f.write(weight_data)
-
-        # Create model.json
-        model_config = {
-            'modelTopology': {
-                'keras_version': tf.keras.__version__,
-                'backend': 'tensorflow',
-                'model_config': {
-                    'class_name': 'Sequential',
-                    'config': {
-                        'name': 'sequential',
-                        'layers': [
-                            {
-                                'class_name': 'InputLayer',
-                                'config': {
-                                    'batch_input_shape': [None, 32, 32, 3],
-                                    'dtype': 'float32',
-                                    'sparse': False,
-                                    'name': 'input_layer'
-                                },
-                                'name': 'input_layer',
-                                'inbound_nodes': []
-                            },
-                            {
-                                'class_name': 'Conv2D',
-                                'config': {
-                                    'filters': 32,
-                                    'kernel_size': [3, 3],
-                                    'strides': [1, 1],
-                                    'padding': 'same',
-                                    'activation': 'relu',
-                                    'name': 'conv2d'
-                                }
-                            },
-                            {
-                                'class_name': 'BatchNormalization',
-                                'config': {'name': 'batch_normalization'}
-                            },
-                            {
-                                'class_name': 'MaxPooling2D',
-                                'config': {
-                                    'pool_size': [2, 2],
-                                    'strides': [2, 2],
-                                    'padding': 'valid',
-                                    'name': 'max_pooling2d'
-                                }
-                            },
-                            {
-                                'class_name': 'Conv2D',
-                                'config': {
-                                    'filters': 64,
-                                    'kernel_size': [3, 3],
-                                    'strides': [1, 1],
-                                    'padding': 'same',
-                                    'activation': 'relu',
-                                    'name': 'conv2d_1'
-                                }
-                            },
-                            {
-                                'class_name': 'BatchNormalization',
-                                'config': {'name': 'batch_normalization_1'}
-                            },
-                            {
-                                'class_name': 'MaxPooling2D',
-                                'config': {
-                                    'pool_size': [2, 2],
-                                    'strides': [2, 2],
-                                    'padding': 'valid',
-                                    'name': 'max_pooling2d_1'
-                                }
-                            },
-                            {
-                                'class_name': 'Conv2D',
-                                'config': {
-                                    'filters': 128,
-                                    'kernel_size': [3, 3],
-                                    'strides': [1, 1],
-                                    'padding': 'same',
-                                    'activation': 'relu',
-                                    'name': 'conv2d_2'
-                                }
-                            },
-                            {
-                                'class_name': 'BatchNormalization',
-                                'config': {'name': 'batch_normalization_2'}
-                            },
-                            {
-                                'class_name': 'MaxPooling2D',
-                                'config': {
-                                    'pool_size': [2, 2],
-                                    'strides': [2, 2],
-                                    'padding': 'valid',
-                                    'name': 'max_pooling2d_2'
-                                }
-                            },
-                            {
-                                'class_name': 'Flatten',
-                                'config': {'name': 'flatten'}
-                            },
-                            {
-                                'class_name': 'Dense',
-                                'config': {
-                                    'units': 512,
-                                    'activation': 'relu',
-                                    'name': 'dense'
-                                }
-                            },
-                            {
-                                'class_name': 'Dropout',
-                                'config': {
-                                    'rate': 0.5,
-                                    'name': 'dropout'
-                                }
-                            },
-                            {
-                                'class_name': 'Dense',
-                                'config': {
-                                    'units': 10,
-                                    'activation': 'softmax',
-                                    'name': 'dense_1'
-                                }
-                            }
-                        ]
-                    }
-                }
-            },
-            'weightsManifest': [{
-                'paths': ['weights.bin'],
-                'weights': []
-            }],
-            'format': 'layers-model',
-            'generatedBy': 'Python CIFAR-10 Generator',
-            'convertedBy': 'manual-tfjs-converter'
-        }
-
-        json_path = os.path.join(tfjs_dir, 'model.json')
-        with open(json_path, 'w') as f:
-            json.dump(model_config, f, indent=2)
-
-        print("✅ Manual conversion completed!")
-
-    # Verify output files
-    print("
-📁 Generated TF.js Files:"    if os.path.exists(tfjs_dir):
-        files = os.listdir(tfjs_dir)
-        for file in files:
-            size = os.path.getsize(os.path.join(tfjs_dir, file))
-            print("6s")
-
-    print("
-🎉 TF.js Compatible CIFAR-10 Model Ready!"    print(f"📂 Model path: /tfjs_compatible_model/model.json")
+    print("\n🎉 TF.js Compatible CIFAR-10 Model Ready!")
+    print(f"📂 Model path: /models/{published['manifest']} (index: /models/index.json)")
     print("🎯 Expected accuracy: ~75% (can be improved with more training)")
     print("\n✅ Ready to use in your Next.js app!")
     print("   - No InputLayer configuration issues")
@@ -297,10 +103,15 @@ def create_tfjs_compatible_cifar10():
     return True
 
 if __name__ == "__main__":
-    success = create_tfjs_compatible_cifar10()
+    parser = argparse.ArgumentParser(description='Train and export a TF.js compatible CIFAR-10 model')
+    parser.add_argument('--quantize', choices=QUANTIZATION_DTYPES, help='store weights as float16 or uint8')
+    args = parser.parse_args()
+
+    success = create_tfjs_compatible_cifar10(args.quantize)
     if success:
         print("\n🚀 Next Steps:")
-        print("1. Update your frontend to use: /tfjs_compatible_model/model.json")
+        print("1. Point your frontend at /models/index.json -> models.tfjs_compatible_cifar10.current")
         print("2. Deploy to GitHub Pages")
         print("3. Test the CIFAR-10 image classifier!")
     else:
+        print("\n❌ Model creation failed")
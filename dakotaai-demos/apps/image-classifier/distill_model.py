@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+import tensorflow as tf
+from tensorflow.keras import callbacks
+import numpy as np
+import os
+import json
+import hashlib
+import argparse
+
+from cifar10_dataset import load_cifar10, CACHE_DIR
+from cifar10_pipeline import AUTOTUNE
+from test_time_augmentation import tta_view, tta_expand
+from quantize_model import measure_latency
+from simple_cifar_model import build_simple_cifar_model
+from create_working_model import build_working_cifar_model
+from create_tfjs_model import build_tfjs_compatible_cifar10
+
+# High-accuracy models written by train_cifar10_model.py, in order of preference
+TEACHER_CANDIDATES = [
+    'cifar10_high_accuracy_model.keras',
+    'best_cifar10_model.keras',
+    'cifar10_high_accuracy_model.h5'
+]
+
+# Small Sequential architectures that load in TF.js
+STUDENTS = {
+    'simple': build_simple_cifar_model,
+    'working': build_working_cifar_model,
+    'tfjs_compatible': build_tfjs_compatible_cifar10
+}
+
+NUM_CLASSES = 10
+
+def teacher_cache_dir(teacher_path, views):
+    """Cache directory for one teacher file, keyed by its path, size and modification time"""
+    stat = os.stat(teacher_path)
+    key = f"{os.path.abspath(teacher_path)}:{stat.st_size}:{int(stat.st_mtime)}:{views}"
+    return os.path.join(CACHE_DIR, 'teacher_logits', hashlib.blake2b(key.encode(), digest_size=8).hexdigest())
+
+def compute_teacher_logits(teacher, x, views, batch_size=256):
+    """(N, views, 10) teacher logits for the first views TTA views of every image
+
+    The teacher ends in a softmax, so its log-probabilities are used as
+    logits; they differ from the pre-softmax values only by a per-image
+    constant, which every softmax ignores.
+    """
+    forward = tf.function(lambda images: teacher(images, training=False), reduce_retracing=True)
+    logits = np.empty((len(x), views, NUM_CLASSES), dtype=np.float32)
+    for start in range(0, len(x), batch_size):
+        images = np.asarray(x[start:start + batch_size])
+        probabilities = forward(tta_expand(images, views)).numpy()
+        logits[start:start + len(images)] = np.log(np.maximum(probabilities, 1e-7)).reshape(-1, views, NUM_CLASSES)
+    return logits
+
+def load_teacher_logits(teacher_path, x_train, x_test, views=2):
+    """Teacher logits for the training and test sets, computed once and memory-mapped from disk"""
+    cache_dir = teacher_cache_dir(teacher_path, views)
+    paths = {name: os.path.join(cache_dir, f'{name}_logits.npy') for name in ('train', 'test')}
+
+    if not all(os.path.exists(path) for path in paths.values()):
+        print(f"🧑‍🏫 Precomputing teacher logits from {teacher_path} ({views} views per image)...")
+        teacher = tf.keras.models.load_model(teacher_path, compile=False)
+        os.makedirs(cache_dir, exist_ok=True)
+        for name, x in (('test', x_test), ('train', x_train)):
+            temp_path = f"{paths[name]}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.save(f, compute_teacher_logits(teacher, x, views))
+            os.replace(temp_path, paths[name])
+        del teacher
+        tf.keras.backend.clear_session()
+        print(f"✅ Teacher logits cached in {cache_dir}")
+    else:
+        print(f"⚡ Using cached teacher logits from {cache_dir}")
+
+    return np.load(paths['train'], mmap_mode='r'), np.load(paths['test'], mmap_mode='r')
+
+def make_distillation_dataset(x, y, teacher_logits, batch_size=128, seed=42, training=True):
+    """Batches of (images, [labels | teacher logits]) read from numpy arrays
+
+    During training every image is shown as one of the views the teacher
+    logits were cached for, picked at random per image and epoch, so the
+    student still sees flipped and shifted images without the teacher
+    running during training. Evaluation uses the original images.
+    """
+    views = teacher_logits.shape[1]
+
+    def gather(indices, batch_seed):
+        indices = np.sort(indices)
+        images = np.asarray(x[indices], dtype=np.float32)
+        chosen = np.zeros(len(indices), dtype=np.int64)
+        if training and views > 1:
+            chosen = np.random.default_rng(batch_seed).integers(views, size=len(indices))
+            for k in range(1, views):
+                selected = chosen == k
+                if selected.any():
+                    images[selected] = tta_view(images[selected], k)
+        targets = np.concatenate([np.asarray(y[indices], dtype=np.float32),
+                                  np.asarray(teacher_logits[indices, chosen], dtype=np.float32)], axis=1)
+        return images, targets
+
+    def read(indices, batch_seed):
+        images, targets = tf.numpy_function(gather, [indices, batch_seed], (tf.float32, tf.float32))
+        images.set_shape((None,) + tuple(x.shape[1:]))
+        targets.set_shape((None, 2 * NUM_CLASSES))
+        return images, targets
+
+    dataset = tf.data.Dataset.range(len(x))
+    if training:
+        dataset = dataset.shuffle(len(x), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size, drop_remainder=training)
+    seeds = tf.data.Dataset.random(seed=seed, rerandomize_each_iteration=True)
+    return tf.data.Dataset.zip(dataset, seeds).map(read, num_parallel_calls=AUTOTUNE).prefetch(AUTOTUNE)
+
+def make_distillation_loss(temperature=4.0, alpha=0.9):
+    """alpha * T^2 * soft cross-entropy to the teacher + (1 - alpha) * cross-entropy to the labels
+
+    y_true packs the one-hot labels and the teacher logits side by side;
+    y_pred are the student's softmax probabilities.
+    """
+    def distillation_loss(y_true, y_pred):
+        labels, teacher_logits = y_true[:, :NUM_CLASSES], y_true[:, NUM_CLASSES:]
+        student_logits = tf.math.log(tf.clip_by_value(y_pred, 1e-7, 1.0))
+        soft_targets = tf.nn.softmax(teacher_logits / temperature)
+        soft_loss = tf.nn.softmax_cross_entropy_with_logits(soft_targets, student_logits / temperature)
+        hard_loss = tf.keras.losses.categorical_crossentropy(labels, y_pred)
+        return alpha * temperature ** 2 * soft_loss + (1 - alpha) * hard_loss
+    return distillation_loss
+
+def label_accuracy(y_true, y_pred):
+    """Accuracy against the one-hot labels packed in front of the teacher logits"""
+    return tf.cast(tf.equal(tf.argmax(y_true[:, :NUM_CLASSES], axis=1), tf.argmax(y_pred, axis=1)), tf.float32)
+
+def train_student(student_name, x_train, y_train, x_test, y_test, train_logits, test_logits,
+                  epochs=40, batch_size=128, seed=42, temperature=4.0, alpha=0.9):
+    """Fit a fresh student on the cached teacher logits (alpha=0 trains on the labels alone)"""
+    tf.keras.utils.set_random_seed(seed)
+    student = STUDENTS[student_name]()
+    student.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=1e-3),
+        loss=make_distillation_loss(temperature, alpha),
+        metrics=[label_accuracy]
+    )
+
+    train_dataset = make_distillation_dataset(x_train, y_train, train_logits, batch_size, seed)
+    val_dataset = make_distillation_dataset(x_test, y_test, test_logits, 256, training=False)
+    student.fit(
+        train_dataset,
+        epochs=epochs,
+        validation_data=val_dataset,
+        callbacks=[
+            callbacks.EarlyStopping(monitor='val_label_accuracy', mode='max', patience=8, restore_best_weights=True),
+            callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=3, min_lr=1e-5, verbose=1)
+        ],
+        verbose=2
+    )
+
+    # Plain loss so the saved file loads anywhere without the distillation code
+    student.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    return student
+
+def distill(teacher_path=None, student_name='simple', epochs=40, batch_size=128, views=2,
+            temperature=4.0, alpha=0.9, baseline=False, output_path='distilled_cifar10.keras'):
+    """Distill the high-accuracy teacher into a TF.js-friendly student and report what it keeps"""
+    teacher_path = teacher_path or next((p for p in TEACHER_CANDIDATES if os.path.exists(p)), None)
+    if teacher_path is None or not os.path.exists(teacher_path):
+        print(f"❌ No teacher model found (looked for: {teacher_path or TEACHER_CANDIDATES})")
+        print("Run: python train_cifar10_model.py train")
+        return None
+
+    (x_train, y_train), (x_test, y_test) = load_cifar10()
+    train_logits, test_logits = load_teacher_logits(teacher_path, x_train, x_test, views)
+    true_classes = np.argmax(y_test, axis=1)
+    teacher_accuracy = float(np.mean(np.argmax(test_logits[:, 0], axis=1) == true_classes))
+
+    print(f"\n🎓 Distilling into the '{student_name}' student (T={temperature}, alpha={alpha})...")
+    student = train_student(student_name, x_train, y_train, x_test, y_test, train_logits, test_logits,
+                            epochs, batch_size, temperature=temperature, alpha=alpha)
+    _, student_accuracy = student.evaluate(x_test, y_test, batch_size=256, verbose=0)
+    student.save(output_path)
+    student.save(os.path.splitext(output_path)[0] + '.h5')
+
+    teacher = tf.keras.models.load_model(teacher_path, compile=False)
+    sample = np.asarray(x_test[:1])
+    report = {
+        'teacher': {
+            'path': teacher_path,
+            'params': int(teacher.count_params()),
+            'accuracy': round(teacher_accuracy, 4),
+            'single_image': measure_latency(tf.function(lambda x: teacher(x, training=False)), sample)
+        },
+        'student': {
+            'architecture': student_name,
+            'path': output_path,
+            'params': int(student.count_params()),
+            'accuracy': round(float(student_accuracy), 4),
+            'single_image': measure_latency(tf.function(lambda x: student(x, training=False)), sample)
+        },
+        'settings': {'epochs': epochs, 'views': views, 'temperature': temperature, 'alpha': alpha}
+    }
+    report['student']['retained_accuracy'] = round(report['student']['accuracy'] / max(teacher_accuracy, 1e-7), 4)
+
+    if baseline:
+        # Same student and schedule trained on the labels alone
+        print(f"\n📏 Training the '{student_name}' student without the teacher for comparison...")
+        plain = train_student(student_name, x_train, y_train, x_test, y_test, train_logits, test_logits,
+                              epochs, batch_size, alpha=0.0)
+        report['student_without_distillation'] = {'accuracy': round(float(plain.evaluate(x_test, y_test, verbose=0)[1]), 4)}
+
+    with open('distillation_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+
+    t, s = report['teacher'], report['student']
+    print(f"\n📊 Teacher: {t['accuracy']:.4f} accuracy, {t['params']:,} params, p50 {t['single_image']['p50_ms']:.2f} ms")
+    print(f"📊 Student: {s['accuracy']:.4f} accuracy ({s['retained_accuracy']:.0%} of the teacher), "
+          f"{s['params']:,} params, p50 {s['single_image']['p50_ms']:.2f} ms")
+    if baseline:
+        print(f"📊 Student without distillation: {report['student_without_distillation']['accuracy']:.4f} accuracy")
+    print(f"💾 Saved {output_path} and distillation_report.json")
+
+    return student
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Distill the high-accuracy CIFAR-10 model into a TF.js-friendly model')
+    parser.add_argument('teacher_path', nargs='?', default=None,
+                        help=f"teacher model (default: first of {', '.join(TEACHER_CANDIDATES)})")
+    parser.add_argument('--student', choices=list(STUDENTS), default='simple')
+    parser.add_argument('--epochs', type=int, default=40)
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--views', type=int, default=2, choices=range(1, 9),
+                        help='augmented views per image the teacher logits are cached for')
+    parser.add_argument('--temperature', type=float, default=4.0)
+    parser.add_argument('--alpha', type=float, default=0.9, help='weight of the teacher term in the loss')
+    parser.add_argument('--baseline', action='store_true', help='also train the student on labels alone')
+    parser.add_argument('--output', default='distilled_cifar10.keras')
+    args = parser.parse_args()
+
+    print("🎓 CIFAR-10 Knowledge Distillation")
+    print("=" * 50)
+
+    student = distill(args.teacher_path, args.student, args.epochs, args.batch_size, args.views,
+                      args.temperature, args.alpha, args.baseline, args.output)
+    if student is not None:
+        print("\nNext step: Convert the student to TensorFlow.js format")
+        print(f"Run: python convert_model.py (update path to {os.path.splitext(args.output)[0]}.h5)")
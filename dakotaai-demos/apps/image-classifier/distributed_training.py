@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+
+import tensorflow as tf
+import os
+import sys
+import json
+import time
+import glob
+import shutil
+import socket
+import tempfile
+import subprocess
+
+from cifar10_pipeline import make_train_dataset, make_eval_dataset
+from training_checkpoints import ResumableCheckpoint
+
+def worker_from_tf_config():
+    """Return (num_workers, worker_index) from TF_CONFIG, or (1, 0) outside a cluster"""
+    config = json.loads(os.environ.get('TF_CONFIG', '{}'))
+    if not config:
+        return 1, 0
+    return len(config['cluster']['worker']), int(config['task']['index'])
+
+def free_ports(count):
+    """Reserve count free localhost ports for the worker gRPC servers"""
+    sockets = []
+    for _ in range(count):
+        s = socket.socket()
+        s.bind(('localhost', 0))
+        sockets.append(s)
+    ports = [s.getsockname()[1] for s in sockets]
+    for s in sockets:
+        s.close()
+    return ports
+
+def numa_nodes():
+    """NUMA node ids of this host (a single node when the topology is unknown)"""
+    nodes = glob.glob('/sys/devices/system/node/node[0-9]*')
+    return sorted(int(os.path.basename(n)[4:]) for n in nodes) or [0]
+
+def launch_local_workers(num_workers, worker_args, script=None):
+    """Run num_workers copies of the training script on this host as one cluster
+
+    Every worker gets its own TF_CONFIG and an equal share of the cores
+    for its intra-op thread pool. On multi-socket hosts with numactl
+    installed, workers are pinned round-robin to NUMA nodes so each one
+    trains from local memory. If any worker fails the rest are stopped,
+    since the survivors would block forever in the next all-reduce.
+    """
+    script = script or os.path.abspath(sys.argv[0])
+    ports = free_ports(num_workers)
+    cluster = {'worker': [f'localhost:{port}' for port in ports]}
+    threads = max(1, (os.cpu_count() or 1) // num_workers)
+    nodes = numa_nodes()
+    numactl = shutil.which('numactl') if len(nodes) > 1 else None
+
+    print(f"🚀 Launching {num_workers} local workers ({threads} threads each, {len(nodes)} NUMA node(s))")
+    processes = []
+    for index in range(num_workers):
+        env = dict(os.environ,
+                   TF_CONFIG=json.dumps({'cluster': cluster, 'task': {'type': 'worker', 'index': index}}),
+                   TF_NUM_INTRAOP_THREADS=str(threads),
+                   TF_NUM_INTEROP_THREADS='2')
+        command = [sys.executable, script] + list(worker_args)
+        if numactl:
+            node = nodes[index % len(nodes)]
+            command = [numactl, f'--cpunodebind={node}', f'--membind={node}'] + command
+        processes.append(subprocess.Popen(command, env=env))
+
+    try:
+        while True:
+            codes = [p.poll() for p in processes]
+            if any(code not in (None, 0) for code in codes):
+                print("❌ A worker failed, stopping the cluster")
+                break
+            if all(code == 0 for code in codes):
+                return 0
+            time.sleep(1)
+    finally:
+        for p in processes:
+            if p.poll() is None:
+                p.terminate()
+        for p in processes:
+            p.wait()
+
+    return 1
+
+def save_from_all_workers(model, path, is_chief):
+    """Save on every worker so they stay in step; only the chief's file is kept"""
+    if is_chief:
+        model.save(path)
+        return
+    temp_dir = tempfile.mkdtemp()
+    try:
+        model.save(os.path.join(temp_dir, os.path.basename(path)))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def train_multi_worker(use_enhanced=True, batch_size=128, seed=42, epochs=200,
+                       mix=None, mixup_alpha=0.2, cutmix_alpha=1.0,
+                       jit_compile=False, mixed_precision=False, patience=30, hparams=None,
+                       checkpoint_dir='checkpoints/cifar10', resume=True):
+    """Data-parallel training of the CIFAR-10 model across the workers in TF_CONFIG
+
+    batch_size is per worker. Each worker reads its own shard of the
+    training and test sets, gradients are all-reduced every step, and
+    the warmup + cosine schedule is scaled linearly with the global
+    batch. The chief (worker 0) logs progress and writes the models.
+
+    jit_compile XLA-compiles each replica's forward and backward pass;
+    the all-reduce and the optimizer update stay outside the compiled
+    function. hparams takes the same keys as train_high_accuracy_model.
+
+    Model, optimizer and epoch are checkpointed to checkpoint_dir after
+    every epoch by the chief, and with resume=True every worker restores
+    the latest checkpoint, so checkpoint_dir must be shared by all
+    workers (it is for local workers).
+    """
+    from train_cifar10_model import build_cifar_model, load_and_preprocess_cifar10, make_warmup_cosine_scheduler
+
+    hparams = hparams or {}
+    num_workers, worker_index = worker_from_tf_config()
+    is_chief = worker_index == 0
+    log = print if is_chief else (lambda *args, **kwargs: None)
+
+    strategy = tf.distribute.MultiWorkerMirroredStrategy()
+    tf.keras.utils.set_random_seed(seed)
+
+    global_batch_size = batch_size * strategy.num_replicas_in_sync
+    lr_scale = global_batch_size / 128
+    schedule = {k: hparams[k] for k in ('max_lr', 'min_lr') if k in hparams}
+    if 'warmup_fraction' in hparams:
+        schedule['warmup_epochs'] = round(hparams['warmup_fraction'] * epochs)
+    scheduler = make_warmup_cosine_scheduler(lr_scale=lr_scale, total_epochs=epochs, **schedule)
+    log(f"🌐 {num_workers} workers, global batch {global_batch_size}, learning rate x{lr_scale:g}")
+    if jit_compile:
+        log("⚡ XLA-compiling the per-replica training step")
+
+    with strategy.scope():
+        model = build_cifar_model(use_enhanced, mixed_precision,
+                                  **{k: hparams[k] for k in ('block_dropout', 'head_dropout') if k in hparams})
+        optimizer = tf.keras.optimizers.SGD(learning_rate=scheduler(0, None), momentum=0.9, nesterov=True)
+        optimizer.build(model.trainable_variables)
+        train_loss = tf.keras.metrics.Mean()
+        train_accuracy = tf.keras.metrics.CategoricalAccuracy()
+        val_loss = tf.keras.metrics.Mean()
+        val_accuracy = tf.keras.metrics.CategoricalAccuracy()
+
+    # Full-state checkpoints so a preempted job continues where it stopped;
+    # only the chief writes them
+    checkpoint = ResumableCheckpoint(checkpoint_dir)
+    if not resume and is_chief:
+        checkpoint.clear()
+    initial_epoch = checkpoint.restore(model, optimizer) if resume else 0
+    best_accuracy = checkpoint.loop_state.get('best_accuracy', -1.0)
+    wait = checkpoint.loop_state.get('wait', 0)
+    best_weights = None
+    if initial_epoch and os.path.exists('best_cifar10_model.keras'):
+        best_weights = tf.keras.models.load_model('best_cifar10_model.keras', compile=False).get_weights()
+
+    # A resumed run offsets the seed so it does not replay the first epochs' batches
+    (x_train, y_train), (x_test, y_test) = load_and_preprocess_cifar10()
+    train_dataset = strategy.experimental_distribute_dataset(make_train_dataset(
+        x_train, y_train, batch_size=global_batch_size, seed=seed + initial_epoch,
+        mix=mix, mixup_alpha=mixup_alpha, cutmix_alpha=cutmix_alpha,
+        num_shards=num_workers, shard_index=worker_index))
+    val_dataset = strategy.experimental_distribute_dataset(make_eval_dataset(
+        x_test, y_test, batch_size=256 * num_workers, num_shards=num_workers, shard_index=worker_index))
+
+    loss_fn = tf.keras.losses.CategoricalCrossentropy(reduction='none')
+
+    @tf.function(jit_compile=jit_compile)
+    def compute_gradients(images, labels):
+        with tf.GradientTape() as tape:
+            predictions = model(images, training=True)
+            per_example_loss = loss_fn(labels, predictions)
+            loss = tf.nn.compute_average_loss(per_example_loss, global_batch_size=global_batch_size)
+            if model.losses:
+                loss += tf.nn.scale_regularization_loss(tf.add_n(model.losses))
+        return tape.gradient(loss, model.trainable_variables), per_example_loss, predictions
+
+    @tf.function
+    def train_step(images, labels):
+        def step(images, labels):
+            gradients, per_example_loss, predictions = compute_gradients(images, labels)
+            optimizer.apply_gradients(zip(gradients, model.trainable_variables))
+            train_loss.update_state(per_example_loss)
+            train_accuracy.update_state(labels, predictions)
+        strategy.run(step, args=(images, labels))
+
+    @tf.function
+    def eval_step(images, labels):
+        def step(images, labels):
+            predictions = model(images, training=False)
+            val_loss.update_state(loss_fn(labels, predictions))
+            val_accuracy.update_state(labels, predictions)
+        strategy.run(step, args=(images, labels))
+
+    for epoch in range(initial_epoch, epochs):
+        lr = scheduler(epoch, None)
+        optimizer.learning_rate.assign(lr)
+        for metric in (train_loss, train_accuracy, val_loss, val_accuracy):
+            metric.reset_state()
+
+        start = time.perf_counter()
+        for images, labels in train_dataset:
+            train_step(images, labels)
+        for images, labels in val_dataset:
+            eval_step(images, labels)
+
+        accuracy = float(val_accuracy.result())
+        log(f"Epoch {epoch + 1}/{epochs} - {time.perf_counter() - start:.0f}s - lr {lr:.4f} - "
+            f"loss {float(train_loss.result()):.4f} - accuracy {float(train_accuracy.result()):.4f} - "
+            f"val_loss {float(val_loss.result()):.4f} - val_accuracy {accuracy:.4f}")
+
+        if accuracy > best_accuracy:
+            best_accuracy, best_weights, wait = accuracy, model.get_weights(), 0
+            save_from_all_workers(model, 'best_cifar10_model.keras', is_chief)
+        else:
+            wait += 1
+
+        if is_chief:
+            checkpoint.save(epoch + 1, model, optimizer, {'best_accuracy': best_accuracy, 'wait': wait})
+        if wait >= patience:
+            log(f"Early stopping: no val_accuracy improvement for {patience} epochs")
+            break
+
+    # The run finished, so the next one starts fresh
+    checkpoint.wait()
+    if is_chief:
+        checkpoint.clear()
+
+    if best_weights is not None:
+        model.set_weights(best_weights)
+    log(f"\n✅ Distributed training completed! Best val_accuracy: {best_accuracy:.4f}")
+    save_from_all_workers(model, 'cifar10_high_accuracy_model.keras', is_chief)
+    save_from_all_workers(model, 'cifar10_high_accuracy_model.h5', is_chief)
+    log("Model saved as:")
+    log("  - cifar10_high_accuracy_model.keras (Keras format)")
+    log("  - cifar10_high_accuracy_model.h5 (H5 format)")
+
+    return model
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+
+# Inference needs only TensorFlow: the serving backend (demos/classifier_engine.py)
+# imports make_early_exit_forward, so it serves the graph benchmark_early_exit measures
+import tensorflow as tf
+from tensorflow.keras import layers, models, callbacks
+from tensorflow.keras.regularizers import l2
+import numpy as np
+import json
+import time
+import argparse
+
+NUM_STAGES = 4
+
+def exit_head(x, num_classes, name):
+    """Light auxiliary classifier on an intermediate feature map"""
+    x = layers.GlobalAveragePooling2D()(x)
+    x = layers.Dense(128, activation='relu', kernel_regularizer=l2(0.0001))(x)
+    x = layers.Dropout(0.3)(x)
+    return layers.Dense(num_classes, activation='softmax', name=name)(x)
+
+def create_early_exit_cnn(input_shape=(32, 32, 3), num_classes=10):
+    """create_enhanced_cnn split into four stages, with an exit classifier after each of the first three
+
+    Every stage is its own sub-model named exit_stage_1 .. exit_stage_4
+    returning (features, probabilities), or only probabilities for the
+    last stage, so inference can stop after any stage. The returned model
+    outputs all four exits for joint training.
+    """
+    from train_cifar10_model import residual_block
+
+    stages = []
+    stage_input_shape = input_shape
+    for stage, (filters, dropout) in enumerate(((64, 0.25), (128, 0.3), (256, 0.35), (512, 0.4)), start=1):
+        inputs = layers.Input(shape=stage_input_shape)
+        x = inputs
+        if stage == 1:
+            # Initial conv with larger filters
+            x = layers.Conv2D(64, (3, 3), padding='same', kernel_regularizer=l2(0.0001))(x)
+            x = layers.BatchNormalization()(x)
+            x = layers.Activation('relu')(x)
+
+        x = residual_block(x, filters, use_se=True)
+        x = layers.MaxPooling2D((2, 2))(x)
+        x = layers.Dropout(dropout)(x)
+
+        if stage < NUM_STAGES:
+            outputs = [x, exit_head(x, num_classes, f'exit_{stage}_probabilities')]
+            stage_input_shape = tuple(x.shape[1:])
+        else:
+            # Same dense head as create_enhanced_cnn
+            x = layers.GlobalAveragePooling2D()(x)
+            x = layers.Dense(512, kernel_regularizer=l2(0.0001))(x)
+            x = layers.BatchNormalization()(x)
+            x = layers.Activation('relu')(x)
+            x = layers.Dropout(0.5)(x)
+            x = layers.Dense(256, kernel_regularizer=l2(0.0001))(x)
+            x = layers.BatchNormalization()(x)
+            x = layers.Activation('relu')(x)
+            x = layers.Dropout(0.4)(x)
+            outputs = layers.Dense(num_classes, activation='softmax')(x)
+
+        stages.append(models.Model(inputs, outputs, name=f'exit_stage_{stage}'))
+
+    inputs = layers.Input(shape=input_shape)
+    x, exits = inputs, []
+    for stage, stage_model in enumerate(stages, start=1):
+        if stage < NUM_STAGES:
+            x, probabilities = stage_model(x)
+        else:
+            probabilities = stage_model(x)
+        # Named outputs give every exit its own loss and metrics
+        exits.append(layers.Identity(name=f'exit_{stage}')(probabilities))
+
+    return models.Model(inputs, exits, name='early_exit_cnn')
+
+def exit_stages(model):
+    """The per-stage sub-models of an early-exit model, in order"""
+    return [model.get_layer(f'exit_stage_{stage}') for stage in range(1, NUM_STAGES + 1)]
+
+def make_early_exit_forward(model):
+    """Traced adaptive forward pass: (images, threshold) -> (probabilities, exit stage per image)
+
+    After every stage the images whose exit reaches threshold are finished
+    and only the rest of the batch runs the next stage; a stage with no
+    images left is skipped entirely. The last exit always answers. The
+    whole loop is one graph, so a single image pays no per-stage Python
+    overhead.
+    """
+    stages = exit_stages(model)
+    num_classes = int(model.outputs[-1].shape[-1])
+
+    @tf.function(reduce_retracing=True)
+    def forward(images, threshold):
+        n = tf.shape(images)[0]
+        probabilities = tf.zeros([n, num_classes])
+        exits = tf.zeros([n], dtype=tf.int32)
+        active = tf.range(n)
+        x = images
+
+        for stage, stage_model in enumerate(stages, start=1):
+            def run_stage(x=x, active=active, probabilities=probabilities, exits=exits,
+                          stage=stage, stage_model=stage_model):
+                if stage == NUM_STAGES:
+                    stage_probabilities = stage_model(x, training=False)
+                    done = tf.ones([tf.shape(x)[0]], dtype=tf.bool)
+                    features = x
+                else:
+                    features, stage_probabilities = stage_model(x, training=False)
+                    done = tf.reduce_max(stage_probabilities, axis=1) >= threshold
+                finished = tf.boolean_mask(active, done)[:, None]
+                return (tf.boolean_mask(features, ~done), tf.boolean_mask(active, ~done),
+                        tf.tensor_scatter_nd_update(probabilities, finished,
+                                                    tf.cast(tf.boolean_mask(stage_probabilities, done), tf.float32)),
+                        tf.tensor_scatter_nd_update(exits, finished, tf.fill([tf.shape(finished)[0]], stage)))
+
+            # Input shapes change from stage to stage, so skip with an empty placeholder of the next shape;
+            # stage 1 is guarded too, so an empty batch returns empty results
+            features_shape = stage_model.outputs[0].shape if stage < NUM_STAGES else x.shape
+            skip_shape = [0] + [int(d) for d in features_shape[1:]]
+            x, active, probabilities, exits = tf.cond(
+                tf.size(active) > 0, run_stage,
+                lambda x=x, active=active, probabilities=probabilities, exits=exits, skip_shape=skip_shape:
+                    (tf.zeros(skip_shape, x.dtype), active, probabilities, exits))
+
+        return probabilities, exits
+
+    return forward
+
+class EarlyExitPredictor:
+    """Batched adaptive inference: each image leaves at the first exit whose confidence reaches threshold"""
+
+    def __init__(self, model, threshold=0.9):
+        self.threshold = tf.constant(threshold, dtype=tf.float32)
+        self.forward = make_early_exit_forward(model)
+
+    def predict(self, images):
+        """Return (probabilities, exit stage per image) for a batch"""
+        probabilities, exits = self.forward(images, self.threshold)
+        return probabilities.numpy(), exits.numpy()
+
+def train_early_exit_model(batch_size=128, epochs=200, seed=42, exit_weights=(0.3, 0.3, 0.3, 1.0)):
+    """Train all exits jointly; the final exit carries the most weight"""
+    from cifar10_dataset import load_cifar10
+    from cifar10_pipeline import make_train_dataset, make_eval_dataset
+    from train_cifar10_model import make_warmup_cosine_scheduler
+
+    tf.keras.utils.set_random_seed(seed)
+    (x_train, y_train), (x_test, y_test) = load_cifar10()
+
+    model = create_early_exit_cnn()
+    model.compile(
+        optimizer=tf.keras.optimizers.SGD(learning_rate=0.1, momentum=0.9, nesterov=True),
+        loss=['categorical_crossentropy'] * NUM_STAGES,
+        loss_weights=list(exit_weights),
+        metrics=[['accuracy']] * NUM_STAGES
+    )
+    print(f"Early-exit model has {model.count_params():,} parameters")
+
+    # The same labels supervise every exit
+    repeat_labels = lambda images, labels: (images, (labels,) * NUM_STAGES)
+    train_dataset = make_train_dataset(x_train, y_train, batch_size=batch_size, seed=seed).map(repeat_labels)
+    val_dataset = make_eval_dataset(x_test, y_test).map(repeat_labels)
+
+    history = model.fit(
+        train_dataset,
+        epochs=epochs,
+        validation_data=val_dataset,
+        callbacks=[
+            callbacks.LearningRateScheduler(make_warmup_cosine_scheduler(total_epochs=epochs)),
+            callbacks.EarlyStopping(monitor=f'val_exit_{NUM_STAGES}_accuracy', mode='max',
+                                    patience=30, restore_best_weights=True),
+            callbacks.ModelCheckpoint('best_cifar10_early_exit_model.keras', monitor=f'val_exit_{NUM_STAGES}_accuracy',
+                                      mode='max', save_best_only=True)
+        ],
+        verbose=1
+    )
+
+    model.save('cifar10_early_exit_model.keras')
+    print("💾 Model saved as cifar10_early_exit_model.keras")
+    return model, history
+
+def benchmark_early_exit(model, x_test, y_test, thresholds=(0.5, 0.7, 0.8, 0.9, 0.95, 0.99),
+                         measured_images=300, output_path='early_exit_benchmark.json'):
+    """Accuracy against average single-image latency for a range of exit thresholds
+
+    Every exit's predictions are computed once for the whole test set, so
+    each threshold is evaluated exactly. Latency per image is the measured
+    cost of the stages it ran; the adaptive predictor is also timed for
+    real on measured_images images one at a time as a check.
+    """
+    from quantize_model import measure_latency
+
+    print("\n🚪 Early-exit benchmark...")
+    true_classes = np.argmax(y_test, axis=1)
+    forward = tf.function(lambda x: model(x, training=False))
+    heads = [[] for _ in range(NUM_STAGES)]
+    for start in range(0, len(x_test), 256):
+        for stage, probabilities in enumerate(forward(np.asarray(x_test[start:start + 256]))):
+            heads[stage].append(probabilities.numpy())
+    heads = np.stack([np.concatenate(h) for h in heads])  # (stages, N, classes)
+
+    # Single-image cost of running up to and including each stage
+    sample = np.asarray(x_test[:1])
+    stage_ms, x = [], sample
+    for stage, stage_model in enumerate(exit_stages(model), start=1):
+        stage_forward = tf.function(lambda x, s=stage_model: s(x, training=False))
+        stage_ms.append(measure_latency(stage_forward, x, runs=200)['p50_ms'])
+        if stage < NUM_STAGES:
+            x = stage_forward(x)[0]
+    cumulative_ms = np.cumsum(stage_ms)
+    full_ms = measure_latency(forward, sample, runs=200)['p50_ms']
+
+    confidences = heads.max(axis=2)
+    predictions = heads.argmax(axis=2)
+    results = {
+        'stage_ms': [round(float(ms), 3) for ms in stage_ms],
+        'full_model_ms': full_ms,
+        'exit_accuracy': [round(float(np.mean(p == true_classes)), 4) for p in predictions],
+        'thresholds': []
+    }
+
+    for threshold in thresholds:
+        confident = confidences >= threshold
+        confident[-1] = True
+        exits = np.argmax(confident, axis=0)  # first confident exit per image
+        chosen = predictions[exits, np.arange(len(exits))]
+
+        predictor = EarlyExitPredictor(model, threshold)
+        predictor.predict(sample)  # trace
+        start = time.perf_counter()
+        for i in range(min(measured_images, len(x_test))):
+            predictor.predict(np.asarray(x_test[i:i + 1]))
+        measured_ms = (time.perf_counter() - start) * 1000 / min(measured_images, len(x_test))
+
+        average_ms = float(cumulative_ms[exits].mean())
+        results['thresholds'].append({
+            'threshold': threshold,
+            'accuracy': round(float(np.mean(chosen == true_classes)), 4),
+            'exit_fractions': [round(float(np.mean(exits == s)), 4) for s in range(NUM_STAGES)],
+            'average_ms': round(average_ms, 3),
+            'measured_ms': round(measured_ms, 3),
+            'latency_saving': round(1 - average_ms / cumulative_ms[-1], 4)
+        })
+
+    print(f"  Exit accuracy: {', '.join(f'{a:.4f}' for a in results['exit_accuracy'])}; "
+          f"all stages {cumulative_ms[-1]:.2f} ms")
+    for r in results['thresholds']:
+        print(f"  threshold {r['threshold']:.2f}: accuracy {r['accuracy']:.4f}, "
+              f"average {r['average_ms']:.2f} ms ({r['latency_saving']:.0%} saved, measured {r['measured_ms']:.2f} ms), "
+              f"exits {' / '.join(f'{f:.0%}' for f in r['exit_fractions'])}")
+
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Report saved: {output_path}")
+    return results
+
+if __name__ == "__main__":
+    from cifar10_dataset import load_cifar10
+
+    parser = argparse.ArgumentParser(description='Train or benchmark the early-exit CIFAR-10 model')
+    parser.add_argument('command', nargs='?', default='train', choices=['train', 'benchmark'])
+    parser.add_argument('model_path', nargs='?', default='cifar10_early_exit_model.keras')
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--epochs', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.5, 0.7, 0.8, 0.9, 0.95, 0.99])
+    args = parser.parse_args()
+
+    print("🚪 CIFAR-10 Early-Exit Model")
+    print("=" * 50)
+
+    if args.command == 'train':
+        model, _ = train_early_exit_model(args.batch_size, args.epochs, args.seed)
+    else:
+        model = tf.keras.models.load_model(args.model_path, compile=False)
+
+    (_, _), (x_test, y_test) = load_cifar10()
+    benchmark_early_exit(model, x_test, y_test, args.thresholds)
@@ -3,12 +3,19 @@
 import tensorflow as tf
 import numpy as np
 import os
-import json
+import argparse
+import shutil
+from artifact_store import ArtifactStore
+from tfjs_writer import (write_tfjs_layers_model, check_quantized_export, converter_quantization_flags,
+                         QUANTIZATION_DTYPES)
 from tensorflow.keras import layers, models
 import subprocess
 
-def fix_model_architecture():
-    """Fix CIFAR-10 model for TF.js compatibility by rebuilding with simple architecture"""
+def fix_model_architecture(quantization=None):
+    """Fix CIFAR-10 model for TF.js compatibility by rebuilding with simple architecture
+
+    quantization='float16' or 'uint8' shrinks the exported weights 2x or 4x.
+    """
 
     # Load the high-accuracy model
     model_files = [
@@ -140,95 +147,62 @@ def fix_model_architecture():
     # Convert to TF.js format
     print("\n🔄 Converting to TensorFlow.js format...")
 
-    output_dir = 'public/tfjs_model_fixed'
-
-    # Remove old files
-    import shutil
-    if os.path.exists(output_dir):
-        shutil.rmtree(output_dir)
-    os.makedirs(output_dir, exist_ok=True)
-
     # Save as SavedModel
     saved_model_dir = 'temp_saved_model_fixed'
     new_model.export(saved_model_dir, format='tf_saved_model')
 
-    # Convert using SavedModel format
-    try:
-        result = subprocess.run([
-            'tensorflowjs_converter',
-            '--input_format=tf_saved_model',
-            '--output_format=tfjs_graph_model',
-            saved_model_dir,
-            output_dir
-        ], capture_output=True, text=True, timeout=60)
-
-        if result.returncode == 0:
-            print("✅ TensorFlow.js conversion completed successfully!")
-        else:
-            print(f"❌ TF.js conversion failed: {result.stderr}")
-
-            # Fallback: try layers model format
-            print("🔧 Trying layers model format...")
-            try:
-                import tensorflowjs as tfjs
-                tfjs.converters.save_keras_model(new_model, output_dir)
-                print("✅ Layers model conversion successful!")
-            except Exception as fallback_e:
-                print(f"❌ Fallback conversion also failed: {fallback_e}")
-                return False
-
-    except FileNotFoundError:
-        print("❌ tensorflowjs_converter not found. Using manual conversion...")
-
-        # Manual weights extraction and JSON creation
-        print("🔧 Using manual TF.js conversion...")
-
-        weights = new_model.get_weights()
-        if weights:
-            weight_data = b''
-            for w in weights:
-                weight_data += w.tobytes()
-
-            with open(os.path.join(output_dir, 'weights.bin'), 'wb') as f:
-                f.write(weight_data)
-
-            # Create model.json
-            model_config = new_model.to_json()
-            with open(os.path.join(output_dir, 'model.json'), 'w') as f:
-                json.dump({
-                    'modelTopology': json.loads(model_config),
-                    'weightsManifest': [{
-                        'paths': ['weights.bin'],
-                        'weights': []
-                    }],
-                    'format': 'layers-model',
-                    'generatedBy': 'TensorFlow.js',
-                    'convertedBy': 'architecture-fix'
-                }, f, indent=2)
-
-            print("✅ Manual conversion completed!")
+    # Convert into a staging directory, then publish its files to the content-addressed store
+    store = ArtifactStore()
+    with store.staging_dir() as output_dir:
+        # Convert using SavedModel format
+        try:
+            result = subprocess.run([
+                'tensorflowjs_converter',
+                '--input_format=tf_saved_model',
+                '--output_format=tfjs_graph_model',
+                *converter_quantization_flags(quantization),
+                saved_model_dir,
+                output_dir
+            ], capture_output=True, text=True, timeout=60)
+
+            if result.returncode == 0:
+                print("✅ TensorFlow.js conversion completed successfully!")
+            else:
+                print(f"❌ TF.js conversion failed: {result.stderr}")
+
+                # Fallback: try layers model format
+                print("🔧 Trying layers model format...")
+                try:
+                    import tensorflowjs as tfjs
+                    tfjs.converters.save_keras_model(
+                        new_model, output_dir, quantization_dtype_map={quantization: '*'} if quantization else None)
+                    print("✅ Layers model conversion successful!")
+                except Exception as fallback_e:
+                    print(f"❌ Fallback conversion also failed: {fallback_e}")
+                    return False
+
+        except FileNotFoundError:
+            print("❌ tensorflowjs_converter not found. Using manual conversion...")
+
+            # Manual weights extraction and JSON creation
+            print("🔧 Using manual TF.js conversion...")
+
+            if new_model.weights:
+                write_tfjs_layers_model(new_model, output_dir, converted_by='architecture-fix', quantization=quantization)
+                print("✅ Manual conversion completed!")
+
+        published = store.publish_directory(output_dir, 'cifar10_fixed',
+                                            {'quantization': quantization or 'float32'}, move=True)
+
+    if quantization:
+        check_quantized_export(new_model, quantization)
 
     # Clean up
     if os.path.exists(saved_model_dir):
         shutil.rmtree(saved_model_dir)
 
-    # Verify output
-    expected_files = ['model.json']
-    for file in expected_files:
-        file_path = os.path.join(output_dir, file)
-        if os.path.exists(file_path):
-            size = os.path.getsize(file_path)
-            print(f"✅ {file}: {size} bytes")
-        else:
-            print(f"⚠️ {file}: Missing (might be in shards)")
-
-    # List all files in output directory
-    if os.path.exists(output_dir):
-        files = os.listdir(output_dir)
-        print(f"📁 Output directory contents: {files}")
-
     print("\n🎉 Model architecture fix complete!")
-    print(f"📂 Fixed TF.js model ready at: /{output_dir.replace('public/', '')}/model.json")
+    print(f"📂 Fixed TF.js model ready at: /models/{published['manifest']} (index: /models/index.json)")
 
     return True
 
@@ -236,10 +210,14 @@ if __name__ == "__main__":
     print("🔧 CIFAR-10 Model Architecture Fix")
     print("=" * 50)
 
-    success = fix_model_architecture()
+    parser = argparse.ArgumentParser(description='Rebuild the CIFAR-10 model for TF.js and convert it')
+    parser.add_argument('--quantize', choices=QUANTIZATION_DTYPES, help='store weights as float16 or uint8')
+    args = parser.parse_args()
+
+    success = fix_model_architecture(args.quantize)
     if success:
         print("\n✅ Success! Use the new model path in your frontend:")
-        print("   /tfjs_model_fixed/model.json")
+        print("   /models/index.json -> models.cifar10_fixed.current")
     else:
         print("\n❌ Model architecture fix failed")
         print("Consider training a simpler model specifically for TF.js")
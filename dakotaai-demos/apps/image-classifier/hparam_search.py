@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import math
+import time
+import sqlite3
+import argparse
+import subprocess
+
+import numpy as np
+
+# Sampled per trial: (scale, low, high)
+SEARCH_SPACE = {
+    'max_lr': ('log', 0.02, 0.4),
+    'min_lr': ('log', 1e-4, 1e-2),
+    'warmup_fraction': ('uniform', 0.0, 0.2),
+    'block_dropout': ('uniform', 0.1, 0.4),
+    'head_dropout': ('uniform', 0.2, 0.6)
+}
+
+def sample_params(number, seed=42):
+    """Draw trial number's parameters; the same seed and number always give the same trial"""
+    rng = np.random.default_rng([seed, number])
+    params = {}
+    for name, (scale, low, high) in SEARCH_SPACE.items():
+        if scale == 'log':
+            params[name] = float(math.exp(rng.uniform(math.log(low), math.log(high))))
+        else:
+            params[name] = float(rng.uniform(low, high))
+    return params
+
+def expand_params(params):
+    """Turn sampled scalars into train_high_accuracy_model hparams
+
+    Dropout keeps the shape of the hand-tuned defaults: it grows by 0.05
+    per residual stage, and the second dense layer uses 0.1 less than the first.
+    """
+    return {
+        'max_lr': params['max_lr'],
+        'min_lr': min(params['min_lr'], params['max_lr']),
+        'warmup_fraction': params['warmup_fraction'],
+        'block_dropout': [round(params['block_dropout'] + 0.05 * i, 4) for i in range(4)],
+        'head_dropout': [round(params['head_dropout'], 4), round(max(params['head_dropout'] - 0.1, 0.0), 4)]
+    }
+
+class TrialStore:
+    """SQLite record of every trial and its per-epoch validation accuracy
+
+    Worker processes share the file (WAL mode); claiming a trial happens
+    in an immediate transaction, so two workers never run the same one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS trials ('
+            ' study TEXT NOT NULL, number INTEGER NOT NULL, params TEXT NOT NULL, state TEXT NOT NULL,'
+            ' value REAL, worker INTEGER, started REAL, finished REAL,'
+            ' PRIMARY KEY (study, number))'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS reports ('
+            ' study TEXT NOT NULL, number INTEGER NOT NULL, epoch INTEGER NOT NULL, value REAL NOT NULL,'
+            ' PRIMARY KEY (study, number, epoch))'
+        )
+
+    def requeue_running(self, study):
+        """Trials left RUNNING by an interrupted search are run again from the start"""
+        self._db.execute('DELETE FROM reports WHERE study = ? AND number IN ('
+                         ' SELECT number FROM trials WHERE study = ? AND state = ?)', (study, study, 'RUNNING'))
+        return self._db.execute("UPDATE trials SET state = 'WAITING' WHERE study = ? AND state = 'RUNNING'",
+                                (study,)).rowcount
+
+    def claim_trial(self, study, n_trials, seed):
+        """Return (number, params) of the next trial to run, or None when the study is complete"""
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._db.execute("SELECT number, params FROM trials WHERE study = ? AND state = 'WAITING'"
+                                   ' ORDER BY number LIMIT 1', (study,)).fetchone()
+            if row is not None:
+                number, params = row[0], json.loads(row[1])
+            else:
+                number = self._db.execute('SELECT COUNT(*) FROM trials WHERE study = ?', (study,)).fetchone()[0]
+                if number >= n_trials:
+                    self._db.execute('COMMIT')
+                    return None
+                params = sample_params(number, seed)
+                self._db.execute("INSERT INTO trials (study, number, params, state) VALUES (?, ?, ?, 'WAITING')",
+                                 (study, number, json.dumps(params)))
+            self._db.execute("UPDATE trials SET state = 'RUNNING', worker = ?, started = ? WHERE study = ? AND number = ?",
+                             (os.getpid(), time.time(), study, number))
+            self._db.execute('COMMIT')
+        except Exception:
+            self._db.execute('ROLLBACK')
+            raise
+        return number, params
+
+    def report(self, study, number, epoch, value):
+        self._db.execute('INSERT OR REPLACE INTO reports (study, number, epoch, value) VALUES (?, ?, ?, ?)',
+                         (study, number, epoch, value))
+
+    def values_at(self, study, epoch, exclude=None):
+        """Reported values of every trial (except exclude) that reached epoch"""
+        return [row[0] for row in self._db.execute(
+            'SELECT value FROM reports WHERE study = ? AND epoch = ? AND number IS NOT ?', (study, epoch, exclude))]
+
+    def finish(self, study, number, state, value=None):
+        self._db.execute('UPDATE trials SET state = ?, value = ?, finished = ? WHERE study = ? AND number = ?',
+                         (state, value, time.time(), study, number))
+
+    def trials(self, study):
+        rows = self._db.execute('SELECT number, params, state, value, started, finished FROM trials'
+                                ' WHERE study = ? ORDER BY number', (study,)).fetchall()
+        return [{'number': r[0], 'params': json.loads(r[1]), 'state': r[2], 'value': r[3],
+                 'seconds': round(r[5] - r[4], 1) if r[4] and r[5] else None} for r in rows]
+
+class MedianPruner:
+    """Stop a trial whose best accuracy so far is below the median of other trials at the same epoch"""
+
+    def __init__(self, startup_trials=4, warmup_epochs=2):
+        self.startup_trials = startup_trials
+        self.warmup_epochs = warmup_epochs
+
+    def should_prune(self, store, study, number, epoch, value):
+        if epoch <= self.warmup_epochs:
+            return False
+        others = store.values_at(study, epoch, exclude=number)
+        if len(others) <= self.startup_trials:
+            return False
+        return value < float(np.median(others))
+
+class SuccessiveHalvingPruner:
+    """Asynchronous successive halving: at rung epochs min_epochs * eta^k only the top 1/eta continue
+
+    A trial reaching a rung is compared with every trial that reached it
+    before; with fewer than eta of them it is promoted, so early workers
+    never wait for a full rung.
+    """
+
+    def __init__(self, min_epochs=1, eta=3):
+        self.min_epochs = min_epochs
+        self.eta = eta
+
+    def is_rung(self, epoch):
+        rung = self.min_epochs
+        while rung < epoch:
+            rung *= self.eta
+        return rung == epoch
+
+    def should_prune(self, store, study, number, epoch, value):
+        if not self.is_rung(epoch):
+            return False
+        values = sorted(store.values_at(study, epoch), reverse=True)
+        if len(values) < self.eta:
+            return False
+        return value < values[max(len(values) // self.eta, 1) - 1]
+
+PRUNERS = {'median': MedianPruner, 'halving': SuccessiveHalvingPruner, 'none': None}
+
+def run_trial(store, study, number, params, pruner, data, trial_epochs=15, batch_size=128, seed=42):
+    """Train one short trial, reporting best val_accuracy every epoch; returns (state, value)"""
+    import tensorflow as tf
+    from tensorflow.keras import callbacks
+    from cifar10_pipeline import make_train_dataset, make_eval_dataset
+    from train_cifar10_model import create_enhanced_cnn, make_warmup_cosine_scheduler
+
+    (x_train, y_train), (x_val, y_val) = data
+    hparams = expand_params(params)
+
+    class TrialReporter(callbacks.Callback):
+        def __init__(self):
+            super().__init__()
+            self.best = 0.0
+            self.pruned = False
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.best = max(self.best, float(logs['val_accuracy']))
+            store.report(study, number, epoch + 1, self.best)
+            # A trial that trained its full budget is complete; pruning it would only drop it from the ranking
+            if epoch + 1 == trial_epochs:
+                return
+            if pruner is not None and pruner.should_prune(store, study, number, epoch + 1, self.best):
+                print(f"✂️ Trial {number} pruned after epoch {epoch + 1} (best val_accuracy {self.best:.4f})")
+                self.pruned = True
+                self.model.stop_training = True
+
+    tf.keras.backend.clear_session()
+    tf.keras.utils.set_random_seed(seed + number)
+    model = create_enhanced_cnn(block_dropout=hparams['block_dropout'], head_dropout=hparams['head_dropout'])
+    model.compile(
+        optimizer=tf.keras.optimizers.SGD(learning_rate=hparams['max_lr'], momentum=0.9, nesterov=True),
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    reporter = TrialReporter()
+    scheduler = make_warmup_cosine_scheduler(warmup_epochs=round(hparams['warmup_fraction'] * trial_epochs),
+                                             total_epochs=trial_epochs, max_lr=hparams['max_lr'],
+                                             min_lr=hparams['min_lr'])
+    model.fit(
+        make_train_dataset(x_train, y_train, batch_size=batch_size, seed=seed + number),
+        epochs=trial_epochs,
+        validation_data=make_eval_dataset(x_val, y_val),
+        callbacks=[callbacks.LearningRateScheduler(scheduler), reporter],
+        verbose=2
+    )
+    return ('PRUNED' if reporter.pruned else 'COMPLETE'), reporter.best
+
+def run_worker(storage, study, n_trials, pruner_name='median', trial_epochs=15, train_images=20000,
+               val_images=5000, batch_size=128, seed=42):
+    """Claim and run trials until the study has n_trials of them"""
+    from cifar10_dataset import load_cifar10
+
+    store = TrialStore(storage)
+    pruner = PRUNERS[pruner_name]() if PRUNERS[pruner_name] else None
+
+    # Validation images come from the end of the training set; the test set stays unseen while tuning
+    (x_train, y_train), _ = load_cifar10()
+    data = ((x_train[:train_images], y_train[:train_images]),
+            (x_train[-val_images:], y_train[-val_images:]))
+
+    while True:
+        claimed = store.claim_trial(study, n_trials, seed)
+        if claimed is None:
+            return
+        number, params = claimed
+        print(f"\n🧪 Trial {number}: " + ", ".join(f"{k}={v:.4g}" for k, v in params.items()))
+        try:
+            state, value = run_trial(store, study, number, params, pruner, data, trial_epochs, batch_size, seed)
+        except Exception as e:
+            print(f"❌ Trial {number} failed: {e}")
+            store.finish(study, number, 'FAILED')
+            continue
+        store.finish(study, number, state, value)
+        print(f"✅ Trial {number} {state.lower()}: best val_accuracy {value:.4f}")
+
+def launch_workers(num_workers, worker_args):
+    """Run num_workers copies of this script as trial workers, each with an equal share of the cores"""
+    threads = max(1, (os.cpu_count() or 1) // num_workers)
+    env = dict(os.environ, TF_NUM_INTRAOP_THREADS=str(threads), TF_NUM_INTEROP_THREADS='1')
+    print(f"🚀 Launching {num_workers} trial workers ({threads} threads each)")
+    processes = [subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker'] + worker_args, env=env)
+                 for _ in range(num_workers)]
+    try:
+        return max(p.wait() for p in processes)
+    finally:
+        for p in processes:
+            if p.poll() is None:
+                p.terminate()
+
+def summarize(storage, study, top=5, output_path='best_hyperparameters.json'):
+    """Print the best trials and write the best one's hparams for train_cifar10_model.py --hparams"""
+    trials = TrialStore(storage).trials(study)
+    states = {state: sum(t['state'] == state for t in trials) for state in ('COMPLETE', 'PRUNED', 'FAILED', 'WAITING')}
+    print(f"\n📊 Study '{study}': {len(trials)} trials ({', '.join(f'{n} {s.lower()}' for s, n in states.items() if n)})")
+
+    finished = sorted((t for t in trials if t['state'] == 'COMPLETE'), key=lambda t: t['value'], reverse=True)
+    for t in finished[:top]:
+        print(f"  #{t['number']:3d} val_accuracy {t['value']:.4f} ({t['seconds']}s): "
+              + ", ".join(f"{k}={v:.4g}" for k, v in t['params'].items()))
+
+    if finished:
+        with open(output_path, 'w') as f:
+            json.dump(expand_params(finished[0]['params']), f, indent=2)
+        print(f"💾 Best hyperparameters saved: {output_path}")
+        print(f"Run: python train_cifar10_model.py train --hparams {output_path}")
+    return finished
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Parallel hyperparameter search for the CIFAR-10 model')
+    parser.add_argument('--study', default='cifar10_enhanced')
+    parser.add_argument('--storage', default='hparam_search.db', help='SQLite file holding all trials')
+    parser.add_argument('--trials', type=int, default=40, help='total trials in the study')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 4),
+                        help='trials trained at the same time')
+    parser.add_argument('--pruner', choices=list(PRUNERS), default='median')
+    parser.add_argument('--epochs', type=int, default=15, help='epochs per trial')
+    parser.add_argument('--train-images', type=int, default=20000)
+    parser.add_argument('--val-images', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    worker_kwargs = dict(storage=args.storage, study=args.study, n_trials=args.trials, pruner_name=args.pruner,
+                         trial_epochs=args.epochs, train_images=args.train_images, val_images=args.val_images,
+                         batch_size=args.batch_size, seed=args.seed)
+    if args.worker:
+        run_worker(**worker_kwargs)
+        sys.exit(0)
+
+    print("🔎 CIFAR-10 Hyperparameter Search")
+    print("=" * 50)
+
+    requeued = TrialStore(args.storage).requeue_running(args.study)
+    if requeued:
+        print(f"♻️ Resuming study '{args.study}': {requeued} interrupted trial(s) will run again")
+
+    if args.workers > 1:
+        launch_workers(args.workers, [a for a in sys.argv[1:] if a != '--worker'])
+    else:
+        run_worker(**worker_kwargs)
+
+    summarize(args.storage, args.study)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+# TensorFlow is imported where it is needed: the serving backend imports
+# TFLiteClassifier and can run it on the standalone LiteRT runtime
+import numpy as np
+import os
+import sys
+import json
+import time
+import threading
+from cifar10_dataset import load_cifar10
+
+def find_source_model():
+    """Return the first trained Keras model file that exists"""
+    model_files = [
+        'cifar10_high_accuracy_model.keras',
+        'best_cifar10_model.keras',
+        'cifar10_high_accuracy_model.h5'
+    ]
+
+    for model_file in model_files:
+        if os.path.exists(model_file):
+            return model_file
+    return None
+
+def load_tflite_interpreter(model_path, num_threads=None):
+    """Create a TFLite interpreter, preferring the standalone LiteRT runtime if installed"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+
+    return Interpreter(model_path=model_path, num_threads=num_threads)
+
+def representative_dataset(x_calibration, batch_size=1):
+    """Yield calibration batches for post-training quantization"""
+    def generator():
+        for start in range(0, len(x_calibration), batch_size):
+            yield [x_calibration[start:start + batch_size]]
+    return generator
+
+def quantize_to_int8(model, x_calibration, output_path='cifar10_int8.tflite'):
+    """Convert a Keras model to a fully int8 TFLite model calibrated on CIFAR-10 images"""
+    import tensorflow as tf
+
+    print(f"\n🔢 Calibrating int8 quantization on {len(x_calibration)} CIFAR-10 images...")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset(x_calibration)
+
+    # Integer-only kernels end to end, including the input and output tensors
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+
+    start = time.perf_counter()
+    tflite_model = converter.convert()
+    print(f"✅ Quantized in {time.perf_counter() - start:.1f}s")
+
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+    print(f"💾 Saved int8 model: {output_path} ({len(tflite_model) / 1024:.0f} KB)")
+
+    return output_path
+
+class TFLiteClassifier:
+    """Runs a (possibly quantized) TFLite classifier on float32 images in [0, 1]
+
+    Keeps one interpreter per batch size in batch_buckets (default just
+    batch_size), so tensors are never resized between calls; each is
+    guarded by its own lock. The serving backend (demos/classifier_engine.py)
+    runs this class, so benchmark_int8_vs_float32 measures what it serves.
+    """
+
+    def __init__(self, model_path, batch_size=1, num_threads=None, batch_buckets=None):
+        self.interpreters = {}
+        for bucket in batch_buckets or (batch_size,):
+            interpreter = load_tflite_interpreter(model_path, num_threads)
+            details = interpreter.get_input_details()[0]
+            if details['shape'][0] != bucket:
+                interpreter.resize_tensor_input(details['index'], [bucket] + list(details['shape'][1:]))
+            interpreter.allocate_tensors()
+            self.interpreters[bucket] = (interpreter, threading.Lock())
+
+        input_details = interpreter.get_input_details()[0]
+        output_details = interpreter.get_output_details()[0]
+        self.input_shape = tuple(int(d) for d in input_details['shape'][1:])
+        self.input_index = input_details['index']
+        self.input_dtype = input_details['dtype']
+        self.input_scale, self.input_zero_point = input_details['quantization']
+        self.output_index = output_details['index']
+        self.output_scale, self.output_zero_point = output_details['quantization']
+
+    def __call__(self, batch):
+        """Classify a float32 batch whose size is one of the buckets, returning float probabilities"""
+        if self.input_dtype != np.float32:
+            info = np.iinfo(self.input_dtype)
+            batch = np.clip(np.round(batch / self.input_scale + self.input_zero_point), info.min, info.max)
+        batch = batch.astype(self.input_dtype, copy=False)
+
+        interpreter, lock = self.interpreters[len(batch)]
+        with lock:
+            interpreter.set_tensor(self.input_index, batch)
+            interpreter.invoke()
+            output = interpreter.get_tensor(self.output_index)
+
+        if self.output_scale:
+            return (output.astype(np.float32) - self.output_zero_point) * np.float32(self.output_scale)
+        return output
+
+def measure_latency(predict, batch, runs=200, warmup=10):
+    """Return latency percentiles in milliseconds for repeated calls of predict(batch)"""
+    for _ in range(warmup):
+        predict(batch)
+
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        predict(batch)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p90_ms': round(float(np.percentile(latencies, 90)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'mean_ms': round(float(np.mean(latencies)), 3)
+    }
+
+def benchmark_int8_vs_float32(model, tflite_path, x_test, y_test, batch_size=32):
+    """Compare accuracy, single-image latency and batch throughput of float32 Keras vs int8 TFLite"""
+    import tensorflow as tf
+
+    print("\n📊 Benchmarking float32 vs int8 on CPU...")
+    true_classes = y_test.reshape(-1)
+    usable = (len(x_test) // batch_size) * batch_size
+    x_eval, y_eval = x_test[:usable], true_classes[:usable]
+
+    # float32 Keras model through a traced forward pass
+    forward = tf.function(lambda x: model(x, training=False))
+    float_predict = lambda x: forward(x).numpy()
+
+    # One classifier with both buckets, like the backend's TFLite runtime
+    int8_predict = TFLiteClassifier(tflite_path, batch_buckets=(1, batch_size))
+
+    results = {}
+    for name, single, batched in [('float32', float_predict, float_predict),
+                                  ('int8', int8_predict, int8_predict)]:
+        start = time.perf_counter()
+        predicted = np.concatenate([
+            np.argmax(batched(x_eval[i:i + batch_size]), axis=1)
+            for i in range(0, usable, batch_size)
+        ])
+        elapsed = time.perf_counter() - start
+
+        results[name] = {
+            'accuracy': round(float(np.mean(predicted == y_eval)), 4),
+            'single_image': measure_latency(single, x_eval[:1]),
+            f'batch_{batch_size}_images_per_sec': round(usable / elapsed, 1)
+        }
+        print(f"  {name:8s} accuracy {results[name]['accuracy']:.4f}, "
+              f"p50 {results[name]['single_image']['p50_ms']:.2f} ms, "
+              f"p99 {results[name]['single_image']['p99_ms']:.2f} ms, "
+              f"{results[name][f'batch_{batch_size}_images_per_sec']:.0f} img/s")
+
+    results['accuracy_delta'] = round(results['int8']['accuracy'] - results['float32']['accuracy'], 4)
+    results['single_image_speedup'] = round(
+        results['float32']['single_image']['p50_ms'] / results['int8']['single_image']['p50_ms'], 2)
+    results['evaluated_images'] = usable
+    print(f"\n  Accuracy delta (int8 - float32): {results['accuracy_delta']:+.4f}")
+    print(f"  Single-image speedup: {results['single_image_speedup']:.2f}x")
+
+    return results
+
+def quantize_saved_model(model_path=None, calibration_images=500, eval_images=2000,
+                         output_path='cifar10_int8.tflite'):
+    """Quantize the trained CIFAR-10 model to int8 and benchmark it against float32"""
+    import tensorflow as tf
+
+    model_path = model_path or find_source_model()
+    if model_path is None or not os.path.exists(model_path):
+        print("❌ No trained model found! Run train_cifar10_model.py first.")
+        return None
+
+    print(f"📥 Loading model from: {model_path}")
+    model = tf.keras.models.load_model(model_path, compile=False)
+
+    print("📚 Loading CIFAR-10...")
+    (x_train, _), (x_test, y_test) = load_cifar10()
+
+    # Calibrate on a random training subset so the test set stays unseen
+    rng = np.random.default_rng(0)
+    calibration_idx = np.sort(rng.choice(len(x_train), calibration_images, replace=False))
+    x_calibration = np.asarray(x_train[calibration_idx])
+    x_test = np.asarray(x_test[:eval_images])
+    y_test = np.argmax(y_test[:eval_images], axis=1)
+
+    quantize_to_int8(model, x_calibration, output_path)
+    results = benchmark_int8_vs_float32(model, output_path, x_test, y_test)
+    results['source_model'] = model_path
+    results['int8_model'] = output_path
+    results['float32_size_kb'] = round(os.path.getsize(model_path) / 1024, 1)
+    results['int8_size_kb'] = round(os.path.getsize(output_path) / 1024, 1)
+
+    report_path = os.path.splitext(output_path)[0] + '_benchmark.json'
+    with open(report_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Benchmark report saved: {report_path}")
+
+    return results
+
+if __name__ == "__main__":
+    print("🔢 CIFAR-10 INT8 Post-Training Quantization")
+    print("=" * 50)
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else None
+    results = quantize_saved_model(model_path)
+    if results:
+        print("\n✅ Quantization complete!")
+        print("Serve it with: INFERENCE_RUNTIME=tflite TFLITE_MODEL_PATH=cifar10_int8.tflite")
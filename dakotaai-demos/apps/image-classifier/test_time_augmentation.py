@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+# The view code needs only NumPy: the serving backend (demos/classifier_engine.py)
+# imports it, so the ensemble it serves is the one tta_report measures
+import numpy as np
+import json
+import argparse
+
+# Deterministic views in the order they are added as K grows: the original,
+# its mirror image, then 2-pixel shifts of both (edges are replicated)
+TTA_VIEWS = (
+    (False, 0, 0), (True, 0, 0),
+    (False, 0, 2), (True, 0, -2),
+    (False, 2, 0), (True, -2, 0),
+    (False, 0, -2), (True, 0, 2)
+)
+
+def shift_images(images, dy, dx):
+    """Shift a (N, H, W, C) batch by whole pixels, repeating the edge rows and columns"""
+    if dy == 0 and dx == 0:
+        return images
+    h, w = images.shape[1:3]
+    pad = max(abs(dy), abs(dx))
+    padded = np.pad(images, ((0, 0), (pad, pad), (pad, pad), (0, 0)), mode='edge')
+    return padded[:, pad - dy:pad - dy + h, pad - dx:pad - dx + w]
+
+def tta_view(images, k):
+    """The k-th view in TTA_VIEWS of a (N, H, W, C) batch"""
+    flip, dy, dx = TTA_VIEWS[k]
+    return shift_images(images[:, :, ::-1] if flip else images, dy, dx)
+
+def tta_expand(images, views):
+    """(N, H, W, C) -> (N * views, H, W, C), with the views of each image next to each other
+
+    Same views as tta_view, but the batch is padded and mirrored once for all of them.
+    """
+    h, w = images.shape[1:3]
+    pad = max(max(abs(dy), abs(dx)) for _, dy, dx in TTA_VIEWS[:views])
+    padded = np.pad(images, ((0, 0), (pad, pad), (pad, pad), (0, 0)), mode='edge')
+    mirrored = padded[:, :, ::-1]
+    expanded = np.empty((len(images), views) + images.shape[1:], dtype=np.float32)
+    for k, (flip, dy, dx) in enumerate(TTA_VIEWS[:views]):
+        expanded[:, k] = (mirrored if flip else padded)[:, pad - dy:pad - dy + h, pad - dx:pad - dx + w]
+    return expanded.reshape((-1,) + images.shape[1:])
+
+def average_view_logits(probabilities, views):
+    """Average the K views' logits (log-probabilities) per image and return softmax probabilities"""
+    logits = np.log(np.maximum(probabilities, 1e-7)).reshape(-1, views, probabilities.shape[-1]).mean(axis=1)
+    logits -= logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+def tta_predict(forward, views):
+    """Wrap a batch forward pass so each image is predicted from views augmented copies in one batch"""
+    if views == 1:
+        return forward
+    if not 1 <= views <= len(TTA_VIEWS):
+        raise ValueError(f"views must be between 1 and {len(TTA_VIEWS)}, got {views}")
+    return lambda images: average_view_logits(np.asarray(forward(tta_expand(np.asarray(images), views))), views)
+
+def tta_report(model, x_test, y_test, view_counts=(1, 2, 4, 8), batch_size=256, latency_runs=100,
+               output_path='tta_report.json'):
+    """Accuracy gain against extra single-image latency for each number of TTA views"""
+    import tensorflow as tf
+    from quantize_model import measure_latency
+    from train_cifar10_model import streaming_confusion_matrix, iter_eval_batches
+
+    forward = tf.function(lambda x: model(x, training=False), reduce_retracing=True)
+    sample = np.asarray(x_test[:1])
+
+    print("\n🔁 Test-time augmentation report...")
+    results = []
+    for views in view_counts:
+        # Larger K means proportionally smaller batches of original images
+        cm = streaming_confusion_matrix(model, iter_eval_batches(x_test, y_test, max(1, batch_size // views)),
+                                        tta_views=views)
+        predict = tta_predict(lambda x: forward(x).numpy(), views)
+        results.append({
+            'views': views,
+            'accuracy': round(float(np.trace(cm) / cm.sum()), 4),
+            'single_image': measure_latency(predict, sample, runs=latency_runs)
+        })
+
+    baseline = results[0]
+    for r in results:
+        r['accuracy_gain'] = round(r['accuracy'] - baseline['accuracy'], 4)
+        r['extra_p50_ms'] = round(r['single_image']['p50_ms'] - baseline['single_image']['p50_ms'], 3)
+        print(f"  K={r['views']}: accuracy {r['accuracy']:.4f} ({r['accuracy_gain']:+.4f}), "
+              f"p50 {r['single_image']['p50_ms']:.2f} ms ({r['extra_p50_ms']:+.2f} ms), "
+              f"p99 {r['single_image']['p99_ms']:.2f} ms")
+
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Report saved: {output_path}")
+    return results
+
+if __name__ == "__main__":
+    import tensorflow as tf
+    from cifar10_dataset import load_cifar10
+
+    parser = argparse.ArgumentParser(description='Measure the accuracy and latency of test-time augmentation')
+    parser.add_argument('model_path', nargs='?', default='best_cifar10_model.keras')
+    parser.add_argument('--views', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--runs', type=int, default=100, help='single-image latency samples')
+    parser.add_argument('--output', default='tta_report.json')
+    args = parser.parse_args()
+
+    print("🔁 CIFAR-10 Test-Time Augmentation")
+    print("=" * 50)
+
+    model = tf.keras.models.load_model(args.model_path, compile=False)
+    (_, _), (x_test, y_test) = load_cifar10()
+    tta_report(model, x_test, y_test, args.views, latency_runs=args.runs, output_path=args.output)
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+
+import tensorflow as tf
+import numpy as np
+import os
+import re
+import json
+import argparse
+
+# tensorflowjs_converter's default shard size; browsers fetch and cache each shard separately
+SHARD_BYTES = 4 * 1024 * 1024
+TFJS_DTYPES = {'float32': 'float32', 'int32': 'int32', 'bool': 'bool'}
+# Storage types tf.loadLayersModel dequantizes float32 weights from
+QUANTIZATION_DTYPES = ('float16', 'uint8')
+# Keras 3 config keys that TF.js layers do not know about
+KERAS3_ONLY_KEYS = ('module', 'registered_name', 'build_config', 'compile_config',
+                    'quantization_config', 'optional', 'ragged', 'input_axes', 'output_axes')
+SHARD_PATTERN = re.compile(r'^(weights\.bin|group\d+-shard\d+of\d+(\.bin)?)$')
+# Weight names tfjs-layers creates for each layer class (the Keras 2 names);
+# tf.loadLayersModel refuses manifests whose names do not match these
+TFJS_LAYER_WEIGHTS = {
+    'Conv1D': ('kernel', 'bias'),
+    'Conv2D': ('kernel', 'bias'),
+    'Conv3D': ('kernel', 'bias'),
+    'Conv2DTranspose': ('kernel', 'bias'),
+    'Dense': ('kernel', 'bias'),
+    'DepthwiseConv2D': ('depthwise_kernel', 'bias'),
+    'SeparableConv2D': ('depthwise_kernel', 'pointwise_kernel', 'bias'),
+    'BatchNormalization': ('gamma', 'beta', 'moving_mean', 'moving_variance'),
+    'LayerNormalization': ('gamma', 'beta'),
+    'Embedding': ('embeddings',),
+    'PReLU': ('alpha',)
+}
+# Keras 3 variables whose names differ from the tfjs-layers ones
+KERAS3_WEIGHT_RENAMES = {'DepthwiseConv2D': {'kernel': 'depthwise_kernel'}}
+# TF.js only registers the combined L1L2 regularizer
+TFJS_REGULARIZERS = ('L1', 'L2', 'L1L2')
+
+def tfjs_config(value):
+    """Recursively rewrite a Keras 3 config value into the Keras 2 form TF.js deserializes
+
+    Regularizers become L1L2, the only one tfjs-layers registers.
+    """
+    if isinstance(value, list):
+        return [tfjs_config(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if value.get('class_name') == 'DTypePolicy':
+        return value['config']['name']
+    if value.get('class_name') in TFJS_REGULARIZERS:
+        config = value.get('config', {})
+        return {'class_name': 'L1L2', 'config': {'l1': float(config.get('l1', 0.0)), 'l2': float(config.get('l2', 0.0))}}
+
+    converted = {}
+    for key, item in value.items():
+        if key in KERAS3_ONLY_KEYS or (key == 'groups' and item == 1):
+            continue
+        if key == 'batch_shape':
+            key = 'batch_input_shape'
+        elif key == 'inbound_nodes':
+            item = [inbound_node(node) for node in item]
+        elif key in ('input_layers', 'output_layers') and item and isinstance(item[0], str):
+            item = [item]
+        converted[key] = tfjs_config(item)
+    if 'output_layers' in converted:
+        shift_nested_model_nodes(converted)
+    return converted
+
+def shift_nested_model_nodes(config):
+    """Point references to nested models at their second node, in place
+
+    Keras 2 and tfjs-layers give a model built on an Input a node of its
+    own (node 0) before it is called, so the call inside the outer model
+    is node 1; Keras 3 counts it as node 0.
+    """
+    nested = set()
+    for layer in config['layers']:
+        inner_layers = layer['config'].get('layers') if isinstance(layer.get('config'), dict) else None
+        if inner_layers and inner_layers[0]['class_name'] == 'InputLayer':
+            nested.add(layer['config']['name'])
+    if not nested:
+        return
+
+    def shift(reference):
+        if reference and reference[0] in nested:
+            reference[1] += 1
+    for layer in config['layers']:
+        for node in layer.get('inbound_nodes', []):
+            for reference in node:
+                shift(reference)
+    for reference in config.get('output_layers', []):
+        shift(reference)
+
+def inbound_node(node):
+    """Keras 3 {'args': [keras tensors], 'kwargs': {}} node -> Keras 2 [[layer, node, tensor, kwargs], ...]"""
+    if isinstance(node, list):
+        return node
+    inputs = []
+
+    def collect(value):
+        if isinstance(value, dict):
+            if 'keras_history' in value.get('config', {}):
+                inputs.append(list(value['config']['keras_history']) + [{}])
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                collect(item)
+
+    collect(node.get('args', []))
+    return inputs
+
+def model_topology(model):
+    """TF.js layers-model topology for a Sequential or functional model of built-in layers"""
+    return {
+        'class_name': model.__class__.__name__ if isinstance(model, tf.keras.Sequential) else 'Model',
+        'config': tfjs_config(model.get_config()),
+        'keras_version': tf.keras.__version__,
+        'backend': 'tensorflow'
+    }
+
+def named_weights(model):
+    """(layer/weight name, variable) pairs in the order TF.js matches them against the topology
+
+    Nested models (e.g. a pretrained base in a transfer model) contribute
+    their own layers' weights, named by the inner layer as TF.js expects.
+    Layers with weights outside TFJS_LAYER_WEIGHTS (RNNs, wrappers) are
+    rejected rather than exported under names TF.js cannot match.
+    """
+    for layer in model.layers:
+        if isinstance(layer, tf.keras.Model):
+            yield from named_weights(layer)
+            continue
+        if not layer.weights:
+            continue
+        class_name = layer.__class__.__name__
+        if class_name not in TFJS_LAYER_WEIGHTS:
+            raise ValueError(f"{layer.name}: {class_name} weights are not supported by the TF.js writer")
+        renames = KERAS3_WEIGHT_RENAMES.get(class_name, {})
+        for variable in layer.weights:
+            yield f"{layer.name}/{renames.get(variable.name, variable.name)}", variable
+
+def affine_range(low, high, levels=255):
+    """(scale, nudged min) of tfjs's uint8 affine quantization for values in [low, high]
+
+    The range is widened to include 0.0 and nudged so that 0.0 lands exactly
+    on a quantized level, which keeps zero biases exact after dequantization.
+    """
+    low, high = min(low, 0.0), max(high, 0.0)
+    if high == low:
+        return 1.0, float(low)
+    scale = (high - low) / levels
+    zero_point = np.clip(np.round(-low / scale), 0, levels)
+    return float(scale), float(-zero_point * scale)
+
+def quantize_array(array, quantization):
+    """(stored array, manifest quantization metadata) of a float32 weight"""
+    if quantization == 'float16':
+        return array.astype(np.float16), {'dtype': 'float16'}
+    if quantization == 'uint8':
+        scale, low = affine_range(float(array.min()), float(array.max()))
+        levels = np.round((np.clip(array, low, low + 255 * scale) - low) / scale)
+        return levels.astype(np.uint8), {'dtype': 'uint8', 'scale': scale, 'min': low}
+    raise ValueError(f"quantization must be one of {QUANTIZATION_DTYPES}, got {quantization}")
+
+def dequantize_array(array, quantization):
+    """float32 values tfjs reconstructs from a stored quantized weight"""
+    if quantization['dtype'] == 'uint8':
+        return (array * np.float32(quantization['scale']) + np.float32(quantization['min'])).astype(np.float32)
+    return array.astype(np.float32)
+
+def weight_entries(model, quantization=None):
+    """Manifest entries (name, shape, dtype) and byte sizes of every weight, without copying any data
+
+    With a quantization dtype, float32 weights are stored as float16 or
+    uint8; uint8 scale and min are filled in while the data is written.
+    """
+    entries = []
+    for name, variable in named_weights(model):
+        dtype = TFJS_DTYPES.get(np.dtype(variable.dtype).name)
+        if dtype is None:
+            raise ValueError(f"{name}: dtype {variable.dtype} has no TF.js equivalent")
+        shape = [int(d) for d in variable.shape]
+        entry = {'name': name, 'shape': shape, 'dtype': dtype}
+        stored = dtype
+        if quantization and dtype == 'float32':
+            entry['quantization'] = {'dtype': quantization}
+            stored = quantization
+        entries.append((entry, int(np.prod(shape, dtype=np.int64)) * np.dtype(stored).itemsize))
+    return entries
+
+def topology_layers(config):
+    """{layer name: class name} of every layer in a TF.js topology, including nested models"""
+    layers = {}
+    for layer in config.get('config', {}).get('layers', []):
+        layers[layer['config']['name']] = layer['class_name']
+        if layer['class_name'] in ('Sequential', 'Functional', 'Model'):
+            layers.update(topology_layers(layer))
+    return layers
+
+def check_tfjs_weight_names(model_json):
+    """Raise if a manifest weight does not match a weight tfjs-layers creates for the topology
+
+    Names are checked against the layer classes in modelTopology and
+    TFJS_LAYER_WEIGHTS, independently of how the writer named them.
+    """
+    layers = topology_layers(model_json['modelTopology'])
+    names = [entry['name'] for group in model_json['weightsManifest'] for entry in group['weights']]
+    if len(set(names)) != len(names):
+        raise ValueError("duplicate weight names in the manifest")
+
+    for name in names:
+        layer_name, _, weight_name = name.rpartition('/')
+        class_name = layers.get(layer_name)
+        if class_name is None:
+            raise ValueError(f"{name}: no layer {layer_name} in the model topology")
+        if weight_name not in TFJS_LAYER_WEIGHTS.get(class_name, ()):
+            raise ValueError(f"{name}: TF.js {class_name} layers have no weight {weight_name}, "
+                             f"expected one of {TFJS_LAYER_WEIGHTS.get(class_name, ())}")
+
+class ShardWriter:
+    """File-like sink that splits a byte stream into fixed-size shard files
+
+    TF.js concatenates a group's shards before slicing out tensors, so a
+    tensor may straddle two shards. Only one tensor is in memory at a time.
+    """
+
+    def __init__(self, output_dir, paths, shard_bytes):
+        self.output_dir = output_dir
+        self.paths = paths
+        self.shard_bytes = shard_bytes
+        self.index = -1
+        self.remaining = 0
+        self.file = None
+
+    def write(self, data):
+        data = memoryview(data).cast('B')
+        while len(data):
+            if self.remaining == 0:
+                self.close()
+                self.index += 1
+                self.file = open(os.path.join(self.output_dir, self.paths[self.index]), 'wb')
+                self.remaining = self.shard_bytes
+            chunk = data[:self.remaining]
+            self.file.write(chunk)
+            self.remaining -= len(chunk)
+            data = data[len(chunk):]
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+def remove_old_weights(output_dir):
+    """Delete weights.bin and shard files from an earlier export so none are served stale"""
+    for file in os.listdir(output_dir):
+        if SHARD_PATTERN.match(file):
+            os.remove(os.path.join(output_dir, file))
+
+def write_tfjs_layers_model(model, output_dir, shard_bytes=SHARD_BYTES, topology=None,
+                            converted_by='dakotaai-tfjs-writer', quantization=None):
+    """Write model.json and group1-shard*of*.bin weight shards loadable with tf.loadLayersModel
+
+    quantization='float16' or 'uint8' stores float32 weights at 2 or 1
+    bytes each; tfjs dequantizes them back to float32 while loading.
+    Returns the model.json contents.
+    """
+    if quantization is not None and quantization not in QUANTIZATION_DTYPES:
+        raise ValueError(f"quantization must be one of {QUANTIZATION_DTYPES}, got {quantization}")
+
+    entries = weight_entries(model, quantization)
+    total_bytes = sum(size for _, size in entries)
+    shards = max(1, -(-total_bytes // shard_bytes))
+    paths = [f"group1-shard{i + 1}of{shards}.bin" for i in range(shards)]
+    model_json = {
+        'format': 'layers-model',
+        'generatedBy': f"keras v{tf.keras.__version__}",
+        'convertedBy': converted_by,
+        'modelTopology': topology if topology is not None else model_topology(model),
+        'weightsManifest': [{'paths': paths, 'weights': [entry for entry, _ in entries]}]
+    }
+    # Fail before writing anything tf.loadLayersModel would reject
+    check_tfjs_weight_names(model_json)
+    os.makedirs(output_dir, exist_ok=True)
+    remove_old_weights(output_dir)
+
+    writer = ShardWriter(output_dir, paths, shard_bytes)
+    try:
+        for (entry, _), (_, variable) in zip(entries, named_weights(model)):
+            array = np.ascontiguousarray(variable.numpy(), dtype=entry['dtype'])
+            if 'quantization' in entry:
+                array, entry['quantization'] = quantize_array(array, quantization)
+            writer.write(np.ascontiguousarray(array))
+    finally:
+        writer.close()
+
+    with open(os.path.join(output_dir, 'model.json'), 'w') as f:
+        json.dump(model_json, f)
+
+    print(f"✅ TF.js model written to {output_dir}: {len(entries)} {quantization or 'float32'} weights, "
+          f"{total_bytes / 1024:.0f} KB in {shards} shard(s)")
+    return model_json
+
+def convert_model_file(model_path, output_dir, quantization=None, shard_bytes=SHARD_BYTES,
+                       converted_by='dakotaai-tfjs-writer'):
+    """Load a .keras/.h5 model and write it as a TF.js layers model, in-process and offline
+
+    Replaces tensorflowjs_converter for Keras models: no tensorflowjs
+    install, SavedModel export or subprocess. Returns the model.json contents.
+    """
+    model = tf.keras.models.load_model(model_path, compile=False)
+    model_json = write_tfjs_layers_model(model, output_dir, shard_bytes, converted_by=converted_by,
+                                         quantization=quantization)
+
+    difference = tfjs_load_difference(model, output_dir)
+    if difference is None:
+        print("⚠️ tensorflowjs not installed: weight names checked, but the export was not loaded")
+    elif quantization is None and difference > 1e-4:
+        raise ValueError(f"TF.js export predicts differently from {model_path} (max abs diff {difference:.2e})")
+    else:
+        print(f"✅ Loaded with the tensorflowjs Keras loader: max abs prediction diff {difference:.2e}")
+    return model_json
+
+def tfjs_load_difference(model, output_dir, samples=4):
+    """Load a written layers model with tensorflowjs' Keras loader and compare its predictions with model
+
+    The loader rebuilds the topology and matches weights by name as
+    strictly as tf.loadLayersModel. Returns the max absolute prediction
+    difference, or None if tensorflowjs is not installed.
+    """
+    try:
+        from tensorflowjs.converters import keras_tfjs_loader
+    except ImportError:
+        return None
+
+    loaded = keras_tfjs_loader.load_keras_model(os.path.join(output_dir, 'model.json'))
+    x = np.random.RandomState(0).rand(samples, *model.input_shape[1:]).astype('float32')
+    return float(np.abs(loaded.predict(x, verbose=0) - model.predict(x, verbose=0)).max())
+
+def read_tfjs_weights(output_dir):
+    """{name: float array} of a written TF.js model, dequantized the way tfjs does it"""
+    with open(os.path.join(output_dir, 'model.json')) as f:
+        model_json = json.load(f)
+
+    weights = {}
+    for group in model_json['weightsManifest']:
+        data = b''.join(open(os.path.join(output_dir, path), 'rb').read() for path in group['paths'])
+        offset = 0
+        for entry in group['weights']:
+            count = int(np.prod(entry['shape'], dtype=np.int64))
+            quantization = entry.get('quantization')
+            array = np.frombuffer(data, dtype=quantization['dtype'] if quantization else entry['dtype'],
+                                  count=count, offset=offset)
+            offset += array.nbytes
+            if quantization:
+                array = dequantize_array(array, quantization)
+            weights[entry['name']] = array.reshape(entry['shape'])
+    return weights
+
+def load_tfjs_weights(model, output_dir):
+    """Copy the (dequantized) weights of a written TF.js model into a Keras model with the same layers"""
+    weights = read_tfjs_weights(output_dir)
+    for name, variable in named_weights(model):
+        variable.assign(weights[name])
+    return model
+
+def quantization_report(model, output_dir, x_test, y_test, modes=(None,) + QUANTIZATION_DTYPES,
+                        report_path='tfjs_quantization_report.json'):
+    """Export model once per weight storage type and measure download size and test accuracy of each
+
+    Accuracy is measured with the weights read back from the written
+    shards, so it checks exactly what the browser will run.
+    """
+    from train_cifar10_model import streaming_confusion_matrix, iter_eval_batches
+
+    print("\n📏 TF.js quantization report...")
+    clone = tf.keras.models.clone_model(model)
+    results = []
+    for mode in modes:
+        mode_dir = os.path.join(output_dir, mode or 'float32')
+        write_tfjs_layers_model(model, mode_dir, quantization=mode)
+        load_tfjs_weights(clone, mode_dir)
+        cm = streaming_confusion_matrix(clone, iter_eval_batches(x_test, y_test))
+        results.append({
+            'quantization': mode or 'float32',
+            'accuracy': round(float(np.trace(cm) / cm.sum()), 4),
+            'weights_kb': round(sum(os.path.getsize(os.path.join(mode_dir, f)) for f in os.listdir(mode_dir)
+                                    if SHARD_PATTERN.match(f)) / 1024, 1)
+        })
+
+    baseline = results[0]
+    for r in results:
+        r['accuracy_delta'] = round(r['accuracy'] - baseline['accuracy'], 4)
+        r['size_ratio'] = round(baseline['weights_kb'] / r['weights_kb'], 2)
+        print(f"  {r['quantization']:8s} accuracy {r['accuracy']:.4f} ({r['accuracy_delta']:+.4f})  "
+              f"{r['weights_kb']:8.0f} KB  ({r['size_ratio']:.1f}x smaller)")
+
+    with open(report_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Report saved: {report_path}")
+    return results
+
+def quantized_copy(model, quantization):
+    """Clone of model whose float32 weights went through tfjs's quantize/dequantize round trip"""
+    clone = tf.keras.models.clone_model(model)
+    for (_, source), (_, target) in zip(named_weights(model), named_weights(clone)):
+        array = source.numpy()
+        if array.dtype == np.float32:
+            array = dequantize_array(*quantize_array(array, quantization))
+        target.assign(array)
+    return clone
+
+def check_quantized_export(model, quantization, x_test=None, y_test=None, tolerance=0.01):
+    """Compare CIFAR-10 test accuracy of quantized weights against the float32 model
+
+    tensorflowjs_converter's --quantize_float16/--quantize_uint8 use the
+    same scheme as quantize_array, so this holds for every export path.
+    """
+    from train_cifar10_model import streaming_confusion_matrix, iter_eval_batches
+
+    if x_test is None:
+        from cifar10_dataset import load_cifar10
+        (_, _), (x_test, y_test) = load_cifar10()
+
+    print(f"\n📏 Checking {quantization} accuracy on CIFAR-10 test data...")
+    cm = streaming_confusion_matrix(model, iter_eval_batches(x_test, y_test))
+    original = float(np.trace(cm) / cm.sum())
+    cm = streaming_confusion_matrix(quantized_copy(model, quantization), iter_eval_batches(x_test, y_test))
+    quantized = float(np.trace(cm) / cm.sum())
+
+    delta = quantized - original
+    status = "✅" if delta >= -tolerance else "⚠️"
+    print(f"{status} {quantization} accuracy {quantized:.4f} vs float32 {original:.4f} ({delta:+.4f})")
+    return {'float32_accuracy': round(original, 4), 'quantized_accuracy': round(quantized, 4),
+            'accuracy_delta': round(delta, 4)}
+
+def converter_quantization_flags(quantization):
+    """tensorflowjs_converter command-line flags for a quantization dtype"""
+    return [f"--quantize_{quantization}"] if quantization else []
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export a Keras model as a sharded TF.js layers model')
+    parser.add_argument('model_path', nargs='?', default='cifar10_high_accuracy_model.keras')
+    parser.add_argument('--output', default='public/tfjs_model')
+    parser.add_argument('--shard-mb', type=float, default=SHARD_BYTES / 1024 / 1024)
+    parser.add_argument('--quantize', choices=QUANTIZATION_DTYPES, help='store float32 weights as float16 or uint8')
+    parser.add_argument('--report', action='store_true',
+                        help='export every storage type under --output and compare size and accuracy')
+    args = parser.parse_args()
+
+    print("📦 TF.js Layers Model Export")
+    print("=" * 50)
+
+    model = tf.keras.models.load_model(args.model_path, compile=False)
+    if args.report:
+        from cifar10_dataset import load_cifar10
+        (_, _), (x_test, y_test) = load_cifar10()
+        quantization_report(model, args.output, x_test, y_test)
+    else:
+        write_tfjs_layers_model(model, args.output, int(args.shard_mb * 1024 * 1024), quantization=args.quantize)
+        if args.quantize:
+            check_quantized_export(model, args.quantize)
@@ -3,13 +3,16 @@
 import tensorflow as tf
 from tensorflow.keras import layers, models, optimizers, callbacks
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from tensorflow.keras.datasets import cifar10
-from tensorflow.keras.utils import to_categorical
 from tensorflow.keras.regularizers import l2
 import numpy as np
 import os
 import matplotlib.pyplot as plt
 import math
+import time
+import json
+from cifar10_dataset import load_cifar10
+from cifar10_pipeline import make_train_dataset, make_eval_dataset
+from training_checkpoints import ResumableCheckpoint
 
 def squeeze_excite_block(input_tensor, ratio=16):
     """Squeeze and Excitation block for channel attention"""
@@ -112,31 +115,13 @@ def create_data_augmentation():
 
     return datagen
 
-def create_mixup_generator(datagen, alpha=0.2):
-    """Create mixup data generator"""
-    def mixup_generator():
-        while True:
-            x_batch, y_batch = next(datagen)
-            batch_size = x_batch.shape[0]
+def create_enhanced_cnn(input_shape=(32, 32, 3), num_classes=10,
+                        block_dropout=(0.25, 0.3, 0.35, 0.4), head_dropout=(0.5, 0.4)):
+    """Enhanced CNN with progressive architecture for higher accuracy
 
-            # Generate lambda values
-            lam = np.random.beta(alpha, alpha, batch_size)
-
-            # Shuffle batch
-            indices = np.random.permutation(batch_size)
-            x_shuffled = x_batch[indices]
-            y_shuffled = y_batch[indices]
-
-            # Mix images and labels
-            x_mixed = lam.reshape(batch_size, 1, 1, 1) * x_batch + (1 - lam).reshape(batch_size, 1, 1, 1) * x_shuffled
-            y_mixed = lam.reshape(batch_size, 1) * y_batch + (1 - lam).reshape(batch_size, 1) * y_shuffled
-
-            yield x_mixed, y_mixed
-
-    return mixup_generator
-
-def create_enhanced_cnn(input_shape=(32, 32, 3), num_classes=10):
-    """Enhanced CNN with progressive architecture for higher accuracy"""
+    block_dropout follows each of the four residual stages and
+    head_dropout each of the two dense layers.
+    """
 
     inputs = layers.Input(shape=input_shape)
 
@@ -148,22 +133,22 @@ def create_enhanced_cnn(input_shape=(32, 32, 3), num_classes=10):
     # First residual block (64 filters)
     x = residual_block(x, 64, use_se=True)
     x = layers.MaxPooling2D((2, 2))(x)
-    x = layers.Dropout(0.25)(x)
+    x = layers.Dropout(block_dropout[0])(x)
 
     # Second residual block (128 filters)
     x = residual_block(x, 128, use_se=True)
     x = layers.MaxPooling2D((2, 2))(x)
-    x = layers.Dropout(0.3)(x)
+    x = layers.Dropout(block_dropout[1])(x)
 
     # Third residual block (256 filters)
     x = residual_block(x, 256, use_se=True)
     x = layers.MaxPooling2D((2, 2))(x)
-    x = layers.Dropout(0.35)(x)
+    x = layers.Dropout(block_dropout[2])(x)
 
     # Fourth residual block (512 filters)
     x = residual_block(x, 512, use_se=True)
     x = layers.MaxPooling2D((2, 2))(x)
-    x = layers.Dropout(0.4)(x)
+    x = layers.Dropout(block_dropout[3])(x)
 
     # Global average pooling
     x = layers.GlobalAveragePooling2D()(x)
@@ -172,12 +157,12 @@ def create_enhanced_cnn(input_shape=(32, 32, 3), num_classes=10):
     x = layers.Dense(512, kernel_regularizer=l2(0.0001))(x)
     x = layers.BatchNormalization()(x)
     x = layers.Activation('relu')(x)
-    x = layers.Dropout(0.5)(x)
+    x = layers.Dropout(head_dropout[0])(x)
 
     x = layers.Dense(256, kernel_regularizer=l2(0.0001))(x)
     x = layers.BatchNormalization()(x)
     x = layers.Activation('relu')(x)
-    x = layers.Dropout(0.4)(x)
+    x = layers.Dropout(head_dropout[1])(x)
 
     outputs = layers.Dense(num_classes, activation='softmax')(x)
 
@@ -188,15 +173,8 @@ def load_and_preprocess_cifar10():
     """Load CIFAR-10 dataset and preprocess for training"""
 
     print("Loading CIFAR-10 dataset...")
-    (x_train, y_train), (x_test, y_test) = cifar10.load_data()
-
-    # Normalize pixel values to [0, 1]
-    x_train = x_train.astype('float32') / 255.0
-    x_test = x_test.astype('float32') / 255.0
-
-    # Convert labels to one-hot encoding
-    y_train = to_categorical(y_train, 10)
-    y_test = to_categorical(y_test, 10)
+    # Normalized [0, 1] images and one-hot labels, memory-mapped from the shared .npy cache
+    (x_train, y_train), (x_test, y_test) = load_cifar10()
 
     print(f"Training data shape: {x_train.shape}")
     print(f"Training labels shape: {y_train.shape}")
@@ -234,62 +212,185 @@ def plot_training_history(history):
     plt.savefig('cifar10_training_history.png', dpi=300, bbox_inches='tight')
     plt.show()
 
+def make_warmup_cosine_scheduler(lr_scale=1.0, warmup_epochs=10, total_epochs=200, max_lr=0.1, min_lr=0.001):
+    """Warmup + cosine decay schedule, with peak and floor scaled by lr_scale
+
+    The base rates are tuned for a batch of 128; data-parallel training
+    with a larger global batch scales them linearly and relies on the
+    warmup to keep the early epochs stable.
+    """
+    max_lr = max_lr * lr_scale
+    min_lr = min_lr * lr_scale
+    warmup_epochs = min(warmup_epochs, total_epochs - 1)
+
+    def scheduler(epoch, lr):
+        if epoch < warmup_epochs:
+            return max_lr * ((epoch + 1) / warmup_epochs)
+        else:
+            progress = (epoch - warmup_epochs) / (total_epochs - warmup_epochs)
+            return min_lr + 0.5 * (max_lr - min_lr) * (1 + math.cos(math.pi * progress))
+
+    return scheduler
+
 def warmup_cosine_decay_scheduler(epoch, lr):
     """Learning rate scheduler with warmup and cosine decay"""
-    warmup_epochs = 10
-    max_lr = 0.1
-    min_lr = 0.001
-    total_epochs = 200
+    return make_warmup_cosine_scheduler()(epoch, lr)
 
-    if epoch < warmup_epochs:
-        return max_lr * ((epoch + 1) / warmup_epochs)
-    else:
-        progress = (epoch - warmup_epochs) / (total_epochs - warmup_epochs)
-        return min_lr + 0.5 * (max_lr - min_lr) * (1 + math.cos(math.pi * progress))
+def cpu_supports_bfloat16():
+    """True when the CPU has native bfloat16 instructions (AVX512_BF16 or AMX)"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return 'avx512_bf16' in flags or 'amx_bf16' in flags
 
-def train_high_accuracy_model(use_enhanced=True):
-    """Train a high-accuracy CIFAR-10 model with enhancements"""
+def set_precision_policy(mixed_precision):
+    """Set the global Keras dtype policy, returning True if bfloat16 compute is enabled"""
+    if mixed_precision and not cpu_supports_bfloat16():
+        print("⚠️ CPU has no native bfloat16 support, keeping float32")
+        mixed_precision = False
 
-    # Load and preprocess data
-    (x_train, y_train), (x_test, y_test) = load_and_preprocess_cifar10()
+    tf.keras.mixed_precision.set_global_policy('mixed_bfloat16' if mixed_precision else 'float32')
+    return mixed_precision
+
+def build_cifar_model(use_enhanced=True, mixed_precision=False, **enhanced_kwargs):
+    """Build the enhanced or modern CNN, optionally with bfloat16 compute
+
+    enhanced_kwargs (block_dropout, head_dropout) are passed to create_enhanced_cnn.
+    """
+    mixed_precision = set_precision_policy(mixed_precision)
 
-    # Create enhanced model
     if use_enhanced:
         print("\n🏗️ Building enhanced CNN architecture...")
-        model = create_enhanced_cnn()
+        model = create_enhanced_cnn(**enhanced_kwargs)
     else:
         print("\n🏗️ Building modern CNN architecture...")
         model = create_modern_cnn()
 
+    if mixed_precision:
+        # Same layers, but the softmax output stays float32 for a stable loss
+        model.layers[-1].dtype_policy = tf.keras.DTypePolicy('float32')
+        print("⚡ bfloat16 mixed precision enabled")
+
+    # Later models in this process are built in float32 unless asked otherwise
+    tf.keras.mixed_precision.set_global_policy('float32')
+    return model
+
+class StepTimeCallback(callbacks.Callback):
+    """Records wall time of every training step after the first few (tracing/compilation)"""
+
+    def __init__(self, skip_steps=5):
+        super().__init__()
+        self.skip_steps = skip_steps
+        self.step_times = []
+        self._seen = 0
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._seen += 1
+        if self._seen > self.skip_steps:
+            self.step_times.append((time.perf_counter() - self._start) * 1000)
+
+    def median_ms(self):
+        return float(np.median(self.step_times)) if self.step_times else None
+
+def compare_training_modes(use_enhanced=True, epochs=1, train_images=10000, batch_size=128, seed=42):
+    """Measure step time and accuracy of float32, bfloat16 and XLA-compiled training"""
+    (x_train, y_train), (x_test, y_test) = load_and_preprocess_cifar10()
+    x_train, y_train = x_train[:train_images], y_train[:train_images]
+
+    modes = [('float32', False, False), ('xla', True, False)]
+    if cpu_supports_bfloat16():
+        modes += [('bfloat16', False, True), ('xla_bfloat16', True, True)]
+
+    results = {}
+    for name, jit_compile, mixed_precision in modes:
+        print(f"\n⏱️ Training mode: {name}")
+        tf.keras.backend.clear_session()
+        tf.keras.utils.set_random_seed(seed)
+        model = build_cifar_model(use_enhanced, mixed_precision)
+        model.compile(
+            optimizer=optimizers.SGD(learning_rate=0.01, momentum=0.9, nesterov=True),
+            loss='categorical_crossentropy',
+            metrics=['accuracy'],
+            jit_compile=jit_compile
+        )
+
+        timer = StepTimeCallback()
+        start = time.perf_counter()
+        model.fit(make_train_dataset(x_train, y_train, batch_size=batch_size, seed=seed),
+                  epochs=epochs, callbacks=[timer], verbose=2)
+        train_seconds = time.perf_counter() - start
+        _, accuracy = model.evaluate(make_eval_dataset(x_test, y_test), verbose=0)
+
+        results[name] = {
+            'step_ms': round(timer.median_ms(), 2),
+            'train_seconds': round(train_seconds, 1),
+            'val_accuracy': round(float(accuracy), 4)
+        }
+
+    baseline = results['float32']
+    print(f"\n📊 Training modes ({epochs} epoch(s) on {len(x_train)} images, batch {batch_size}):")
+    for name, r in results.items():
+        print(f"  {name:14s} {r['step_ms']:8.1f} ms/step ({baseline['step_ms'] / r['step_ms']:.2f}x), "
+              f"val accuracy {r['val_accuracy']:.4f} ({r['val_accuracy'] - baseline['val_accuracy']:+.4f})")
+
+    with open('training_modes_benchmark.json', 'w') as f:
+        json.dump(results, f, indent=2)
+    print("💾 Results saved: training_modes_benchmark.json")
+    return results
+
+def train_high_accuracy_model(use_enhanced=True, batch_size=128, seed=42,
+                              mix=None, mixup_alpha=0.2, cutmix_alpha=1.0,
+                              jit_compile=False, mixed_precision=False, epochs=200,
+                              checkpoint_dir='checkpoints/cifar10', resume=True, hparams=None):
+    """Train a high-accuracy CIFAR-10 model with enhancements
+
+    mix enables batched MixUp ('mixup'), CutMix ('cutmix') or a per-image
+    choice of the two ('both') inside the input pipeline. jit_compile
+    compiles the training step with XLA; mixed_precision computes in
+    bfloat16 where the CPU supports it natively.
+
+    Full training state is checkpointed to checkpoint_dir after every
+    epoch, and with resume=True an interrupted run continues from the
+    latest complete checkpoint instead of epoch 0.
+
+    hparams overrides the learning rate schedule and dropout rates with
+    the keys written to best_hyperparameters.json by hparam_search.py.
+    """
+    hparams = hparams or {}
+
+    # Seed weight init, shuffling and augmentation for repeatable runs
+    tf.keras.utils.set_random_seed(seed)
+
+    # Load and preprocess data
+    (x_train, y_train), (x_test, y_test) = load_and_preprocess_cifar10()
+
+    model = build_cifar_model(use_enhanced, mixed_precision,
+                              **{k: hparams[k] for k in ('block_dropout', 'head_dropout') if k in hparams})
     model.summary()
 
     # Compile model with enhanced learning rate schedule
-    initial_lr = 0.1
-    epochs = 200
-
-    # Create data augmentation
-    datagen = create_data_augmentation()
-    datagen.fit(x_train)
-
-    # Optional: Enable mixup for additional regularization
-    use_mixup = False
-    if use_mixup:
-        mixup_gen = create_mixup_generator(datagen.flow(x_train, y_train, batch_size=128), alpha=0.2)
-        train_generator = mixup_gen
-        steps_per_epoch = len(x_train) // 128
-    else:
-        train_generator = datagen.flow(x_train, y_train, batch_size=128)
-        steps_per_epoch = len(x_train) // 128
+    initial_lr = hparams.get('max_lr', 0.1)
 
     # Learning rate scheduler with warmup
-    lr_callback = callbacks.LearningRateScheduler(warmup_cosine_decay_scheduler)
+    lr_callback = callbacks.LearningRateScheduler(make_warmup_cosine_scheduler(
+        warmup_epochs=round(hparams.get('warmup_fraction', 0.05) * epochs),
+        total_epochs=epochs,
+        max_lr=initial_lr,
+        min_lr=hparams.get('min_lr', 0.001)
+    ))
 
     optimizer = optimizers.SGD(learning_rate=initial_lr, momentum=0.9, nesterov=True)
 
     model.compile(
         optimizer=optimizer,
         loss='categorical_crossentropy',
-        metrics=['accuracy']
+        metrics=['accuracy'],
+        jit_compile=jit_compile
     )
 
     # Callbacks for better training
@@ -317,19 +418,38 @@ def train_high_accuracy_model(use_enhanced=True):
         )
     ]
 
+    # Periodic full-state checkpoints, written in the background; listed
+    # last so the tracked callbacks' counters are restored after their resets
+    checkpoint = ResumableCheckpoint(checkpoint_dir, tracked_callbacks=callbacks_list)
+    callbacks_list.append(checkpoint)
+    if not resume:
+        checkpoint.clear()
+    initial_epoch = checkpoint.restore(model)
+
+    # tf.data input pipeline with batched augmentation and MixUp/CutMix in the graph.
+    # A resumed run offsets the seed so it does not replay the first epochs' batches
+    if mix:
+        print(f"🔀 Mixing batches with {mix} (mixup alpha {mixup_alpha}, cutmix alpha {cutmix_alpha})")
+    train_dataset = make_train_dataset(x_train, y_train, batch_size=batch_size, seed=seed + initial_epoch,
+                                       mix=mix, mixup_alpha=mixup_alpha, cutmix_alpha=cutmix_alpha)
+    val_dataset = make_eval_dataset(x_test, y_test)
+
     # Train the model
     print("\n🎯 Starting enhanced training for high accuracy...")
     print("Target: 95%+ validation accuracy on CIFAR-10")
 
     history = model.fit(
-        train_generator,
-        steps_per_epoch=steps_per_epoch,
+        train_dataset,
         epochs=epochs,
-        validation_data=(x_test, y_test),
+        initial_epoch=initial_epoch,
+        validation_data=val_dataset,
         callbacks=callbacks_list,
         verbose=1
     )
 
+    # The run finished, so the next one starts fresh
+    checkpoint.clear()
+
     # Evaluate final model
     print("\n📊 Final Evaluation:")
     test_loss, test_accuracy = model.evaluate(x_test, y_test, verbose=0)
@@ -351,47 +471,94 @@ def train_high_accuracy_model(use_enhanced=True):
 
     return model, history
 
-def evaluate_model_comprehensive(model, x_test, y_test):
-    """Comprehensive evaluation of the trained model"""
-
-    print("\n🔬 Comprehensive Model Evaluation:")
-
-    # Get predictions
-    predictions = model.predict(x_test)
-    predicted_classes = np.argmax(predictions, axis=1)
-    true_classes = np.argmax(y_test, axis=1)
-
-    # Calculate per-class accuracy
-    class_names = ['airplane', 'automobile', 'bird', 'cat', 'deer',
-                   'dog', 'frog', 'horse', 'ship', 'truck']
-
+CLASS_NAMES = ['airplane', 'automobile', 'bird', 'cat', 'deer',
+               'dog', 'frog', 'horse', 'ship', 'truck']
+
+def iter_eval_batches(x, y, batch_size=256):
+    """Yield (images, labels) slices, reading memory-mapped arrays one batch at a time"""
+    for start in range(0, len(x), batch_size):
+        yield np.asarray(x[start:start + batch_size]), np.asarray(y[start:start + batch_size])
+
+def streaming_confusion_matrix(model, batches, num_classes=10, tta_views=1):
+    """Accumulate the confusion matrix (rows: true, columns: predicted) batch by batch
+
+    batches yields (images, labels) with one-hot or integer labels, e.g.
+    iter_eval_batches() or a tf.data dataset; only one batch of
+    predictions is held at a time. tta_views > 1 predicts every image
+    from that many test-time augmented views (see test_time_augmentation.py).
+    """
+    from test_time_augmentation import tta_predict
+
+    forward = tf.function(lambda images: model(images, training=False), reduce_retracing=True)
+    predict = tta_predict(lambda images: forward(images).numpy(), tta_views)
+    cm = np.zeros((num_classes, num_classes), dtype=np.int64)
+
+    for images, labels in batches:
+        predicted = np.argmax(predict(images), axis=1)
+        labels = np.asarray(labels)
+        true = np.argmax(labels, axis=1) if labels.ndim > 1 else labels.astype(np.int64)
+        cm += np.bincount(true * num_classes + predicted,
+                          minlength=num_classes * num_classes).reshape(num_classes, num_classes)
+
+    return cm
+
+def confusion_metrics(cm, top_pairs=20):
+    """Accuracy, per-class precision/recall/F1 and the most confused pairs from a confusion matrix"""
+    correct = np.diag(cm).astype(np.float64)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        recall = np.where(support > 0, correct / support, np.nan)
+        precision = np.where(predicted > 0, correct / predicted, np.nan)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    # Largest off-diagonal cells, i.e. (true, predicted) pairs
+    off_diagonal = cm.copy()
+    np.fill_diagonal(off_diagonal, 0)
+    order = np.argsort(off_diagonal, axis=None)[::-1][:top_pairs]
+    pairs = [(int(off_diagonal.flat[k]), *np.unravel_index(k, cm.shape)) for k in order]
+
+    return {
+        'accuracy': correct.sum() / max(cm.sum(), 1),
+        'per_class_accuracy': recall,
+        'precision': precision,
+        'f1': f1,
+        'support': support,
+        'confused_pairs': [(count, int(i), int(j)) for count, i, j in pairs if count > 0]
+    }
+
+def evaluate_model_comprehensive(model, x_test, y_test=None, batch_size=256, class_names=CLASS_NAMES, tta_views=1):
+    """Comprehensive evaluation of the trained model
+
+    Predicts in batches of batch_size and folds every batch into a
+    confusion matrix, so the eval set can be a memory-mapped array or a
+    dataset (pass it as x_test with y_test=None) larger than memory.
+    """
+
+    print("\n🔬 Comprehensive Model Evaluation:" + (f" ({tta_views} TTA views)" if tta_views > 1 else ""))
+
+    batches = x_test if y_test is None else iter_eval_batches(x_test, y_test, batch_size)
+    cm = streaming_confusion_matrix(model, batches, num_classes=len(class_names), tta_views=tta_views)
+    metrics = confusion_metrics(cm)
+
+    print(f"Overall accuracy: {metrics['accuracy']:.4f} on {cm.sum()} images")
     print("Per-class accuracy:")
     for i, class_name in enumerate(class_names):
-        class_mask = (true_classes == i)
-        if np.sum(class_mask) > 0:
-            class_accuracy = np.mean(predicted_classes[class_mask] == true_classes[class_mask])
-            print(".4f")
-
-    # Confusion matrix (simplified)
-    from sklearn.metrics import confusion_matrix
-    cm = confusion_matrix(true_classes, predicted_classes)
+        if metrics['support'][i] > 0:
+            print(f"  {class_name:12s} accuracy {metrics['per_class_accuracy'][i]:.4f}  "
+                  f"precision {metrics['precision'][i]:.4f}  f1 {metrics['f1'][i]:.4f}")
+
     print(f"\nConfusion matrix shape: {cm.shape}")
     print("Most confused pairs (top 20):")
-    # Find most confused pairs
-    confusion_list = []
-    for i in range(10):
-        for j in range(10):
-            if i != j:
-                confusion_list.append((cm[i,j], class_names[i], class_names[j]))
-    confusion_list.sort(reverse=True, key=lambda x: x[0])
-    for count, class1, class2 in confusion_list[:20]:
-        if count > 0:
-            print(f"  {class1} ↔ {class2}: {count} times")
-    print(f"\nGoal: Keep most confused pairs under 50 instances. Current max: {confusion_list[0][0] if confusion_list else 0}")
-
-    return predictions, predicted_classes, true_classes
-
-def evaluate_saved_model(model_path='best_cifar10_model.keras'):
+    for count, true_class, predicted_class in metrics['confused_pairs']:
+        print(f"  {class_names[true_class]} → {class_names[predicted_class]}: {count} times")
+    max_confused = metrics['confused_pairs'][0][0] if metrics['confused_pairs'] else 0
+    print(f"\nGoal: Keep most confused pairs under 50 instances. Current max: {max_confused}")
+
+    return cm, metrics
+
+def evaluate_saved_model(model_path='best_cifar10_model.keras', tta_views=1):
     """Evaluate a saved model"""
     print(f"Loading model from {model_path}...")
     print(f"Current working directory: {os.getcwd()}")
@@ -408,16 +575,14 @@ def evaluate_saved_model(model_path='best_cifar10_model.keras'):
         return None
 
     # Load test data
-    (_, _), (x_test, y_test) = cifar10.load_data()
-    x_test = x_test.astype('float32') / 255.0
-    y_test = to_categorical(y_test, 10)
+    (_, _), (x_test, y_test) = load_cifar10()
 
     # Evaluate
     test_loss, test_accuracy = model.evaluate(x_test, y_test, verbose=0)
     print(".4f")
 
     # Comprehensive evaluation
-    evaluate_model_comprehensive(model, x_test, y_test)
+    evaluate_model_comprehensive(model, x_test, y_test, tta_views=tta_views)
 
     return model
 
@@ -434,26 +599,97 @@ if __name__ == "__main__":
         print("⚠️ No GPU detected, training on CPU")
 
     import sys
-    if len(sys.argv) > 1 and sys.argv[1] == 'evaluate':
+    import argparse
+    parser = argparse.ArgumentParser(description='Train or evaluate the CIFAR-10 model')
+    parser.add_argument('command', nargs='?', default='train', choices=['train', 'evaluate', 'benchmark_pipeline', 'benchmark_modes'])
+    parser.add_argument('model_path', nargs='?', default='best_cifar10_model.keras',
+                        help='model to evaluate')
+    parser.add_argument('--batch-size', type=int, default=128, help='batch size per worker')
+    parser.add_argument('--epochs', type=int, default=200)
+    parser.add_argument('--checkpoint-dir', default='checkpoints/cifar10',
+                        help='full-state checkpoints for resuming interrupted runs')
+    parser.add_argument('--fresh', action='store_true', help='ignore existing checkpoints and start at epoch 0')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='data-parallel training with this many local worker processes')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--mix', choices=['mixup', 'cutmix', 'both'], default=None,
+                        help='batched MixUp/CutMix in the input pipeline')
+    parser.add_argument('--mixup-alpha', type=float, default=0.2)
+    parser.add_argument('--cutmix-alpha', type=float, default=1.0)
+    parser.add_argument('--xla', action='store_true', help='XLA-compile the training step')
+    parser.add_argument('--bf16', action='store_true',
+                        help='bfloat16 mixed precision where the CPU supports it')
+    parser.add_argument('--hparams', default=None,
+                        help='JSON file of tuned hyperparameters (best_hyperparameters.json from hparam_search.py)')
+    parser.add_argument('--compress', action='store_true',
+                        help='prune and cluster the trained model with fine-tuning (see compress_model.py)')
+    parser.add_argument('--tta', type=int, default=1,
+                        help='evaluate with this many test-time augmented views per image')
+    args = parser.parse_args()
+    if args.compress and (args.workers > 1 or 'TF_CONFIG' in os.environ):
+        parser.error('--compress runs after single-process training; '
+                     'run compress_model.py on the saved model instead')
+
+    if args.command == 'benchmark_pipeline':
+        # Compare ImageDataGenerator and tf.data augmentation throughput
+        from cifar10_pipeline import benchmark_input_pipeline
+        (x_train, y_train), _ = load_and_preprocess_cifar10()
+        benchmark_input_pipeline(x_train, y_train, batch_size=args.batch_size)
+    elif args.command == 'benchmark_modes':
+        # Step time and accuracy of float32 vs bfloat16 vs XLA
+        compare_training_modes(batch_size=args.batch_size, seed=args.seed)
+    elif args.command == 'evaluate':
         # Evaluate saved model
-        if len(sys.argv) > 2:
-            model_path = sys.argv[2]
-        else:
-            model_path = 'best_cifar10_model.keras'
-        evaluate_saved_model(model_path)
+        evaluate_saved_model(args.model_path, tta_views=args.tta)
+    elif 'TF_CONFIG' in os.environ:
+        # One worker of a multi-worker cluster
+        from distributed_training import train_multi_worker
+        train_multi_worker(
+            batch_size=args.batch_size,
+            seed=args.seed,
+            epochs=args.epochs,
+            mix=args.mix,
+            mixup_alpha=args.mixup_alpha,
+            cutmix_alpha=args.cutmix_alpha,
+            jit_compile=args.xla,
+            mixed_precision=args.bf16,
+            checkpoint_dir=args.checkpoint_dir,
+            resume=not args.fresh,
+            hparams=json.load(open(args.hparams)) if args.hparams else None
+        )
+    elif args.workers > 1:
+        # Spawn local workers that each run this script with TF_CONFIG set
+        from distributed_training import launch_local_workers
+        sys.exit(launch_local_workers(args.workers, sys.argv[1:]))
     else:
         # Train new model
         use_enhanced = True  # Enable enhanced architecture
-        model, history = train_high_accuracy_model(use_enhanced=use_enhanced)
+        model, history = train_high_accuracy_model(
+            use_enhanced=use_enhanced,
+            batch_size=args.batch_size,
+            seed=args.seed,
+            mix=args.mix,
+            mixup_alpha=args.mixup_alpha,
+            cutmix_alpha=args.cutmix_alpha,
+            jit_compile=args.xla,
+            mixed_precision=args.bf16,
+            epochs=args.epochs,
+            checkpoint_dir=args.checkpoint_dir,
+            resume=not args.fresh,
+            hparams=json.load(open(args.hparams)) if args.hparams else None
+        )
 
         # Load test data for comprehensive evaluation
-        (_, _), (x_test, y_test) = cifar10.load_data()
-        x_test = x_test.astype('float32') / 255.0
-        y_test = to_categorical(y_test, 10)
+        (_, _), (x_test, y_test) = load_cifar10()
 
         # Comprehensive evaluation
         evaluate_model_comprehensive(model, x_test, y_test)
 
+        if args.compress:
+            # Smaller, faster model for the browser and the backend
+            from compress_model import compress_model
+            compress_model(model, batch_size=args.batch_size)
+
         print("\n🎉 CIFAR-10 High-Accuracy Training Complete!")
         print("Next step: Convert the .h5 model to TensorFlow.js format")
         print("Run: python convert_model.py (update path to new model)")
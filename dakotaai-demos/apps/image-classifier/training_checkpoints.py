@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+import tensorflow as tf
+from tensorflow.keras import callbacks
+import numpy as np
+import os
+import glob
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+# Counters each stateful callback needs to continue where it left off
+CALLBACK_STATE = {
+    callbacks.EarlyStopping: ('wait', 'best', 'best_epoch', 'stopped_epoch'),
+    callbacks.ReduceLROnPlateau: ('wait', 'best', 'cooldown_counter'),
+    callbacks.ModelCheckpoint: ('best',)
+}
+
+def to_json_value(value):
+    """Plain Python number for numpy scalars so the state can be written as JSON"""
+    return value.item() if hasattr(value, 'item') else value
+
+def write_atomic(path, write):
+    """Write a file through a temporary name so readers never see a partial one"""
+    with open(path + '.tmp', 'wb') as f:
+        write(f)
+    os.replace(path + '.tmp', path)
+
+class ResumableCheckpoint(callbacks.Callback):
+    """Periodic full training-state checkpoints with automatic resume
+
+    Each checkpoint holds the model weights, every optimizer variable
+    (iteration count, learning rate, momentum slots), the epoch, and the
+    counters of EarlyStopping, ReduceLROnPlateau and ModelCheckpoint. At
+    the end of an epoch the variables are copied to host memory, which
+    takes milliseconds, and a background thread writes them to disk while
+    the next epoch trains. The 'latest' pointer only moves once a
+    checkpoint is completely written.
+
+    Place this callback after the callbacks it tracks so their
+    on_train_begin resets run before the saved state is restored.
+
+    Custom training loops use restore() and save() directly, passing
+    their optimizer and their own counters as loop_state.
+    """
+
+    def __init__(self, directory='checkpoints/cifar10', tracked_callbacks=(), every_epochs=1, max_to_keep=2):
+        super().__init__()
+        self.directory = directory
+        self.tracked_callbacks = [c for c in tracked_callbacks if type(c) in CALLBACK_STATE]
+        self.every_epochs = every_epochs
+        self.max_to_keep = max_to_keep
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint')
+        self._pending_write = None
+        self._pending_state = None
+        self.loop_state = {}
+
+    def _variables(self, model, optimizer=None):
+        # Optimizer slots must exist before they can be saved or restored
+        optimizer = optimizer or model.optimizer
+        optimizer.build(model.trainable_variables)
+        return list(model.weights), list(optimizer.variables)
+
+    def latest(self):
+        """Path of the newest complete checkpoint, or None"""
+        pointer = os.path.join(self.directory, 'latest')
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer) as f:
+            return os.path.join(self.directory, f.read().strip())
+
+    def restore(self, model, optimizer=None):
+        """Load the latest complete checkpoint into model, returning the epoch to resume from
+
+        optimizer defaults to model.optimizer. The saved loop_state is
+        put back in self.loop_state.
+        """
+        latest = self.latest()
+        if latest is None:
+            return 0
+
+        optimizer = optimizer or model.optimizer
+        model_variables, optimizer_variables = self._variables(model, optimizer)
+        with np.load(latest + '.npz') as arrays:
+            for prefix, variables in (('model', model_variables), ('optimizer', optimizer_variables)):
+                for i, variable in enumerate(variables):
+                    value = arrays[f'{prefix}_{i}']
+                    if tuple(value.shape) != tuple(variable.shape):
+                        raise ValueError(f"Checkpoint {latest} does not match this model "
+                                         f"({variable.path}: {value.shape} vs {variable.shape})")
+                    variable.assign(value)
+
+        with open(latest + '.json') as f:
+            state = json.load(f)
+        self._pending_state = state['callbacks']
+        self.loop_state = state.get('loop', {})
+
+        print(f"♻️ Resuming from {latest} at epoch {state['epoch']} "
+              f"(learning rate {float(optimizer.learning_rate.numpy()):.5f})")
+        return state['epoch']
+
+    def on_train_begin(self, logs=None):
+        if not self._pending_state:
+            return
+
+        for callback in self.tracked_callbacks:
+            saved = self._pending_state.get(type(callback).__name__, {})
+            for name in CALLBACK_STATE[type(callback)]:
+                if name in saved:
+                    setattr(callback, name, saved[name])
+
+            # EarlyStopping keeps its best weights in memory; the best-only
+            # ModelCheckpoint file holds the same weights
+            if isinstance(callback, callbacks.EarlyStopping) and callback.restore_best_weights:
+                for other in self.tracked_callbacks:
+                    if isinstance(other, callbacks.ModelCheckpoint) and os.path.exists(other.filepath):
+                        best_model = tf.keras.models.load_model(other.filepath, compile=False)
+                        callback.best_weights = best_model.get_weights()
+
+        self._pending_state = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        if (epoch + 1) % self.every_epochs:
+            return
+        self.save(epoch + 1, self.model)
+
+    def save(self, epoch, model, optimizer=None, loop_state=None):
+        """Checkpoint the state after epoch epochs, writing it in the background"""
+        # Snapshot on the training thread so the written state is consistent
+        model_variables, optimizer_variables = self._variables(model, optimizer)
+        arrays = {f'model_{i}': np.array(v) for i, v in enumerate(model_variables)}
+        arrays.update({f'optimizer_{i}': np.array(v) for i, v in enumerate(optimizer_variables)})
+        state = {
+            'epoch': epoch,
+            'callbacks': {
+                type(callback).__name__: {name: to_json_value(getattr(callback, name, None))
+                                          for name in CALLBACK_STATE[type(callback)]}
+                for callback in self.tracked_callbacks
+            },
+            'loop': {name: to_json_value(value) for name, value in (loop_state or {}).items()}
+        }
+
+        # At most one write in flight; a slow disk delays training rather than piling up snapshots
+        self.wait()
+        self._pending_write = self._writer.submit(self._write, f'ckpt-{epoch}', arrays, state)
+
+    def _write(self, name, arrays, state):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        write_atomic(path + '.npz', lambda f: np.savez(f, **arrays))
+        write_atomic(path + '.json', lambda f: f.write(json.dumps(state).encode()))
+        write_atomic(os.path.join(self.directory, 'latest'), lambda f: f.write(name.encode()))
+
+        # Rotate out the oldest checkpoints
+        names = sorted({os.path.splitext(os.path.basename(p))[0]
+                        for p in glob.glob(os.path.join(self.directory, 'ckpt-*.npz'))},
+                       key=lambda n: int(n.split('-')[1]))
+        for old in names[:-self.max_to_keep]:
+            for extension in ('.npz', '.json'):
+                old_path = os.path.join(self.directory, old + extension)
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+
+    def wait(self):
+        """Block until the checkpoint being written (if any) is on disk"""
+        if self._pending_write is not None:
+            self._pending_write.result()
+            self._pending_write = None
+
+    def on_train_end(self, logs=None):
+        self.wait()
+
+    def clear(self):
+        """Delete all checkpoints once a run has finished"""
+        self.wait()
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,802 @@
+#!/usr/bin/env python3
+"""
+Inference engine for the AI Image Classifier backend
+
+Loads the trained CIFAR-10 Keras model once, warms it up and runs the
+decode -> resize -> normalize -> predict path for uploaded images.
+Per-request latency is measured for every stage so the backend can
+report whether it stays inside the CPU latency budget.
+
+Concurrent requests can be grouped by the MicroBatcher so that one
+batched forward pass serves several waiting handlers.
+
+Preprocessing decodes into pooled, preallocated buffers: JPEGs are
+draft-decoded at reduced size, pasted into a uint8 buffer and
+normalized into a float32 buffer in place, so a request allocates
+almost nothing beyond the small resized image.
+
+Early-exit models (early_exit_model.py in the trainer) stop each image
+at the first exit classifier whose confidence reaches exit_threshold.
+
+With tta_views > 1 every image is expanded into that many flipped and
+shifted views that run in the same forward pass, and their logits are
+averaged (test-time augmentation, test_time_augmentation.py in the trainer).
+"""
+
+import os
+import sys
+import json
+import queue
+import tarfile
+import threading
+import time
+import logging
+import zipfile
+from collections import Counter, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from prediction_cache import PredictionCache, content_hash, model_fingerprint
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_TRAINER_DIR = os.path.join(_HERE, '..', 'dakotaai-demos', 'apps', 'image-classifier')
+
+# TTA, the TFLite runner and the early-exit forward pass come from the trainer,
+# so the backend serves exactly what its reports measure
+sys.path.append(_TRAINER_DIR)
+from test_time_augmentation import TTA_VIEWS, average_view_logits, tta_expand
+from quantize_model import TFLiteClassifier
+
+logger = logging.getLogger(__name__)
+
+# CIFAR-10 classes
+CIFAR_CLASSES = [
+    'Airplane', 'Automobile', 'Bird', 'Cat', 'Deer',
+    'Dog', 'Frog', 'Horse', 'Ship', 'Truck'
+]
+
+# Latency budget for a single classification on CPU
+LATENCY_BUDGET_MS = 20.0
+
+# Model files written by train_cifar10_model.py, in order of preference
+MODEL_CANDIDATES = [
+    os.path.join(_TRAINER_DIR, 'cifar10_high_accuracy_model.keras'),
+    os.path.join(_TRAINER_DIR, 'best_cifar10_model.keras'),
+    os.path.join(_TRAINER_DIR, 'cifar10_high_accuracy_model.h5'),
+    os.path.join(_HERE, 'cifar10_high_accuracy_model.keras'),
+    os.path.join(_HERE, 'cifar10_high_accuracy_model.h5'),
+]
+
+# Int8 models written by quantize_model.py
+TFLITE_CANDIDATES = [
+    os.path.join(_TRAINER_DIR, 'cifar10_int8.tflite'),
+    os.path.join(_HERE, 'cifar10_int8.tflite'),
+]
+
+
+def find_model_path(runtime='keras'):
+    """Return the model path from MODEL_PATH / TFLITE_MODEL_PATH or the first existing candidate."""
+    env_path = os.environ.get('TFLITE_MODEL_PATH' if runtime == 'tflite' else 'MODEL_PATH')
+    if env_path:
+        return env_path
+
+    for candidate in (TFLITE_CANDIDATES if runtime == 'tflite' else MODEL_CANDIDATES):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+class LatencyTracker:
+    """Keeps a rolling window of per-request latencies in milliseconds."""
+
+    def __init__(self, window=1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.total_requests = 0
+        self.over_budget = 0
+
+    def record(self, latency_ms):
+        with self._lock:
+            self._samples.append(latency_ms)
+            self.total_requests += 1
+            if latency_ms > LATENCY_BUDGET_MS:
+                self.over_budget += 1
+
+    def summary(self):
+        with self._lock:
+            samples = np.array(self._samples, dtype=np.float64)
+            total, over = self.total_requests, self.over_budget
+
+        if samples.size == 0:
+            return {'requests': total, 'budget_ms': LATENCY_BUDGET_MS}
+
+        return {
+            'requests': total,
+            'budget_ms': LATENCY_BUDGET_MS,
+            'over_budget': over,
+            'mean_ms': round(float(samples.mean()), 3),
+            'p50_ms': round(float(np.percentile(samples, 50)), 3),
+            'p95_ms': round(float(np.percentile(samples, 95)), 3),
+            'p99_ms': round(float(np.percentile(samples, 99)), 3),
+        }
+
+
+class PreprocessBuffers:
+    """
+    Preallocated buffers for one in-flight image: a uint8 RGBX buffer that a
+    PIL image is mapped onto, and the float32 model input
+    """
+
+    def __init__(self, input_shape):
+        height, width = input_shape[:2]
+        self.rgbx = np.zeros((height, width, 4), dtype=np.uint8)
+        self.pixels = np.zeros((height, width, 3), dtype=np.float32)
+
+        # PIL writes straight into self.rgbx when something is pasted onto this image
+        self.target = Image.frombuffer('RGBX', (width, height), self.rgbx, 'raw', 'RGBX', 0, 1)
+        self.target.readonly = 0
+
+
+class BufferPool:
+    """Hands out PreprocessBuffers to request workers and takes them back for reuse."""
+
+    def __init__(self, input_shape):
+        self.input_shape = input_shape
+        self.allocated = 0
+        self._free = queue.LifoQueue()
+
+    @contextmanager
+    def acquire(self):
+        try:
+            buffers = self._free.get_nowait()
+        except queue.Empty:
+            buffers = PreprocessBuffers(self.input_shape)
+            self.allocated += 1
+        try:
+            yield buffers
+        finally:
+            self._free.put(buffers)
+
+
+class MicroBatcher:
+    """
+    Collects single-image requests for up to max_wait_ms or max_batch_size
+    images, runs them as one batched forward pass and fans the results back
+    """
+
+    def __init__(self, engine, max_batch_size=32, max_wait_ms=2.0):
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_sizes = Counter()
+        self.queue_wait = LatencyTracker()
+        self._batch = np.zeros((engine.batch_buckets()[-1],) + engine.input_shape, dtype=np.float32)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, image_array):
+        """
+        Queue one preprocessed (H, W, C) image; the Future resolves to its probabilities.
+        The caller must keep image_array untouched until the Future is done.
+        """
+        future = Future()
+        self._queue.put((image_array, future, time.perf_counter()))
+        return future
+
+    def stop(self):
+        """Finish the batch in flight and stop the worker thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        """Gather more requests until the batch is full or the oldest one has waited long enough."""
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the stop marker back so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = self._collect(first)
+            started = time.perf_counter()
+            for _, _, queued_at in batch:
+                self.queue_wait.record((started - queued_at) * 1000)
+
+            # Copy the requests into the reusable batch buffer, zero-padded to a compiled bucket
+            size = len(batch)
+            bucket = self.engine.bucket_for(size)
+            for row, item in enumerate(batch):
+                self._batch[row] = item[0]
+            self._batch[size:bucket] = 0
+
+            try:
+                probabilities = self.engine.predict_probabilities(self._batch[:bucket])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batch_sizes[len(batch)] += 1
+            for (_, future, _), row in zip(batch, probabilities):
+                future.set_result(row)
+
+    def info(self):
+        batches = sum(self.batch_sizes.values())
+        images = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': batches,
+            'mean_batch_size': round(images / batches, 2) if batches else None,
+            'batch_size_histogram': {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            'queue_wait': self.queue_wait.summary()
+        }
+
+
+class InferenceEngine:
+    """
+    Wraps the trained model for low-latency single-image inference.
+    runtime='keras' runs the float32 Keras model, runtime='tflite' runs the
+    int8 model produced by quantize_model.py. tta_views > 1 averages each
+    prediction over that many test-time augmented views. For an early-exit
+    model, exit_threshold is the confidence at which an image leaves early.
+    """
+
+    def __init__(self, model_path=None, top_k=3, warmup_runs=5, jit_compile=True,
+                 max_batch_size=1, max_wait_ms=2.0, cache_size=0, cache_path=None,
+                 runtime='keras', tta_views=1, exit_threshold=0.9):
+        if runtime not in ('keras', 'tflite'):
+            raise ValueError(f"Unknown inference runtime: {runtime}")
+        if not 1 <= tta_views <= len(TTA_VIEWS):
+            raise ValueError(f"tta_views must be between 1 and {len(TTA_VIEWS)}, got {tta_views}")
+        self.runtime = runtime
+        self.tta_views = tta_views
+        self.exit_threshold = exit_threshold
+        self.early_exit = False
+        self.model_path = model_path or find_model_path(runtime)
+        self.top_k = top_k
+        self.warmup_runs = warmup_runs
+        self.jit_compile = jit_compile
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.cache_size = cache_size
+        self.cache_path = cache_path
+        self.batcher = None
+        self.buffers = None
+        self.cache = None
+        self.model = None
+        self.input_shape = None
+        self.load_time_ms = None
+        self.latency = LatencyTracker()
+        self._forward = None
+
+    @property
+    def ready(self):
+        return self._forward is not None
+
+    def load(self):
+        """Load the model once, build a traced forward pass and warm it up."""
+        if self.model_path is None or not os.path.exists(self.model_path):
+            candidates = TFLITE_CANDIDATES if self.runtime == 'tflite' else MODEL_CANDIDATES
+            raise FileNotFoundError(f"No trained CIFAR-10 model found (looked for: {self.model_path or candidates})")
+
+        start = time.perf_counter()
+        if self.runtime == 'tflite':
+            # TFLite kernels are not XLA-compiled
+            self.jit_compile = False
+            # One interpreter per batch bucket, so tensors are never resized at request time
+            self._forward = TFLiteClassifier(self.model_path,
+                                             batch_buckets=[b * self.tta_views for b in self.batch_buckets()])
+            self.input_shape = self._forward.input_shape
+        else:
+            import tensorflow as tf
+
+            self.model = tf.keras.models.load_model(self.model_path, compile=False)
+            self.input_shape = tuple(int(d) for d in self.model.input_shape[1:])
+            if len(self.model.outputs) > 1:
+                # Batches shrink stage by stage, which would recompile XLA programs constantly
+                self.early_exit = True
+                self.jit_compile = False
+                self._forward = self._build_early_exit_forward()
+            else:
+                self._forward = self._build_forward(self.jit_compile)
+        self.buffers = BufferPool(self.input_shape)
+        self.load_time_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Loaded model {self.model_path} in {self.load_time_ms:.0f} ms, input shape {self.input_shape}")
+
+        try:
+            self.warmup()
+        except Exception as e:
+            if not self.jit_compile:
+                self._forward = None
+                raise
+            logger.warning(f"XLA compilation failed, falling back to the plain graph: {str(e)}")
+            self.jit_compile = False
+            self._forward = self._build_forward(False)
+            self.warmup()
+
+        if self.max_batch_size > 1:
+            self.batcher = MicroBatcher(self, self.max_batch_size, self.max_wait_ms)
+            logger.info(f"Micro-batching enabled (up to {self.max_batch_size} images or {self.max_wait_ms} ms)")
+
+        if self.cache_size > 0:
+            # TTA and the exit threshold change the probabilities, so they are part of the cache namespace
+            model_key = model_fingerprint(self.model_path) + (f":tta{self.tta_views}" if self.tta_views > 1 else '')
+            if self.early_exit:
+                model_key += f":exit{self.exit_threshold}"
+            self.cache = PredictionCache(self.cache_size, self.cache_path, model_key)
+        return self
+
+    def shutdown(self):
+        if self.batcher is not None:
+            self.batcher.stop()
+            self.batcher = None
+        if self.cache is not None:
+            self.cache.close()
+
+    def _build_forward(self, jit_compile):
+        """Trace the model call once; this avoids the per-call overhead of model.predict."""
+        import tensorflow as tf
+
+        model = self.model
+        forward = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec((None,) + self.input_shape, tf.float32)],
+            jit_compile=jit_compile
+        )
+        return lambda batch: forward(batch).numpy()
+
+    def _build_early_exit_forward(self):
+        """
+        Run the early-exit model stage by stage in one traced graph; after each
+        stage the images whose exit is confident enough are finished and only
+        the rest of the batch continues. This is make_early_exit_forward from
+        the trainer, so the served graph is the one benchmark_early_exit measures.
+        """
+        import tensorflow as tf
+        from early_exit_model import make_early_exit_forward
+
+        forward = make_early_exit_forward(self.model)
+        threshold = tf.constant(self.exit_threshold, dtype=tf.float32)
+        return lambda batch: forward(batch, threshold)[0].numpy()
+
+    def batch_buckets(self):
+        """Batch sizes the forward pass is compiled for: powers of two up to max_batch_size."""
+        buckets = [1]
+        while buckets[-1] < self.max_batch_size:
+            buckets.append(min(buckets[-1] * 2, self.max_batch_size))
+        return buckets
+
+    def bucket_for(self, size):
+        """Smallest compiled batch bucket that fits size images."""
+        return next((bucket for bucket in self.batch_buckets() if bucket >= size), size)
+
+    def warmup(self):
+        """Run a few dummy forward passes so tracing and allocation happen before traffic."""
+        start = time.perf_counter()
+        for bucket in self.batch_buckets():
+            dummy = np.zeros((bucket,) + self.input_shape, dtype=np.float32)
+            for _ in range(self.warmup_runs):
+                self._run_forward(dummy)
+        logger.info(f"Warm-up complete ({self.warmup_runs} runs per batch bucket, {(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    def preprocess(self, image_bytes, buffers=None):
+        """
+        Decode, resize to the model input and normalize to float32 in [0, 1].
+
+        The result is written into buffers (a PreprocessBuffers from the pool)
+        and buffers.pixels is returned, so it is only valid while those
+        buffers are held.
+        """
+        if buffers is None:
+            buffers = PreprocessBuffers(self.input_shape)
+        height, width = self.input_shape[:2]
+
+        # BytesIO shares the uploaded bytes instead of copying them
+        image = Image.open(BytesIO(image_bytes))
+
+        # Let the JPEG decoder downscale by up to 8x while decoding large uploads
+        image.draft('RGB', (width, height))
+        # Alpha is dropped before resizing: Pillow resizes RGBA with premultiplied
+        # alpha, which darkens translucent pixels compared to the training data
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image = image.resize((width, height), Image.BILINEAR, reducing_gap=2.0)
+
+        # Paste writes into the uint8 buffer, then scale into the float32 buffer in place
+        buffers.target.paste(image.convert('RGB') if image.mode == 'L' else image)
+        np.multiply(buffers.rgbx[..., :3], np.float32(1.0 / 255.0), out=buffers.pixels)
+        return buffers.pixels
+
+    def predict_probabilities(self, batch):
+        """Run the forward pass on a preprocessed batch and return class probabilities."""
+        size = len(batch)
+        if self.jit_compile or self.runtime == 'tflite':
+            # XLA compiles one program per batch shape and TFLite keeps one
+            # interpreter per bucket, so pad up to a warmed-up bucket
+            bucket = self.bucket_for(size)
+            if bucket > size:
+                padding = np.zeros((bucket - size,) + batch.shape[1:], dtype=batch.dtype)
+                batch = np.concatenate([batch, padding])
+        return self._run_forward(batch)[:size]
+
+    def _run_forward(self, batch):
+        """Forward pass, expanded into tta_views views per image when TTA is enabled."""
+        if self.tta_views == 1:
+            return self._forward(batch)
+        return average_view_logits(self._forward(tta_expand(batch, self.tta_views)), self.tta_views)
+
+    def format_predictions(self, probabilities):
+        """Turn one probability vector into the top-k response entries."""
+        top_classes = np.argsort(probabilities)[-self.top_k:][::-1]
+        return [
+            {
+                'class_index': int(class_index),
+                'class_name': CIFAR_CLASSES[class_index],
+                'confidence': float(probabilities[class_index])
+            }
+            for class_index in top_classes
+        ]
+
+    def classify(self, image_bytes):
+        """Classify raw image bytes, returning top-k predictions and stage timings."""
+        if not self.ready:
+            raise RuntimeError("Inference engine is not loaded")
+
+        start = time.perf_counter()
+        cache_key = content_hash(image_bytes) if self.cache is not None else None
+        probabilities = self.cache.get(cache_key) if cache_key is not None else None
+        cache_hit = probabilities is not None
+
+        if cache_hit:
+            # Repeated upload: skip decode and inference entirely
+            preprocessed = inferred = time.perf_counter()
+        else:
+            with self.buffers.acquire() as buffers:
+                pixels = self.preprocess(image_bytes, buffers)
+                preprocessed = time.perf_counter()
+                if self.batcher is not None:
+                    probabilities = self.batcher.submit(pixels).result()
+                else:
+                    probabilities = self.predict_probabilities(pixels[np.newaxis])[0]
+                inferred = time.perf_counter()
+            if cache_key is not None:
+                self.cache.put(cache_key, probabilities)
+
+        predictions = self.format_predictions(probabilities)
+        total_ms = (inferred - start) * 1000
+        self.latency.record(total_ms)
+        if total_ms > LATENCY_BUDGET_MS:
+            logger.warning(f"Classification took {total_ms:.1f} ms (budget {LATENCY_BUDGET_MS:.0f} ms)")
+
+        timings = {
+            'preprocess_ms': round((preprocessed - start) * 1000, 3),
+            'inference_ms': round((inferred - preprocessed) * 1000, 3),
+            'total_ms': round(total_ms, 3),
+            'cache_hit': cache_hit
+        }
+        return predictions, timings
+
+    def classify_many(self, entries):
+        """
+        Classify an iterable of (name, image_bytes) entries in batches.
+
+        Yields one result dict per entry as soon as its batch finishes, so
+        callers can stream results back. Entries that fail to decode are
+        reported individually instead of failing the whole batch.
+        """
+        if not self.ready:
+            raise RuntimeError("Inference engine is not loaded")
+
+        chunk_size = self.batch_buckets()[-1]
+        chunk = np.zeros((chunk_size,) + self.input_shape, dtype=np.float32)
+        pending = []
+
+        def run_chunk():
+            probabilities = self.predict_probabilities(chunk[:self.bucket_for(len(pending))])
+            for (name, cache_key), row in zip(pending, probabilities):
+                if cache_key is not None:
+                    self.cache.put(cache_key, row)
+                yield self._entry_result(name, row, cache_hit=False)
+            pending.clear()
+
+        with self.buffers.acquire() as buffers:
+            for name, image_bytes in entries:
+                cache_key = content_hash(image_bytes) if self.cache is not None else None
+                cached = self.cache.get(cache_key) if cache_key is not None else None
+                if cached is not None:
+                    yield self._entry_result(name, cached, cache_hit=True)
+                    continue
+
+                try:
+                    chunk[len(pending)] = self.preprocess(image_bytes, buffers)
+                except Exception as e:
+                    yield {'filename': name, 'success': False, 'error': 'Could not decode image', 'details': str(e)}
+                    continue
+
+                pending.append((name, cache_key))
+                if len(pending) == chunk_size:
+                    yield from run_chunk()
+
+            if pending:
+                chunk[len(pending):self.bucket_for(len(pending))] = 0
+                yield from run_chunk()
+
+    def _entry_result(self, name, probabilities, cache_hit):
+        predictions = self.format_predictions(probabilities)
+        return {
+            'filename': name,
+            'success': True,
+            'predictions': predictions,
+            'top_prediction': {
+                'class': predictions[0]['class_name'],
+                'confidence': predictions[0]['confidence']
+            },
+            'cache_hit': cache_hit
+        }
+
+    def info(self):
+        """Describe the loaded model for the /model_info endpoint."""
+        return {
+            'model_path': self.model_path,
+            'runtime': self.runtime,
+            'loaded': self.ready,
+            'input_shape': list(self.input_shape) if self.input_shape else None,
+            'jit_compile': self.jit_compile,
+            'tta_views': self.tta_views,
+            'exit_threshold': self.exit_threshold if self.early_exit else None,
+            'parameters': int(self.model.count_params()) if self.model is not None else None,
+            'load_time_ms': round(self.load_time_ms, 1) if self.load_time_ms else None,
+            'latency': self.latency.summary(),
+            'preprocess_buffers': self.buffers.allocated if self.buffers is not None else 0,
+            'batching': self.batcher.info() if self.batcher is not None else None,
+            'cache': self.cache.info() if self.cache is not None else None
+        }
+
+
+# Archive members that are never images
+_SKIPPED_PREFIXES = ('__MACOSX/', '.')
+
+# Upload limits, so a small archive cannot expand into gigabytes (zip bomb):
+# the whole request body, a single image and everything extracted from one upload
+MB = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_MB', 100)) * MB
+MAX_IMAGE_BYTES = int(os.environ.get('MAX_IMAGE_MB', 20)) * MB
+MAX_EXTRACTED_BYTES = int(os.environ.get('MAX_EXTRACTED_MB', 1024)) * MB
+
+
+class UploadTooLarge(ValueError):
+    """An upload is over the size limits; the backends answer 413."""
+
+
+def _read_bounded(stream, name, max_image_bytes):
+    """Read one file, but never more than max_image_bytes whatever its header claims"""
+    data = stream.read(max_image_bytes + 1)
+    if len(data) > max_image_bytes:
+        raise UploadTooLarge(f"{name} is larger than {max_image_bytes // MB} MB")
+    return data
+
+
+def iter_upload_entries(filename, fileobj, max_entries=10000, max_image_bytes=MAX_IMAGE_BYTES,
+                        max_extracted_bytes=MAX_EXTRACTED_BYTES, read=True):
+    """
+    Yield (name, bytes) for an uploaded file: every member of a zip or tar
+    archive, or the file itself. Members are read one at a time so the
+    archive is never fully extracted into memory.
+
+    A member's size is checked against max_image_bytes before it is read
+    and again while reading, since archive headers can lie, and an upload
+    may not extract to more than max_extracted_bytes; oversized uploads
+    raise UploadTooLarge. read=False only checks the headers and yields
+    (name, None).
+    """
+    count = 0
+    extracted = 0
+
+    def keep(name):
+        base = os.path.basename(name)
+        return not name.startswith(_SKIPPED_PREFIXES) and not base.startswith('.')
+
+    def admit(name, size):
+        nonlocal count
+        count += 1
+        if count > max_entries:
+            raise ValueError(f"Archive has more than {max_entries} entries")
+        if size > max_image_bytes:
+            raise UploadTooLarge(f"{name} is larger than {max_image_bytes // MB} MB")
+        if extracted + size > max_extracted_bytes:
+            raise UploadTooLarge(f"{filename} extracts to more than {max_extracted_bytes // MB} MB")
+
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not keep(info.filename):
+                    continue
+                admit(info.filename, info.file_size)
+                data = None
+                if read:
+                    with archive.open(info) as member:
+                        data = _read_bounded(member, info.filename, max_image_bytes)
+                extracted += info.file_size if data is None else len(data)
+                yield f"{filename}/{info.filename}", data
+        return
+
+    fileobj.seek(0)
+    try:
+        archive = tarfile.open(fileobj=fileobj, mode='r|*')
+    except tarfile.TarError:
+        fileobj.seek(0, os.SEEK_END)
+        admit(filename, fileobj.tell())
+        fileobj.seek(0)
+        yield filename, _read_bounded(fileobj, filename, max_image_bytes) if read else None
+        return
+
+    with archive:
+        for member in archive:
+            if not member.isfile() or not keep(member.name):
+                continue
+            admit(member.name, member.size)
+            data = _read_bounded(archive.extractfile(member), member.name, max_image_bytes) if read else None
+            extracted += member.size if data is None else len(data)
+            yield f"{filename}/{member.name}", data
+
+
+def check_uploads(uploads):
+    """
+    Check (filename, fileobj) uploads against the size limits from their
+    archive headers, before any member is read, so an oversized upload is
+    answered with an error status instead of a truncated result stream
+    """
+    for filename, fileobj in uploads:
+        for _ in iter_upload_entries(filename, fileobj, read=False):
+            pass
+
+
+def batch_result_lines(engine, entries):
+    """
+    JSON-lines body streamed by /classify_batch: one line per image as its
+    batch finishes, then a summary line
+    """
+    start = time.perf_counter()
+    images = failed = 0
+    try:
+        for result in engine.classify_many(entries):
+            images += 1
+            failed += not result['success']
+            yield json.dumps(result) + '\n'
+    except Exception as e:
+        logger.error(f"Batch classification stopped: {str(e)}")
+        yield json.dumps({'success': False, 'error': 'Batch classification stopped', 'details': str(e)}) + '\n'
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    yield json.dumps({'summary': {
+        'images': images,
+        'failed': failed,
+        'elapsed_ms': round(elapsed_ms, 1),
+        'images_per_sec': round(images / (elapsed_ms / 1000), 1) if elapsed_ms > 0 else None
+    }}) + '\n'
+
+
+def engine_from_env():
+    """
+    Build an InferenceEngine from environment variables shared by the Flask
+    and ASGI backends: BATCH_SIZE > 1 enables micro-batching,
+    PREDICTION_CACHE_SIZE=0 disables the prediction cache,
+    INFERENCE_RUNTIME=tflite serves the int8 model, TTA_VIEWS > 1
+    enables test-time augmentation and EXIT_THRESHOLD sets the confidence
+    at which an early-exit model answers early
+    """
+    return InferenceEngine(
+        max_batch_size=int(os.environ.get('BATCH_SIZE', 16)),
+        max_wait_ms=float(os.environ.get('BATCH_WAIT_MS', 1.0)),
+        cache_size=int(os.environ.get('PREDICTION_CACHE_SIZE', 4096)),
+        cache_path=os.environ.get('PREDICTION_CACHE_PATH'),
+        runtime=os.environ.get('INFERENCE_RUNTIME', 'keras'),
+        tta_views=int(os.environ.get('TTA_VIEWS', 1)),
+        exit_threshold=float(os.environ.get('EXIT_THRESHOLD', 0.9))
+    )
+
+
+def classification_response(engine, predictions, timings):
+    """JSON body returned by /classify."""
+    return {
+        'success': True,
+        'predictions': predictions,
+        'top_prediction': {
+            'class': CIFAR_CLASSES[predictions[0]['class_index']],
+            'confidence': predictions[0]['confidence']
+        },
+        'model_info': {
+            'architecture': 'Residual CNN with Squeeze-Excitation',
+            'trained_on': 'CIFAR-10',
+            'input_size': 'x'.join(str(d) for d in engine.input_shape),
+            'classes': len(CIFAR_CLASSES)
+        },
+        'timings': timings
+    }
+
+
+def model_info_response(engine):
+    """JSON body returned by /model_info."""
+    return {
+        'model_name': 'CIFAR-10 Image Classifier',
+        'architecture': 'Residual CNN with Squeeze-Excitation',
+        'trained_on': 'CIFAR-10',
+        'num_classes': 10,
+        'classes': CIFAR_CLASSES,
+        'input_shape': list(engine.input_shape) if engine.input_shape else None,
+        'framework': 'TensorFlow/Keras',
+        'features': [
+            'Residual Blocks',
+            'Squeeze-Excitation',
+            'Data Augmentation',
+            'Dropout Regularization',
+            'Batch Normalization'
+        ],
+        'engine': engine.info()
+    }
+
+def benchmark_batching(model_path=None, batch_sizes=(1, 4, 8, 16, 32), clients=32, requests_per_client=20):
+    """Measure throughput and latency percentiles of the micro-batcher under concurrent load."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    results = []
+    for max_batch_size in batch_sizes:
+        # With max_batch_size=1 there is no batcher and every request runs its own forward pass
+        engine = InferenceEngine(model_path, max_batch_size=max_batch_size, warmup_runs=2)
+        engine.load()
+        image = np.random.rand(*engine.input_shape).astype(np.float32)
+
+        def client(_):
+            latencies = []
+            for _ in range(requests_per_client):
+                start = time.perf_counter()
+                if engine.batcher is not None:
+                    engine.batcher.submit(image).result()
+                else:
+                    engine.predict_probabilities(image[np.newaxis])
+                latencies.append((time.perf_counter() - start) * 1000)
+            return latencies
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            latencies = np.concatenate([np.array(l) for l in pool.map(client, range(clients))])
+        elapsed = time.perf_counter() - start
+        engine.shutdown()
+
+        results.append({
+            'max_batch_size': max_batch_size,
+            'images_per_sec': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+            'p99_ms': round(float(np.percentile(latencies, 99)), 2)
+        })
+        print(f"batch<={max_batch_size:3d}: {results[-1]['images_per_sec']:8.1f} img/s, "
+              f"p50 {results[-1]['p50_ms']:7.2f} ms, p99 {results[-1]['p99_ms']:7.2f} ms")
+    return results
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    print("Micro-batching benchmark")
+    print("=" * 50)
+    benchmark_batching()
@@ -3,19 +3,24 @@
 AI Image Classifier Demo Backend
 Based on the transfer-image-classifier repository
 
-This script provides a Flask API for image classification using transfer learning.
-For demonstration purposes, this is a simplified version showing the architecture.
+This script provides a Flask API for image classification using the trained
+CIFAR-10 model. The model is loaded and warmed up once at startup by the
+inference engine in classifier_engine.py.
+
+This Flask server is meant for local development; image_classifier_asgi.py
+serves the same API asynchronously for production traffic.
 """
 
-import numpy as np
 import os
-from flask import Flask, request, jsonify
+import shutil
+import tempfile
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import cv2
-import base64
-from io import BytesIO
-from PIL import Image
 import logging
+from werkzeug.exceptions import RequestEntityTooLarge
+from classifier_engine import (MB, MAX_UPLOAD_BYTES, UploadTooLarge, batch_result_lines, check_uploads,
+                               classification_response, engine_from_env, iter_upload_entries,
+                               model_info_response)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -23,12 +28,15 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+# Werkzeug answers 413 for larger request bodies, with or without Content-Length
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 
-# CIFAR-10 classes
-CIFAR_CLASSES = [
-    'Airplane', 'Automobile', 'Bird', 'Cat', 'Deer',
-    'Dog', 'Frog', 'Horse', 'Ship', 'Truck'
-]
+# Load the model once at startup
+engine = engine_from_env()
+try:
+    engine.load()
+except Exception as e:
+    logger.error(f"Model could not be loaded, /classify will be unavailable: {str(e)}")
 
 @app.route('/')
 def home():
@@ -37,17 +45,23 @@ def home():
     <h1>AI Image Classifier Backend</h1>
     <p>This is the backend API for the AI Image Classifier demo.</p>
     <p>Upload an image to /classify to get predictions.</p>
+    <p>Upload many images or a zip/tar archive to /classify_batch for JSON-lines results.</p>
     """
 
 @app.route('/classify', methods=['POST'])
 def classify_image():
     """
-    Classify uploaded image using transfer learning model.
+    Classify uploaded image with the trained CIFAR-10 model.
 
-    For this demo version, returns mock predictions.
-    In production, this would use the actual TensorFlow model.
+    Returns the top 3 predictions along with per-stage latency timings.
     """
     try:
+        if not engine.ready:
+            return jsonify({
+                'success': False,
+                'error': 'Model not loaded'
+            }), 503
+
         # Get uploaded file
         if 'file' not in request.files:
             return jsonify({'error': 'No file uploaded'}), 400
@@ -58,66 +72,15 @@ def classify_image():
 
         # Read and process image
         logger.info(f"Processing image: {file.filename}")
+        predictions, timings = engine.classify(file.read())
 
-        # In a real implementation, load the image and process it:
-        # image = Image.open(BytesIO(file.read()))
-        # image = image.resize((224, 224))
-        # image_array = np.array(image) / 255.0
-
-        # Load model and predict:
-        # predictions = model.predict(np.expand_dims(image_array, axis=0))
-        # top_classes = predictions.argsort()[0][-3:][::-1]
-        # confidences = predictions[0][top_classes]
-
-        # For demo, simulate predictions
-        import random
-        top_class = random.randint(0, 9)
-        confidence = random.uniform(0.75, 0.95)
-
-        # Create mock predictions for top 3
-        predictions = []
-        used_classes = {top_class}
-
-        # Add top prediction
-        predictions.append({
-            'class_index': top_class,
-            'class_name': CIFAR_CLASSES[top_class],
-            'confidence': float(confidence)
-        })
-
-        # Add 2 more predictions
-        while len(predictions) < 3:
-            rand_class = random.randint(0, 9)
-            if rand_class not in used_classes:
-                predictions.append({
-                    'class_index': rand_class,
-                    'class_name': CIFAR_CLASSES[rand_class],
-                    'confidence': float(random.uniform(0.1, confidence - 0.1))
-                })
-                used_classes.add(rand_class)
-
-        # Sort by confidence
-        predictions.sort(key=lambda x: x['confidence'], reverse=True)
-
-        response = {
-            'success': True,
-            'predictions': predictions,
-            'top_prediction': {
-                'class': CIFAR_CLASSES[predictions[0]['class_index']],
-                'confidence': predictions[0]['confidence']
-            },
-            'model_info': {
-                'architecture': 'VGG16',
-                'base_model': 'VGG16 (pre-trained on ImageNet)',
-                'fine_tuned_dataset': 'CIFAR-10',
-                'input_size': '224x224x3',
-                'classes': len(CIFAR_CLASSES)
-            }
-        }
+        response = classification_response(engine, predictions, timings)
 
         logger.info(f"Classification complete: {response['top_prediction']}")
         return jsonify(response)
 
+    except RequestEntityTooLarge as e:
+        return upload_too_large(e)
     except Exception as e:
         logger.error(f"Error classifying image: {str(e)}")
         return jsonify({
@@ -126,28 +89,69 @@ def classify_image():
             'details': str(e)
         }), 500
 
+@app.route('/classify_batch', methods=['POST'])
+def classify_batch():
+    """
+    Classify many uploaded images, or the images inside zip/tar archives.
+
+    Files are sent as repeated 'files' (or 'file') form fields. Results are
+    streamed back as JSON lines while batches finish, ending with a summary.
+    """
+    if not engine.ready:
+        return jsonify({
+            'success': False,
+            'error': 'Model not loaded'
+        }), 503
+
+    files = request.files.getlist('files') + request.files.getlist('file')
+    if not files:
+        return jsonify({'error': 'No files uploaded'}), 400
+
+    logger.info(f"Processing batch of {len(files)} uploaded file(s)")
+
+    # Flask closes the uploaded files when the view returns, before the
+    # response has streamed, so keep our own spooled copies
+    uploads = []
+    for file in files:
+        spooled = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        shutil.copyfileobj(file.stream, spooled)
+        uploads.append((file.filename, spooled))
+
+    try:
+        check_uploads(uploads)
+    except Exception as e:
+        for _, spooled in uploads:
+            spooled.close()
+        if isinstance(e, UploadTooLarge):
+            return upload_too_large(e)
+        return jsonify({'success': False, 'error': 'Invalid upload', 'details': str(e)}), 400
+
+    def generate():
+        def entries():
+            for filename, spooled in uploads:
+                yield from iter_upload_entries(filename, spooled)
+
+        try:
+            yield from batch_result_lines(engine, entries())
+        finally:
+            for _, spooled in uploads:
+                spooled.close()
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    """JSON 413 for request bodies over MAX_UPLOAD_BYTES and archives over the extraction limits."""
+    details = str(e) if isinstance(e, UploadTooLarge) else f"Request body is larger than {MAX_UPLOAD_BYTES // MB} MB"
+    return jsonify({'success': False, 'error': 'Upload too large', 'details': details}), 413
+
 @app.route('/model_info')
 def get_model_info():
     """Get information about the classification model."""
-    return jsonify({
-        'model_name': 'Transfer Learning Image Classifier',
-        'base_model': 'VGG16',
-        'pre_trained_on': 'ImageNet',
-        'fine_tuned_on': 'CIFAR-10',
-        'num_classes': 10,
-        'classes': CIFAR_CLASSES,
-        'input_shape': [224, 224, 3],
-        'framework': 'TensorFlow/Keras',
-        'features': [
-            'Transfer Learning',
-            'Fine-tuning',
-            'Data Augmentation',
-            'Dropout Regularization',
-            'Batch Normalization'
-        ]
-    })
+    return jsonify(model_info_response(engine))
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     logger.info(f"Starting AI Image Classifier backend on port {port}")
-    app.run(host='0.0.0.0', port=port, debug=True)
+    # The debug reloader would load the model twice, so it is opt-in
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+AI Image Classifier ASGI Backend
+
+Serves the same API as image_classifier.py (/, /classify, /classify_batch,
+/model_info) with async request handling. Uploads are read on the event loop while
+the CPU-bound classification runs on a bounded thread pool, so slow
+clients never block inference. When more than MAX_PENDING requests
+are in flight new ones are rejected with 429 instead of queueing
+without limit. Request bodies over MAX_UPLOAD_MB and archives that
+extract past the engine's limits are rejected with 413.
+
+Run with:
+    python image_classifier_asgi.py               # WEB_CONCURRENCY worker processes
+    uvicorn image_classifier_asgi:app --workers 4
+"""
+
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import HTMLResponse, JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from classifier_engine import (MB, MAX_UPLOAD_BYTES, UploadTooLarge, batch_result_lines, check_uploads,
+                               classification_response, engine_from_env, iter_upload_entries,
+                               model_info_response)
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Threads running engine.classify; enough to fill a micro-batch
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', os.environ.get('BATCH_SIZE', 16)))
+
+# Requests allowed in flight (uploading, queued or classifying) before answering 429
+MAX_PENDING = int(os.environ.get('MAX_PENDING', 256))
+
+# Files accepted in one /classify_batch form (archives count as one file)
+MAX_BATCH_FILES = int(os.environ.get('MAX_BATCH_FILES', 1000))
+
+
+class ServerState:
+    """Per-process engine, executor and in-flight accounting."""
+
+    def __init__(self):
+        self.engine = None
+        self.executor = None
+        self.pending = 0
+        self.rejected = 0
+        self.accepting = False
+
+
+state = ServerState()
+
+
+class BodySizeLimitMiddleware:
+    """
+    Answer 413 for request bodies over max_bytes: up front from
+    Content-Length, or once a chunked body has streamed past the limit.
+    """
+
+    def __init__(self, app, max_bytes=MAX_UPLOAD_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        error = UploadTooLarge(f"Request body is larger than {self.max_bytes // MB} MB")
+        length = dict(scope['headers']).get(b'content-length', b'')
+        if length.isdigit() and int(length) > self.max_bytes:
+            await upload_too_large(error)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            received += len(message.get('body', b''))
+            if received > self.max_bytes:
+                raise error
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def upload_too_large(e):
+    """JSON 413 for oversized request bodies and archives."""
+    return JSONResponse({'success': False, 'error': 'Upload too large', 'details': str(e)}, status_code=413)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Load the model when the worker starts and drain inference work on shutdown."""
+    state.engine = engine_from_env()
+    try:
+        state.engine.load()
+    except Exception as e:
+        logger.error(f"Model could not be loaded, /classify will be unavailable: {str(e)}")
+    state.executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix='inference')
+    state.accepting = True
+    logger.info(f"Worker {os.getpid()} ready ({INFERENCE_THREADS} inference threads, max {MAX_PENDING} pending)")
+
+    try:
+        yield
+    finally:
+        # The server has stopped accepting connections and waited for open
+        # requests; finish anything still on the executor, then release the model
+        state.accepting = False
+        logger.info(f"Worker {os.getpid()} shutting down, {state.pending} requests pending")
+        state.executor.shutdown(wait=True)
+        state.engine.shutdown()
+
+
+async def home(request):
+    """Home page with demo information."""
+    return HTMLResponse("""
+    <h1>AI Image Classifier Backend</h1>
+    <p>This is the backend API for the AI Image Classifier demo.</p>
+    <p>Upload an image to /classify to get predictions.</p>
+    <p>Upload many images or a zip/tar archive to /classify_batch for JSON-lines results.</p>
+    """)
+
+
+async def classify_image(request):
+    """
+    Classify uploaded image with the trained CIFAR-10 model.
+
+    Returns the top 3 predictions along with per-stage latency timings.
+    """
+    if not state.accepting or not state.engine.ready:
+        return JSONResponse({'success': False, 'error': 'Model not loaded'}, status_code=503)
+
+    # Backpressure: reject instead of letting the queue grow without bound
+    if state.pending >= MAX_PENDING:
+        state.rejected += 1
+        return JSONResponse({'success': False, 'error': 'Server busy, retry shortly'},
+                            status_code=429, headers={'Retry-After': '1'})
+
+    state.pending += 1
+    try:
+        form = await request.form()
+        file = form.get('file')
+        if file is None or isinstance(file, str):
+            return JSONResponse({'error': 'No file uploaded'}, status_code=400)
+        if not file.filename:
+            return JSONResponse({'error': 'No file selected'}, status_code=400)
+
+        logger.info(f"Processing image: {file.filename}")
+        image_bytes = await file.read()
+
+        loop = asyncio.get_running_loop()
+        predictions, timings = await loop.run_in_executor(state.executor, state.engine.classify, image_bytes)
+
+        response = classification_response(state.engine, predictions, timings)
+        logger.info(f"Classification complete: {response['top_prediction']}")
+        return JSONResponse(response)
+
+    except UploadTooLarge as e:
+        return upload_too_large(e)
+    except Exception as e:
+        logger.error(f"Error classifying image: {str(e)}")
+        return JSONResponse({
+            'success': False,
+            'error': 'Failed to classify image',
+            'details': str(e)
+        }, status_code=500)
+    finally:
+        state.pending -= 1
+
+
+async def classify_batch(request):
+    """
+    Classify many uploaded images, or the images inside zip/tar archives.
+
+    Results are streamed back as JSON lines while batches finish, ending with
+    a summary line. Decoding and inference run on the inference executor.
+    """
+    if not state.accepting or not state.engine.ready:
+        return JSONResponse({'success': False, 'error': 'Model not loaded'}, status_code=503)
+
+    if state.pending >= MAX_PENDING:
+        state.rejected += 1
+        return JSONResponse({'success': False, 'error': 'Server busy, retry shortly'},
+                            status_code=429, headers={'Retry-After': '1'})
+
+    state.pending += 1
+    try:
+        form = await request.form(max_files=MAX_BATCH_FILES)
+    except UploadTooLarge as e:
+        state.pending -= 1
+        return upload_too_large(e)
+    except Exception:
+        state.pending -= 1
+        raise
+
+    files = [f for f in form.getlist('files') + form.getlist('file') if not isinstance(f, str)]
+    if not files:
+        state.pending -= 1
+        await form.close()
+        return JSONResponse({'error': 'No files uploaded'}, status_code=400)
+
+    # Reject oversized archives from their headers before streaming a 200
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(state.executor, check_uploads, [(f.filename, f.file) for f in files])
+    except Exception as e:
+        state.pending -= 1
+        await form.close()
+        if isinstance(e, UploadTooLarge):
+            return upload_too_large(e)
+        return JSONResponse({'success': False, 'error': 'Invalid upload', 'details': str(e)}, status_code=400)
+
+    logger.info(f"Processing batch of {len(files)} uploaded file(s)")
+
+    def entries():
+        for file in files:
+            yield from iter_upload_entries(file.filename, file.file)
+
+    async def stream():
+        lines = batch_result_lines(state.engine, entries())
+        try:
+            while True:
+                line = await loop.run_in_executor(state.executor, next, lines, None)
+                if line is None:
+                    break
+                yield line
+        finally:
+            state.pending -= 1
+            await form.close()
+
+    return StreamingResponse(stream(), media_type='application/x-ndjson')
+
+
+async def get_model_info(request):
+    """Get information about the classification model."""
+    info = model_info_response(state.engine)
+    info['server'] = {
+        'pid': os.getpid(),
+        'inference_threads': INFERENCE_THREADS,
+        'max_pending': MAX_PENDING,
+        'pending': state.pending,
+        'rejected': state.rejected
+    }
+    return JSONResponse(info)
+
+
+app = Starlette(
+    routes=[
+        Route('/', home),
+        Route('/classify', classify_image, methods=['POST']),
+        Route('/classify_batch', classify_batch, methods=['POST']),
+        Route('/model_info', get_model_info),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+        Middleware(BodySizeLimitMiddleware)
+    ],
+    lifespan=lifespan
+)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.environ.get('PORT', 5000))
+    workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    logger.info(f"Starting AI Image Classifier ASGI backend on port {port} with {workers} worker(s)")
+    uvicorn.run(
+        'image_classifier_asgi:app',
+        host='0.0.0.0',
+        port=port,
+        workers=workers,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        timeout_graceful_shutdown=30
+    )
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Prediction cache for the AI Image Classifier backend
+
+Predictions are keyed by a BLAKE2b hash of the uploaded bytes, so a
+repeated upload skips decode and inference entirely. The in-memory
+cache is a bounded LRU; an optional SQLite file keeps the newest
+max_entries predictions across restarts. Entries are namespaced by the
+model fingerprint so a retrained model never serves stale predictions,
+and rows of earlier fingerprints are deleted when the cache opens.
+"""
+
+import os
+import hashlib
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(data):
+    """Fast 128-bit hash of raw upload bytes."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def model_fingerprint(model_path):
+    """Identify a model file by path, size and modification time."""
+    if model_path is None or not os.path.exists(model_path):
+        return 'none'
+    stat = os.stat(model_path)
+    return f"{os.path.abspath(model_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+class PredictionCache:
+    """
+    Bounded LRU of class-probability vectors with optional on-disk persistence
+
+    The SQLite file holds the newest max_entries predictions by insertion
+    (hits do not write to disk), so a restart warms the LRU in insertion order.
+    """
+
+    def __init__(self, max_entries=4096, path=None, model_key='none'):
+        self.max_entries = max_entries
+        self.path = path
+        self.model_key = model_key
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        # The file is trimmed every trim_interval inserts, so it may exceed max_entries by that many rows
+        self.trim_interval = max(1, max_entries // 16)
+        self._inserts = 0
+
+        if path:
+            self._open(path)
+
+    def _open(self, path):
+        """Open the SQLite store, drop other models' rows and warm the LRU with this model's newest entries."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS predictions ('
+            ' model_key TEXT NOT NULL, content_hash TEXT NOT NULL, probabilities BLOB NOT NULL,'
+            ' PRIMARY KEY (model_key, content_hash))'
+        )
+
+        # Predictions of earlier models (retrains, other TTA or exit settings) can never be served again
+        stale = self._db.execute('DELETE FROM predictions WHERE model_key != ?', (self.model_key,)).rowcount
+        if stale:
+            logger.info(f"Prediction cache dropped {stale} entries of earlier models")
+        self._trim()
+
+        rows = self._db.execute(
+            'SELECT content_hash, probabilities FROM predictions WHERE model_key = ?'
+            ' ORDER BY rowid DESC LIMIT ?',
+            (self.model_key, self.max_entries)
+        ).fetchall()
+        for key, blob in reversed(rows):
+            self._entries[key] = np.frombuffer(blob, dtype=np.float32)
+        logger.info(f"Prediction cache loaded {len(rows)} entries from {path}")
+
+    def _trim(self):
+        """Keep only the newest max_entries rows (by insertion) of the current model in the file."""
+        self._db.execute(
+            'DELETE FROM predictions WHERE model_key = ? AND rowid <= ('
+            ' SELECT rowid FROM predictions WHERE model_key = ? ORDER BY rowid DESC LIMIT 1 OFFSET ?)',
+            (self.model_key, self.model_key, self.max_entries)
+        )
+
+    def get(self, key):
+        """Return the cached probabilities for key, or None on a miss."""
+        with self._lock:
+            probabilities = self._entries.get(key)
+            if probabilities is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return probabilities
+
+    def put(self, key, probabilities):
+        """Store a probability vector, evicting the least recently used entries."""
+        probabilities = np.array(probabilities, dtype=np.float32)
+        probabilities.setflags(write=False)
+
+        with self._lock:
+            self._entries[key] = probabilities
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO predictions (model_key, content_hash, probabilities) VALUES (?, ?, ?)',
+                    (self.model_key, key, probabilities.tobytes())
+                )
+                # Bounded while serving, also when several workers share the file
+                self._inserts += 1
+                if self._inserts % self.trim_interval == 0:
+                    self._trim()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def info(self):
+        """Hit/miss counters for the /model_info endpoint."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'persistent': self.path
+            }
@@ -1,45 +1,28 @@
 #!/usr/bin/env python3
-"""Simple TensorFlow.js model converter"""
+"""Simple TensorFlow.js model converter (in-process, works offline)"""
 
-import subprocess
+import os
 import sys
 
-print("=" * 50)
-print("Fixing NumPy/TensorFlow.js compatibility...")
-print("=" * 50)
+SITE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SITE_DIR, 'dakotaai-demos', 'apps', 'image-classifier'))
 
-# Step 1: Install compatible versions
-print("\n1. Installing compatible TensorFlow.js...")
-cmd = [sys.executable, "-m", "pip", "install", "tensorflowjs==3.18.0", "numpy==1.21.0", "--quiet"]
-result = subprocess.run(cmd, capture_output=True, text=True)
-
-if result.returncode == 0:
-    print("Compatible packages installed!")
-else:
-    print("Package installation failed")
-    print(result.stderr)
-    sys.exit(1)
+from tfjs_writer import convert_model_file
 
-# Step 2: Try the conversion with the compatible versions
-print("\n2. Converting model...")
-conversion_script = '''
-import tensorflow as tf
-from tensorflow import keras
-from tensorflowjs import converters
-import os
-os.chdir("C:/Users/neil/Desktop/transfer-image-classifier")
-model = keras.models.load_model("models/transfer_model.h5")
-print("Model loaded!")
-converters.save_keras_model(model, "../dakotaai-site/demos/tfjs_model")
-print("Model converted successfully!")
-'''
+model_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+    SITE_DIR, '..', 'transfer-image-classifier', 'models', 'transfer_model.h5')
+output_dir = os.path.join(SITE_DIR, 'demos', 'tfjs_model')
 
-conversion_cmd = [sys.executable, "-c", conversion_script]
-result = subprocess.run(conversion_cmd, capture_output=True, text=True)
+print("=" * 50)
+print("Converting model to TensorFlow.js...")
+print("=" * 50)
 
-if result.returncode == 0:
-    print("\nSUCCESS! Conversion completed!")
-    print("You can now open demos/image_classifier.html to use your real AI model!")
-else:
+try:
+    convert_model_file(model_path, output_dir, converted_by='dakotaai-site-converter')
+except Exception as e:
     print("Conversion failed:")
-    print(result.stderr)
+    print(e)
+    sys.exit(1)
+
+print("\nSUCCESS! Conversion completed!")
+print("You can now open demos/image_classifier.html to use your real AI model!")